@@ -0,0 +1,71 @@
+"""
+``aio_captcha_handler`` throughput at high concurrency on the standard ``asyncio`` loop and on ``uvloop``.
+
+Usage:
+    pip install python3-capsolver[uvloop]
+    python benchmarks/bench_event_loop.py --tasks 5000 --concurrency 1000
+
+Every loop runs the same number of captcha solvings against the local stand-in API,
+the wall time, throughput and the client process CPU time are printed for every loop.
+"""
+
+import sys
+import time
+import asyncio
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from stub_server import start_stub_server  # noqa: E402
+
+from python3_capsolver.core.base import CaptchaParams  # noqa: E402
+from python3_capsolver.core.enum import CaptchaTypeEnm  # noqa: E402
+from python3_capsolver.core.event_loop import run, uvloop_enabled  # noqa: E402
+
+
+async def solve_all(request_url: str, tasks: int, concurrency: int) -> int:
+    solver = CaptchaParams(
+        api_key="benchmark", captcha_type=CaptchaTypeEnm.ImageToTextTask, sleep_time=0.05, request_url=request_url
+    )
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def solve() -> bool:
+        async with semaphore:
+            result = await solver.aio_captcha_handler(task_payload={"body": "benchmark"})
+            return result["status"] == "ready"
+
+    return sum(await asyncio.gather(*[solve() for _ in range(tasks)]))
+
+
+def measure(request_url: str, tasks: int, concurrency: int, use_uvloop: bool) -> None:
+    started, cpu_started = time.perf_counter(), time.process_time()
+    solved = run(solve_all(request_url, tasks, concurrency), use_uvloop=use_uvloop)
+    elapsed, cpu = time.perf_counter() - started, time.process_time() - cpu_started
+    name = "uvloop" if use_uvloop else "asyncio"
+    print(
+        f"{name:>8}: {solved}/{tasks} solved in {elapsed:.2f} sec, {solved / elapsed:.0f} tasks/sec, CPU {cpu:.2f} sec"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=1000)
+    parser.add_argument("--polls", type=int, default=2, help="getTaskResult requests before the task is ready")
+    args = parser.parse_args()
+
+    process, request_url = start_stub_server(polls_to_ready=args.polls)
+    try:
+        # warm up the stand-in and the connections
+        measure(request_url, tasks=min(args.tasks, 200), concurrency=args.concurrency, use_uvloop=False)
+        print("---")
+        measure(request_url, args.tasks, args.concurrency, use_uvloop=False)
+        if uvloop_enabled(True):
+            measure(request_url, args.tasks, args.concurrency, use_uvloop=True)
+    finally:
+        process.terminate()
+
+
+if __name__ == "__main__":
+    main()
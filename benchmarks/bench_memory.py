@@ -0,0 +1,130 @@
+"""
+Memory used by the pending captcha tasks.
+
+Usage:
+    python benchmarks/bench_memory.py --tasks 2000
+
+Two numbers are printed:
+
+* bytes per the per-task state object - instrument or task handle with the created task ID and the deadline,
+  the shared ``CaptchaParams`` instance is not counted;
+* bytes per the pending ``aio_captcha_handler`` call - all the tasks are created against the local stand-in API
+  and wait for the result at the same time, the memory held by them after the first result request
+  is divided by the number of tasks, so the pooled connections of the polling are counted too.
+  Peak memory of the whole run is printed too, it includes the requests in flight and not collected garbage.
+"""
+
+import gc
+import sys
+import uuid
+import asyncio
+import argparse
+import tracemalloc
+from typing import Any, List, Tuple, Callable
+from pathlib import Path
+
+import aiohttp
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from stub_server import start_stub_server  # noqa: E402
+
+from python3_capsolver.core.base import CaptchaParams  # noqa: E402
+from python3_capsolver.core.enum import CaptchaTypeEnm  # noqa: E402
+from python3_capsolver.core.event_loop import run  # noqa: E402
+from python3_capsolver.core.task_handle import TaskHandle  # noqa: E402
+from python3_capsolver.core.aio_captcha_instrument import AIOCaptchaInstrument  # noqa: E402
+from python3_capsolver.core.sio_captcha_instrument import SIOCaptchaInstrument  # noqa: E402
+
+# tasks are pending after the first result request
+POLLS_TO_READY = 2
+
+
+def per_object(name: str, factory: Callable[[], Any], tasks: int) -> None:
+    # task IDs are created before the measurement, they are received from the API in any case
+    task_ids = [str(uuid.uuid4()) for _ in range(tasks)]
+    tracemalloc.start()
+    objects: List[Any] = []
+    for task_id in task_ids:
+        state = factory()
+        state.task_id = task_id
+        objects.append(state)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # the list of the objects is not the per-task state
+    print(f"{name:>22}: {(current - sys.getsizeof(objects)) / tasks:.0f} bytes per task")
+
+
+async def solve_all(request_url: str, tasks: int, sleep_time: float) -> Tuple[int, int]:
+    solver = CaptchaParams(
+        api_key="benchmark",
+        captcha_type=CaptchaTypeEnm.ImageToTextTask,
+        sleep_time=sleep_time,
+        request_url=request_url,
+    )
+    solving = asyncio.gather(*[solver.aio_captcha_handler(task_payload={"body": "b"}) for _ in range(tasks)])
+    pending = 0
+    async with aiohttp.ClientSession() as session:
+        while not solving.done():
+            await asyncio.wait([solving], timeout=0.1)
+            async with session.get(f"{request_url}/stats") as resp:
+                stats = await resp.json()
+            if stats["created"] == tasks and tasks <= stats["polled"] < POLLS_TO_READY * tasks:
+                # all the tasks are polled once and wait for the next result request, the last responses can be
+                # still processed, so the smallest memory is taken. Garbage is collected first,
+                # so only the memory held by the tasks
+                gc.collect()
+                current = tracemalloc.get_traced_memory()[0]
+                pending = min(pending, current) if pending else current
+    return sum(result["status"] == "ready" for result in solving.result()), pending
+
+
+def pending_solving(request_url: str, tasks: int, sleep_time: float) -> None:
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    solved, pending = run(solve_all(request_url, tasks, sleep_time))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    if not pending:
+        print("Tasks are not polled before the next result request, increase --sleep-time")
+        return
+    print(
+        f"{'aio_captcha_handler':>22}: {(pending - baseline) / tasks:.0f} bytes per pending task, "
+        f"peak {(peak - baseline) / tasks:.0f} bytes per task, {solved}/{tasks} solved"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=2000)
+    parser.add_argument(
+        "--sleep-time",
+        type=float,
+        default=5,
+        help="seconds between the result requests, all the tasks must be created and polled",
+    )
+    args = parser.parse_args()
+
+    captcha_params = CaptchaParams(api_key="benchmark", captcha_type=CaptchaTypeEnm.ImageToTextTask)
+    task_params = {"type": CaptchaTypeEnm.ImageToTextTask.value, "body": "b"}
+    per_object(
+        "SIOCaptchaInstrument",
+        lambda: SIOCaptchaInstrument(captcha_params=captcha_params, task_params=task_params),
+        args.tasks,
+    )
+    per_object(
+        "AIOCaptchaInstrument",
+        lambda: AIOCaptchaInstrument(captcha_params=captcha_params, task_params=task_params),
+        args.tasks,
+    )
+    per_object("TaskHandle", lambda: TaskHandle(captcha_params=captcha_params, task_id=None), args.tasks)
+
+    process, request_url = start_stub_server(polls_to_ready=POLLS_TO_READY)
+    try:
+        pending_solving(request_url, args.tasks, args.sleep_time)
+    finally:
+        process.terminate()
+
+
+if __name__ == "__main__":
+    main()
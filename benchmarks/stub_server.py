@@ -0,0 +1,66 @@
+"""
+Local stand-in for the Capsolver API used by the benchmarks.
+
+The server is started in the separate process, so it does not share the event loop and CPU with the measured client.
+Tasks become ``ready`` after ``polls_to_ready`` ``getTaskResult`` requests,
+numbers of the created tasks and result requests are returned by ``GET /stats``.
+"""
+
+import uuid
+import socket
+import multiprocessing
+from typing import Dict, Tuple
+
+from aiohttp import web
+
+from python3_capsolver.core.event_loop import new_event_loop
+
+
+def make_app(polls_to_ready: int) -> web.Application:
+    tasks: Dict[str, int] = {}
+    stats = {"created": 0, "polled": 0}
+
+    async def create_task(request: web.Request) -> web.Response:
+        await request.read()
+        task_id = str(uuid.uuid4())
+        tasks[task_id] = 0
+        stats["created"] += 1
+        return web.json_response({"errorId": 0, "taskId": task_id, "status": "idle"})
+
+    async def get_task_result(request: web.Request) -> web.Response:
+        task_id = (await request.json())["taskId"]
+        tasks[task_id] += 1
+        stats["polled"] += 1
+        if tasks[task_id] < polls_to_ready:
+            return web.json_response({"errorId": 0, "taskId": task_id, "status": "processing"})
+        del tasks[task_id]
+        return web.json_response({"errorId": 0, "taskId": task_id, "status": "ready", "solution": {"text": "stub"}})
+
+    async def get_stats(request: web.Request) -> web.Response:
+        return web.json_response(stats)
+
+    app = web.Application()
+    app.router.add_post("/createTask", create_task)
+    app.router.add_post("/getTaskResult", get_task_result)
+    app.router.add_get("/stats", get_stats)
+    return app
+
+
+def _serve(sock: socket.socket, polls_to_ready: int) -> None:
+    # the stand-in is always served on the fastest available loop, so it is not the bottleneck
+    web.run_app(make_app(polls_to_ready), sock=sock, print=None, loop=new_event_loop(use_uvloop=True))
+
+
+def start_stub_server(polls_to_ready: int = 2) -> Tuple[multiprocessing.Process, str]:
+    """
+    Function start the stand-in server process
+
+    Returns:
+        Server process and it address
+    """
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    sock.listen(1024)
+    process = multiprocessing.Process(target=_serve, args=(sock, polls_to_ready), daemon=True)
+    process.start()
+    return process, f"http://127.0.0.1:{sock.getsockname()[1]}"
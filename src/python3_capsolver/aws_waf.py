@@ -21,6 +21,7 @@ class AwsWaf(CaptchaParams):
                      - sleep_time: int - captcha solution waintig time in sec
                      - request_url: str - API address for sending requests,
                                             else official will be used
+                     - timeout: float - total captcha solving deadline in sec
 
 
     Examples:
@@ -0,0 +1,237 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import contextlib
+from typing import IO, Any, Dict, List, Tuple, Iterator, Optional, Sequence
+
+from .core import event_loop
+from .core.base import CaptchaParams
+from .core.enum import CaptchaTypeEnm, ResponseStatusEnm
+from .core.const import REQUEST_URL, SOLVE_TIMEOUT
+from .core.aio_captcha_instrument import AIOCaptchaInstrument
+
+__all__ = ("SolveStats", "solve_stream", "main")
+
+
+class SolveStats:
+    """
+    Counters of the bulk solving progress
+    """
+
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.solved = 0
+        self.failed = 0
+        self.in_flight = 0
+
+    @property
+    def throughput(self) -> float:
+        """
+        Finished tasks per second
+        """
+        elapsed = time.monotonic() - self.started_at
+        return (self.solved + self.failed) / elapsed if elapsed > 0 else 0.0
+
+    def record(self, record: Dict[str, Any]) -> None:
+        result = record.get("result") or {}
+        if result.get("errorId") == 0 and result.get("status") == ResponseStatusEnm.Ready:
+            self.solved += 1
+        else:
+            self.failed += 1
+
+    def __str__(self) -> str:
+        return (
+            f"solved: {self.solved}, failed: {self.failed}, in flight: {self.in_flight}, "
+            f"{self.throughput:.2f} tasks/sec"
+        )
+
+
+async def _solve_line(captcha_params: CaptchaParams, base_task: Dict[str, Any], index: int, line: str) -> Dict:
+    """
+    Function solve the task from the single JSONL line, errors are returned in the record instead of raising
+    """
+    try:
+        task_payload = json.loads(line)
+        if not isinstance(task_payload, dict):
+            raise ValueError("task payload must be JSON object")
+    except ValueError as error:
+        return {"index": index, "error": f"Invalid task payload: {error}"}
+    try:
+        result = await AIOCaptchaInstrument(
+            captcha_params=captcha_params, task_params={**base_task, **task_payload}
+        ).processing_captcha()
+    except Exception as error:
+        return {"index": index, "error": f"{type(error).__name__}: {error}"}
+    return {"index": index, "result": result}
+
+
+async def solve_stream(
+    captcha_params: CaptchaParams,
+    input_file: IO[str],
+    output_file: IO[str],
+    concurrency: int = 10,
+    captcha_type: Optional[str] = None,
+    progress_file: Optional[IO[str]] = None,
+    progress_interval: float = 5.0,
+) -> SolveStats:
+    """
+    Function solve the tasks read line by line from JSONL input and write JSONL results in completion order.
+    Not more than ``concurrency`` lines are read ahead, so the memory usage does not depend on the input size.
+
+    Args:
+        captcha_params: Captcha solving class instance used for all the tasks
+        input_file: JSONL input, every not empty line is the task payload
+        output_file: JSONL output, every line is ``{"index": N, "result": {...}}``
+                        or ``{"index": N, "error": "..."}``, where ``N`` is the input line number starting from 0
+        concurrency: Max number of the concurrently solved tasks
+        captcha_type: Task type used if the payload has no ``type`` key
+        progress_file: Output for the progress and throughput stats, ``None`` disables them
+        progress_interval: Seconds between the progress stats lines, ``0`` prints only the final stats
+
+    Returns:
+        Final solving stats
+    """
+    if concurrency < 1:
+        raise ValueError("Concurrency must be at least 1")
+    loop = asyncio.get_running_loop()
+    base_task = {"type": captcha_type} if captcha_type else {}
+    stats = SolveStats()
+    tasks: "asyncio.Queue[Optional[Tuple[int, str]]]" = asyncio.Queue(maxsize=concurrency)
+
+    async def read() -> None:
+        index = 0
+        while True:
+            # input can be slow stdin, so it is read outside the event loop
+            line = await loop.run_in_executor(None, input_file.readline)
+            if not line:
+                break
+            if line.strip():
+                await tasks.put((index, line))
+            index += 1
+        for _ in range(concurrency):
+            await tasks.put(None)
+
+    async def work() -> None:
+        while True:
+            item = await tasks.get()
+            if item is None:
+                return
+            stats.in_flight += 1
+            record = await _solve_line(captcha_params, base_task, *item)
+            stats.in_flight -= 1
+            stats.record(record)
+            output_file.write(json.dumps(record) + "\n")
+            output_file.flush()
+
+    async def report() -> None:
+        while True:
+            await asyncio.sleep(progress_interval)
+            print(stats, file=progress_file, flush=True)
+
+    reporter = None
+    if progress_file is not None and progress_interval > 0:
+        reporter = asyncio.create_task(report())
+    try:
+        await asyncio.gather(read(), *(work() for _ in range(concurrency)))
+    finally:
+        if reporter is not None:
+            reporter.cancel()
+    if progress_file is not None:
+        print(stats, file=progress_file, flush=True)
+    return stats
+
+
+def _parse_args(argv: Optional[Sequence[str]]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m python3_capsolver",
+        description="Solve task payloads from JSONL file or stdin and stream JSONL results to stdout "
+        "in completion order, progress stats are printed to stderr.",
+    )
+    parser.add_argument("input", nargs="?", default="-", help="JSONL file with the task payloads, '-' for stdin")
+    parser.add_argument("-o", "--output", default="-", help="JSONL results file, '-' for stdout")
+    parser.add_argument(
+        "-k", "--api-key", default=os.getenv("API_KEY"), help="Capsolver API key, API_KEY env variable by default"
+    )
+    parser.add_argument(
+        "-t",
+        "--captcha-type",
+        choices=[item.value for item in CaptchaTypeEnm if item != CaptchaTypeEnm.Control],
+        metavar="CAPTCHA_TYPE",
+        help="Task type for the payloads without 'type' key, e.g. ImageToTextTask",
+    )
+    parser.add_argument("-c", "--concurrency", type=int, default=10, help="Max number of concurrently solved tasks")
+    parser.add_argument(
+        "--request-url",
+        action="append",
+        help="API address, can be repeated for several regional gateways",
+    )
+    parser.add_argument("--sleep-time", type=float, default=5, help="Seconds between the task result requests")
+    parser.add_argument("--timeout", type=float, default=SOLVE_TIMEOUT, help="Single task solving deadline in seconds")
+    parser.add_argument(
+        "--progress-interval",
+        type=float,
+        default=5.0,
+        help="Seconds between the progress stats lines, 0 prints only the final stats",
+    )
+    parser.add_argument("-q", "--quiet", action="store_true", help="Do not print progress stats")
+    parser.add_argument("--uvloop", action="store_true", help="Run on uvloop if it is installed")
+    args = parser.parse_args(argv)
+    if not args.api_key:
+        parser.error("API key is not set, pass --api-key or set API_KEY env variable")
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+    return args
+
+
+@contextlib.contextmanager
+def _open(path: str, mode: str, default: IO[str]) -> Iterator[IO[str]]:
+    if path == "-":
+        yield default
+    else:
+        with open(path, mode, encoding="utf-8") as file:
+            yield file
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Bulk solving command line entry point
+
+    Examples:
+        .. code-block:: bash
+
+            $ export API_KEY="CAI-12345...."
+            $ python -m python3_capsolver tasks.jsonl -t ImageToTextTask -c 20 > results.jsonl
+            solved: 148, failed: 2, in flight: 0, 7.41 tasks/sec
+
+    Returns:
+        Process exit code, ``1`` if some tasks were not solved
+    """
+    args = _parse_args(argv)
+    # task type is set per line, so the params are created with the neutral type
+    captcha_params = CaptchaParams(
+        api_key=args.api_key,
+        captcha_type=CaptchaTypeEnm.Control,
+        sleep_time=args.sleep_time,
+        request_url=args.request_url or REQUEST_URL,
+        timeout=args.timeout,
+    )
+
+    async def solve(input_file: IO[str], output_file: IO[str]) -> SolveStats:
+        # the event loop session is closed before the loop
+        async with captcha_params:
+            return await solve_stream(
+                captcha_params=captcha_params,
+                input_file=input_file,
+                output_file=output_file,
+                concurrency=args.concurrency,
+                captcha_type=args.captcha_type,
+                progress_file=None if args.quiet else sys.stderr,
+                progress_interval=args.progress_interval,
+            )
+
+    with _open(args.input, "r", sys.stdin) as input_file, _open(args.output, "w", sys.stdout) as output_file:
+        stats = event_loop.run(solve(input_file, output_file), use_uvloop=args.uvloop or None)
+    return 1 if stats.failed else 0
@@ -1,7 +1,14 @@
-from typing import Dict
+import asyncio
+import itertools
+from typing import Any, Dict, Tuple, Union, Iterable, Iterator, Optional, AsyncIterator
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+
+import aiohttp
 
 from .core.base import CaptchaParams
-from .core.enum import CaptchaTypeEnm, EndpointPostfixEnm
+from .core.enum import ErrorKindEnm, CaptchaTypeEnm, EndpointPostfixEnm
+from .core.feedback import FeedbackQueue
+from .core.exceptions import error_kind
 from .core.aio_captcha_instrument import AIOCaptchaInstrument
 from .core.sio_captcha_instrument import SIOCaptchaInstrument
 
@@ -14,6 +21,7 @@ class Control(CaptchaParams):
 
     Args:
         api_key: Capsolver API key
+        kwargs: Additional not required params for the ``CaptchaParams``, like ``retry_policy``
 
     Notes:
         https://docs.capsolver.com/en/guide/api-getbalance/
@@ -28,8 +36,39 @@ class Control(CaptchaParams):
     def __init__(
         self,
         api_key: str,
+        **kwargs,
     ):
-        super().__init__(api_key=api_key, captcha_type=CaptchaTypeEnm.Control)
+        super().__init__(api_key=api_key, captcha_type=CaptchaTypeEnm.Control, **kwargs)
+        # background ``feedbackTask`` queue, created on the first ``submit_feedback`` call
+        self._feedback_queue: Optional[FeedbackQueue] = None
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = super().__getstate__()
+        state["_feedback_queue"] = None
+        return state
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        # enqueued feedback is sent without the event loop blocking
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
+        return await super().__aexit__(exc_type, exc_value, traceback)
+
+    def close(self) -> None:
+        """
+        Method send enqueued feedback and close SYNC sessions of all the threads
+        """
+        if self._feedback_queue is not None:
+            self._feedback_queue.close()
+        super().close()
+
+    @property
+    def feedback_queue(self) -> FeedbackQueue:
+        """
+        Background ``feedbackTask`` queue used by ``submit_feedback``
+        """
+        with self._params_lock:
+            if self._feedback_queue is None:
+                self._feedback_queue = FeedbackQueue(self)
+            return self._feedback_queue
 
     def get_balance(self) -> dict:
         """
@@ -46,11 +85,12 @@ class Control(CaptchaParams):
         Notes:
             Check class docstring for more info
         """
-        self._captcha_handling_instrument = SIOCaptchaInstrument(captcha_params=self)
-        return self._captcha_handling_instrument.send_post_request(
-            session=self._captcha_handling_instrument.session,
+        return SIOCaptchaInstrument.send_post_request(
+            session=self.sessions.get(),
             url_postfix=EndpointPostfixEnm.GET_BALANCE,
             payload={"clientKey": self.create_task_payload.clientKey},
+            retry_policy=self.retry_policy,
+            endpoints=self.endpoints,
         )
 
     async def aio_get_balance(self) -> dict:
@@ -70,8 +110,11 @@ class Control(CaptchaParams):
             Check class docstring for more info
         """
         return await AIOCaptchaInstrument.send_post_request(
+            session=self.aio_sessions.get(),
             url_postfix=EndpointPostfixEnm.GET_BALANCE,
             payload={"clientKey": self.create_task_payload.clientKey},
+            retry_policy=self.retry_policy,
+            endpoints=self.endpoints,
         )
 
     def create_task(self, task_payload: Dict) -> dict:
@@ -118,13 +161,14 @@ class Control(CaptchaParams):
         Notes:
             https://docs.capsolver.com/en/guide/api-createtask/
         """
-        self.task_params.update(task_payload)
-        self.create_task_payload.task = self.task_params
-        self._captcha_handling_instrument = SIOCaptchaInstrument(captcha_params=self)
-        return self._captcha_handling_instrument.send_post_request(
-            session=self._captcha_handling_instrument.session,
+        payload = self.create_task_payload.to_dict()
+        payload["task"] = self._update_task_params(task_payload)
+        return SIOCaptchaInstrument.send_post_request(
+            session=self.sessions.get(),
             url_postfix=EndpointPostfixEnm.CREATE_TASK,
-            payload=self.create_task_payload.to_dict(),
+            payload=payload,
+            retry_policy=self.retry_policy,
+            endpoints=self.endpoints,
         )
 
     async def aio_create_task(self, task_payload: Dict) -> dict:
@@ -173,11 +217,14 @@ class Control(CaptchaParams):
         Notes:
             https://docs.capsolver.com/en/guide/api-createtask/
         """
-        self.task_params.update(task_payload)
-        self.create_task_payload.task = self.task_params
+        payload = self.create_task_payload.to_dict()
+        payload["task"] = self._update_task_params(task_payload)
         return await AIOCaptchaInstrument.send_post_request(
+            session=self.aio_sessions.get(),
             url_postfix=EndpointPostfixEnm.CREATE_TASK,
-            payload=self.create_task_payload.to_dict(),
+            payload=payload,
+            retry_policy=self.retry_policy,
+            endpoints=self.endpoints,
         )
 
     def get_task_result(self, task_id: str) -> dict:
@@ -208,11 +255,12 @@ class Control(CaptchaParams):
         Notes:
             https://docs.capsolver.com/en/guide/api-gettaskresult/
         """
-        self._captcha_handling_instrument = SIOCaptchaInstrument(captcha_params=self)
-        return self._captcha_handling_instrument.send_post_request(
-            session=self._captcha_handling_instrument.session,
+        return SIOCaptchaInstrument.send_post_request(
+            session=self.sessions.get(),
             url_postfix=EndpointPostfixEnm.GET_TASK_RESULT,
             payload={"clientKey": self.create_task_payload.clientKey, "taskId": task_id},
+            retry_policy=self.retry_policy,
+            endpoints=self.endpoints,
         )
 
     async def aio_get_task_result(self, task_id: str) -> dict:
@@ -246,10 +294,167 @@ class Control(CaptchaParams):
             https://docs.capsolver.com/en/guide/api-gettaskresult/
         """
         return await AIOCaptchaInstrument.send_post_request(
+            session=self.aio_sessions.get(),
             url_postfix=EndpointPostfixEnm.GET_TASK_RESULT,
             payload={"clientKey": self.create_task_payload.clientKey, "taskId": task_id},
+            retry_policy=self.retry_policy,
+            endpoints=self.endpoints,
         )
 
+    def get_task_results(
+        self, task_ids: Iterable[str], concurrency: int = 10, return_exceptions: bool = False
+    ) -> Iterator[Tuple[str, Union[dict, Exception]]]:
+        """
+        Synchronous method to send ``getTaskResult`` requests for a lot of tasks concurrently.
+
+        Requests are sent from ``concurrency`` threads, every thread reuses own session connections.
+        Results are returned as soon as they are received, not in the ``task_ids`` order.
+        Task IDs are read from the iterable lazily, so it can be a generator of any length.
+        Rate limit errors are repeated according to the ``retry_policy``.
+        The ``concurrency_limiter`` limits only the ASYNC requests, so here the requests are limited
+        by the ``concurrency`` only, use ``aio_get_task_results`` to share the adaptive limit with the solvings.
+
+        Args:
+            task_ids: Tasks IDs
+            concurrency: Max number of the concurrent requests
+            return_exceptions: If ``True`` - failed request exception is returned as the task result,
+                                else it is raised and the remaining requests are cancelled
+
+        Examples:
+            >>> from python3_capsolver.control import Control
+            >>> for task_id, result in Control(api_key="CAI-1324...").get_task_results(
+            ...     task_ids=["db0a3153-xxxx", "c4b6ab75-xxxx"], concurrency=50
+            ... ):
+            ...     print(task_id, result["status"])
+            c4b6ab75-xxxx ready
+            db0a3153-xxxx ready
+
+        Returns:
+            Iterator of the task ID and full server response pairs
+
+        Notes:
+            https://docs.capsolver.com/en/guide/api-gettaskresult/
+        """
+        if concurrency < 1:
+            raise ValueError("Concurrency must be at least 1")
+        task_ids = iter(task_ids)
+        pending: Dict[Future, str] = {}
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+
+            def submit() -> None:
+                # the next requests are queued, so the threads do not wait for the results processing
+                for task_id in itertools.islice(task_ids, 2 * concurrency - len(pending)):
+                    pending[executor.submit(self.get_task_result, task_id)] = task_id
+
+            submit()
+            try:
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield pending.pop(future), self._lookup_result(future, return_exceptions)
+                    submit()
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    async def aio_get_task_results(
+        self, task_ids: Iterable[str], concurrency: int = 10, return_exceptions: bool = False
+    ) -> AsyncIterator[Tuple[str, Union[dict, Exception]]]:
+        """
+        Asynchronous method to send ``getTaskResult`` requests for a lot of tasks concurrently.
+
+        Requests are sent over the pooled session of the running event loop, up to ``concurrency`` at once.
+        Results are returned as soon as they are received, not in the ``task_ids`` order.
+        Task IDs are read from the iterable lazily, so it can be a generator of any length.
+        Rate limit errors are repeated according to the ``retry_policy``,
+        if the ``concurrency_limiter`` is set - every request takes it slot, so the limit is respected
+        and adapted to the rate limit errors.
+
+        Args:
+            task_ids: Tasks IDs
+            concurrency: Max number of the concurrent requests
+            return_exceptions: If ``True`` - failed request exception is returned as the task result,
+                                else it is raised and the remaining requests are cancelled
+
+        Examples:
+            >>> import asyncio
+            >>> from python3_capsolver.control import Control
+            >>> async def main():
+            ...     control = Control(api_key="CAI-1324...")
+            ...     async for task_id, result in control.aio_get_task_results(
+            ...         task_ids=["db0a3153-xxxx", "c4b6ab75-xxxx"], concurrency=50
+            ...     ):
+            ...         print(task_id, result["status"])
+            >>> asyncio.run(main())
+            c4b6ab75-xxxx ready
+            db0a3153-xxxx ready
+
+        Returns:
+            Async iterator of the task ID and full server response pairs
+
+        Notes:
+            https://docs.capsolver.com/en/guide/api-gettaskresult/
+        """
+        if concurrency < 1:
+            raise ValueError("Concurrency must be at least 1")
+        task_ids = iter(task_ids)
+        pending: Dict[asyncio.Future, str] = {}
+        session = self.aio_sessions.get()
+
+        def submit() -> None:
+            for task_id in itertools.islice(task_ids, concurrency - len(pending)):
+                pending[asyncio.ensure_future(self._aio_lookup(session=session, task_id=task_id))] = task_id
+
+        submit()
+        try:
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    yield pending.pop(future), self._lookup_result(future, return_exceptions)
+                submit()
+        finally:
+            for future in pending:
+                future.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _aio_lookup(self, session: aiohttp.ClientSession, task_id: str) -> dict:
+        """
+        Method send single ``getTaskResult`` request, in the concurrency limiter slot if it is set
+        """
+        limiter = self.concurrency_limiter
+        acquired_at = None if limiter is None else await limiter.acquire()
+        success: Optional[bool] = False
+        try:
+            result = await AIOCaptchaInstrument.send_post_request(
+                session=session,
+                url_postfix=EndpointPostfixEnm.GET_TASK_RESULT,
+                payload={"clientKey": self.create_task_payload.clientKey, "taskId": task_id},
+                timeout=aiohttp.ClientTimeout(sock_connect=self.connect_timeout, sock_read=self.read_timeout),
+                retry_policy=self.retry_policy,
+                endpoints=self.endpoints,
+            )
+            # only the capacity errors tell about the API load
+            success = not result.get("errorId") or error_kind(result.get("errorCode")) != ErrorKindEnm.RetryAfterDelay
+            return result
+        except asyncio.CancelledError:
+            success = None
+            raise
+        finally:
+            if limiter is not None:
+                limiter.release(acquired_at, success=success)
+
+    @staticmethod
+    def _lookup_result(future: Union[Future, asyncio.Future], return_exceptions: bool) -> Union[dict, Exception]:
+        """
+        Method return the finished lookup result, or it exception if ``return_exceptions`` is set
+        """
+        error = future.exception()
+        if error is None:
+            return future.result()
+        if return_exceptions:
+            return error
+        raise error
+
     def get_token(self, task_payload: Dict) -> dict:
         """
         Synchronous method to send custom ``getToken`` request.
@@ -286,13 +491,14 @@ class Control(CaptchaParams):
         Notes:
             https://docs.capsolver.com/en/guide/api-getToken/
         """
-        self.task_params.update(task_payload)
-        self.create_task_payload.task = self.task_params
-        self._captcha_handling_instrument = SIOCaptchaInstrument(captcha_params=self)
-        return self._captcha_handling_instrument.send_post_request(
-            session=self._captcha_handling_instrument.session,
+        payload = self.create_task_payload.to_dict()
+        payload["task"] = self._update_task_params(task_payload)
+        return SIOCaptchaInstrument.send_post_request(
+            session=self.sessions.get(),
             url_postfix=EndpointPostfixEnm.GET_TOKEN,
-            payload=self.create_task_payload.to_dict(),
+            payload=payload,
+            retry_policy=self.retry_policy,
+            endpoints=self.endpoints,
         )
 
     async def aio_get_token(self, task_payload: Dict) -> dict:
@@ -333,11 +539,14 @@ class Control(CaptchaParams):
         Notes:
             https://docs.capsolver.com/en/guide/api-getToken/
         """
-        self.task_params.update(task_payload)
-        self.create_task_payload.task = self.task_params
+        payload = self.create_task_payload.to_dict()
+        payload["task"] = self._update_task_params(task_payload)
         return await AIOCaptchaInstrument.send_post_request(
+            session=self.aio_sessions.get(),
             url_postfix=EndpointPostfixEnm.GET_TOKEN,
-            payload=self.create_task_payload.to_dict(),
+            payload=payload,
+            retry_policy=self.retry_policy,
+            endpoints=self.endpoints,
         )
 
     def feedback_task(self, task_id: str, result_payload: Dict) -> dict:
@@ -374,17 +583,44 @@ class Control(CaptchaParams):
         Notes:
             https://docs.capsolver.com/en/guide/api-feedback/
         """
-        self.task_params.update(result_payload)
         dict_payload = self.create_task_payload.to_dict()
-        dict_payload.update({"result": self.task_params, "taskId": task_id})
+        dict_payload.update({"result": dict(result_payload), "taskId": task_id})
 
-        self._captcha_handling_instrument = SIOCaptchaInstrument(captcha_params=self)
-        return self._captcha_handling_instrument.send_post_request(
-            session=self._captcha_handling_instrument.session,
-            url_postfix=EndpointPostfixEnm.GET_TOKEN,
+        return SIOCaptchaInstrument.send_post_request(
+            session=self.sessions.get(),
+            url_postfix=EndpointPostfixEnm.FEEDBACK_TASK,
             payload=dict_payload,
+            retry_policy=self.retry_policy,
+            endpoints=self.endpoints,
         )
 
+    def submit_feedback(self, task_id: str, result_payload: Dict) -> bool:
+        """
+        Method enqueue ``feedbackTask`` request, it is sent in the background and the method returns at once.
+        It can be called from both SYNC and ASYNC code,
+        enqueued feedback is sent before ``close`` call, context manager exit or process exit.
+
+        Args:
+            task_id: Task ID to report
+            result_payload: Parameters passed to the payload under ``result`` key,
+                            like ``invalid``, ``code``, ``message`` and etc.
+
+        Examples:
+            >>> from python3_capsolver.control import Control
+            >>> with Control(api_key="CAI-1324...") as control:
+            ...     control.submit_feedback(task_id="db0a3153-xxxx", result_payload={"invalid": True, "code": 1001})
+            True
+
+        Returns:
+            ``False`` if the queue is full and the feedback was dropped
+
+        Notes:
+            https://docs.capsolver.com/en/guide/api-feedback/
+
+            Check ``FeedbackQueue`` class docstring for the queue settings
+        """
+        return self.feedback_queue.submit(task_id=task_id, result_payload=result_payload)
+
     async def aio_feedback_task(self, task_id: str, result_payload: Dict) -> dict:
         """
         Asynchronous method to send custom ``feedbackTask`` request.
@@ -421,11 +657,13 @@ class Control(CaptchaParams):
         Notes:
             https://docs.capsolver.com/en/guide/api-feedback/
         """
-        self.task_params.update(result_payload)
         dict_payload = self.create_task_payload.to_dict()
-        dict_payload.update({"result": self.task_params, "taskId": task_id})
+        dict_payload.update({"result": dict(result_payload), "taskId": task_id})
 
         return await AIOCaptchaInstrument.send_post_request(
-            url_postfix=EndpointPostfixEnm.GET_TOKEN,
+            session=self.aio_sessions.get(),
+            url_postfix=EndpointPostfixEnm.FEEDBACK_TASK,
             payload=dict_payload,
+            retry_policy=self.retry_policy,
+            endpoints=self.endpoints,
         )
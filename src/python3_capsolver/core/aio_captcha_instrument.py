@@ -1,118 +1,405 @@
+import time
 import asyncio
 import logging
-from typing import Optional
+from typing import List, Union, Optional
 from urllib import parse
 
 import aiohttp
 
-from .enum import ResponseStatusEnm, EndpointPostfixEnm
-from .const import REQUEST_URL, VALID_STATUS_CODES
-from .utils import attempts_generator
-from .serializer import CaptchaResponseSer
-from .captcha_instrument import CaptchaInstrumentBase
+from .log import log_error
+from .enum import ErrorKindEnm, TaskPhaseEnm, ResponseStatusEnm, EndpointPostfixEnm
+from .const import REQUEST_URL, READ_TIMEOUT, CONNECT_TIMEOUT, VALID_STATUS_CODES
+from .retry import RetryPolicy
+from .hedging import HedgingPolicy
+from .endpoints import EndpointPool
+from .exceptions import HTTPStatusError, CircuitOpenError, CompressionRejectedError, error_kind
+from .serializer import CaptchaResponseSer, RequestGetTaskResultSer
+from .circuit_breaker import CircuitBreaker
+from .captcha_instrument import MIN_REQUEST_TIMEOUT, IDEMPOTENT_ENDPOINTS, CaptchaInstrumentBase
 
 __all__ = ("AIOCaptchaInstrument",)
 
+logger = logging.getLogger(__name__)
+
 
 class AIOCaptchaInstrument(CaptchaInstrumentBase):
     """
     Instrument for working with async captcha
+
+    Args:
+        captcha_params: Captcha solving class instance
+        timeout: Total captcha solving deadline in seconds, ``captcha_params.timeout`` is used if not set
+        connect_timeout: Single request connection timeout in seconds
+        read_timeout: Single request read timeout in seconds
+        task_params: Task params snapshot for this solving, ``captcha_params.task_params`` are used if not set
     """
 
-    def __init__(self, captcha_params: "CaptchaParams"):
-        super().__init__()
+    __slots__ = (
+        "captcha_params",
+        "created_task_data",
+        "timeout",
+        "connect_timeout",
+        "read_timeout",
+    )
+
+    def __init__(
+        self,
+        captcha_params: "CaptchaParams",
+        timeout: Optional[float] = None,
+        connect_timeout: Optional[float] = None,
+        read_timeout: Optional[float] = None,
+        task_params: Optional[dict] = None,
+    ):
+        # task params snapshot, so the captcha params changes will not affect the running solving
+        super().__init__(task_params=dict(captcha_params.task_params) if task_params is None else task_params)
         self.captcha_params = captcha_params
         self.created_task_data = CaptchaResponseSer
+        self.timeout = captcha_params.timeout if timeout is None else timeout
+        self.connect_timeout = captcha_params.connect_timeout if connect_timeout is None else connect_timeout
+        self.read_timeout = captcha_params.read_timeout if read_timeout is None else read_timeout
+
+    @property
+    def task_payload(self) -> dict:
+        """
+        Full ``createTask`` payload, it is built only for the request and is not kept with the pending task
+        """
+        payload = self.captcha_params.create_task_payload.to_dict()
+        payload["task"] = self.task_params
+        return payload
+
+    def _request_timeout(self) -> aiohttp.ClientTimeout:
+        """
+        Method return timeouts for the next request, total request time is clipped by the deadline
+        """
+        time_left = self._time_left()
+        return aiohttp.ClientTimeout(
+            total=None if time_left is None else max(time_left, MIN_REQUEST_TIMEOUT),
+            sock_connect=self.connect_timeout,
+            sock_read=self.read_timeout,
+        )
 
     async def processing_captcha(self) -> dict:
-        self.captcha_params.create_task_payload.task = self.captcha_params.task_params
-        self.created_task_data = CaptchaResponseSer(**await self.__create_task())
+        self._start_deadline(self.timeout)
+        if self.captcha_params.hedging is None:
+            return (await self._solve()).to_dict()
+        return (await self._hedged_solve(hedging=self.captcha_params.hedging)).to_dict()
+
+    async def _solve(self) -> CaptchaResponseSer:
+        """
+        Method create the task and wait for it result.
+        If the solving is cancelled - created task ID is passed to the ``on_task_abandoned`` hook.
+        If the concurrency limiter is set - the solving waits for the free slot before the task creation
+        """
+        self._check_balance(self.captcha_params.balance_monitor)
+        limiter = self.captcha_params.concurrency_limiter
+        if limiter is not None:
+            try:
+                acquired_at = await asyncio.wait_for(limiter.acquire(), timeout=self._time_left())
+            except asyncio.TimeoutError:
+                return self._timeout_result()
+
+        load_signal = None
+        try:
+            result = await self.__solve()
+            load_signal = self._load_signal(result)
+        except asyncio.CancelledError:
+            self._report_abandoned(self.captcha_params.on_task_abandoned)
+            if self.superseded:
+                self._journal_done(self.captcha_params.journal)
+            raise
+        except Exception:
+            load_signal = False
+            raise
+        finally:
+            if limiter is not None:
+                limiter.release(acquired_at, success=load_signal, create_latency=self.create_latency)
+        self._journal_done(self.captcha_params.journal, result)
+        self._balance_solved(self.captcha_params.balance_monitor, result)
+        return result
+
+    async def __solve(self) -> CaptchaResponseSer:
+        try:
+            await self.create_task()
+        except asyncio.TimeoutError:
+            if self._deadline_exceeded():
+                return self._timeout_result()
+            raise
 
         # if task created and already ready - return result
         if self.created_task_data.errorId == 0:
             if str(self.created_task_data.status).lower() == ResponseStatusEnm.Ready.value:
-                return self.created_task_data.to_dict()
-            return (await self.__get_result()).to_dict()
+                return self.created_task_data
+            return await self.get_result()
         else:
             self.created_task_data.status = ResponseStatusEnm.Failed
 
-        return self.created_task_data.to_dict()
+        return self.created_task_data
+
+    async def _hedged_solve(self, hedging: HedgingPolicy) -> CaptchaResponseSer:
+        """
+        Method create the duplicate task if the first one is not solved after the hedging delay
+        and return the first successfully solved task result
+        """
+        hedging.register_task()
+        started = time.monotonic()
+        instruments = [self]
+        pending = {asyncio.ensure_future(self._solve())}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=self._next_sleep(hedging.hedge_delay()))
+            if not done and not self._deadline_exceeded() and hedging.acquire_hedge():
+                instruments.append(self._twin())
+                pending.add(asyncio.ensure_future(instruments[-1]._solve()))
+
+            result, error = None, None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        error = error or task.exception()
+                    elif result is None or task.result().status == ResponseStatusEnm.Ready:
+                        result = task.result()
+                if result is not None and result.status == ResponseStatusEnm.Ready:
+                    hedging.record_latency(time.monotonic() - started)
+                    break
+            if result is None:
+                raise error
+            for instrument in instruments:
+                instrument.superseded = True
+            return result
+        finally:
+            # stop the slower task polling and wait until it connection is released
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.wait(pending)
+
+    def _twin(self) -> "AIOCaptchaInstrument":
+        """
+        Method return new instrument for the same captcha, with the same deadline
+        """
+        twin = AIOCaptchaInstrument(
+            captcha_params=self.captcha_params,
+            timeout=self.timeout,
+            connect_timeout=self.connect_timeout,
+            read_timeout=self.read_timeout,
+        )
+        twin.task_params = self.task_params
+        twin.started_at = self.started_at
+        twin.deadline = self.deadline
+        return twin
+
+    async def create_task(self, session: Optional[aiohttp.ClientSession] = None) -> CaptchaResponseSer:
+        """
+        Method send ``createTask`` request without waiting for the task result,
+        created task ID is saved in the instrument ``task_id`` attribute.
+        If ``session`` is not passed - captcha params session of the running event loop is used
+        """
+        payload = self.task_payload
+        preprocessor = self.captcha_params.preprocessor
+        pooled = self._pooled_fields(payload, preprocessor)
+        if pooled:
+            # large binary fields are encoded by the pool workers, they are passed via the shared memory
+            encoded = await asyncio.gather(*[preprocessor.aio_encode_image(value) for value in pooled.values()])
+            payload = {**payload, "task": {**payload["task"], **dict(zip(pooled, encoded))}}
+        payload = self._encode_buffers(payload)
+        started = time.monotonic()
+        self.created_task_data = CaptchaResponseSer(**await self.__create_task(payload=payload, session=session))
+        self.create_latency = time.monotonic() - started
+        self.task_id = self.created_task_data.taskId
+        self._journal_created(self.captcha_params.journal, captcha_type=self.task_params.get("type"))
+        if logger.isEnabledFor(logging.DEBUG):
+            self._log_debug(
+                logger, TaskPhaseEnm.Create, "Task %s created, status: %s", self.task_id, self.created_task_data.status
+            )
+        return self.created_task_data
+
+    async def __create_task(
+        self,
+        payload: Union[dict, bytes, bytearray],
+        url_postfix: str = EndpointPostfixEnm.CREATE_TASK.value,
+        session: Optional[aiohttp.ClientSession] = None,
+    ) -> dict:
+        """
+        Function send the ASYNC request to service and wait for result.
+        Every failed attempt is repeated on the next API address, the task is pinned to the used one.
+        Body is compressed on the first use of the API address which accepts the compressed bodies
+        """
+        session = session or self.captcha_params.aio_sessions.get()
+        endpoints = self.captcha_params.endpoints
+        compression = self.captcha_params.compression
+        next_url = endpoints.rotation()
+        # compressed body or `None` if it is not compressible, empty until the first compressed request
+        compressed_body: List[Optional[bytes]] = []
+
+        async def post(request_url: str) -> dict:
+            self.endpoint = request_url
+            request = dict(session=session, request_url=request_url, url_postfix=url_postfix)
+            if compression is None or not compression.accepts(request_url):
+                return await self._post(payload=payload, **request)
+            if not compressed_body:
+                body = self._compressible_body(payload, compression)
+                compressed_body.append(None if body is None else await compression.aio_compress(body))
+            compressed = compressed_body[0]
+            if compressed is None:
+                return await self._post(payload=payload, **request)
+            try:
+                return await self._post(payload=compressed, compressed=True, **request)
+            except CompressionRejectedError:
+                result = await self._post(payload=payload, **request)
+                if not result.get("errorId"):
+                    # the same request is accepted uncompressed
+                    compression.reject(request_url)
+                return result
+
+        try:
+            return await self.captcha_params.retry_policy.aio_call(
+                lambda: endpoints.aio_call(post, next_url=next_url),
+                idempotent=False,
+                deadline=self.deadline,
+            )
+        except CircuitOpenError:
+            # the API is known to be unavailable, traceback is not logged
+            raise
+        except Exception as error:
+            self._log_error(logger, error, phase=TaskPhaseEnm.Create)
+            raise
+
+    async def _post(
+        self,
+        session: aiohttp.ClientSession,
+        request_url: str,
+        url_postfix: str,
+        payload: Union[dict, bytes, bytearray],
+        compressed: bool = False,
+    ) -> dict:
+        """
+        Method send single ASYNC request to the API address and return the response JSON
+        """
+        async with session.post(
+            parse.urljoin(request_url, url_postfix),
+            timeout=self._request_timeout(),
+            **self._body_kwargs(payload, compressed=compressed),
+        ) as resp:
+            if compressed and resp.status in self.captcha_params.compression.reject_statuses:
+                raise CompressionRejectedError(status=resp.status, reason=resp.reason)
+            if resp.status in VALID_STATUS_CODES:
+                return await resp.json()
+            raise HTTPStatusError(status=resp.status, reason=resp.reason)
 
-    async def __create_task(self, url_postfix: str = EndpointPostfixEnm.CREATE_TASK.value) -> dict:
+    async def get_result(self, initial_wait: Optional[float] = None) -> CaptchaResponseSer:
         """
-        Function send the ASYNC request to service and wait for result
+        Function send the ASYNC requests to service and wait for the ``task_id`` task result until the deadline
+
+        Args:
+            initial_wait: Waiting time before the first request, ``sleep_time`` by default
         """
-        async with aiohttp.ClientSession() as session:
+        initial_wait = self.captcha_params.sleep_time if initial_wait is None else initial_wait
+        await asyncio.sleep(self._next_sleep(initial_wait))
+
+        session = self.captcha_params.aio_sessions.get()
+        while not self._deadline_exceeded():
             try:
-                async with session.post(
-                    parse.urljoin(self.captcha_params.request_url, url_postfix),
-                    json=self.captcha_params.create_task_payload.to_dict(),
-                ) as resp:
-                    if resp.status in VALID_STATUS_CODES:
-                        return await resp.json()
-                    else:
-                        raise ValueError(resp.reason)
+                result_data = await self.fetch_result(session=session)
+                if logger.isEnabledFor(logging.DEBUG):
+                    self._log_debug(logger, TaskPhaseEnm.Poll, "Task %s status: %s", self.task_id, result_data.status)
+                if result_data.status in (
+                    ResponseStatusEnm.Ready,
+                    ResponseStatusEnm.Failed,
+                ):
+                    # if captcha ready\failed or have unknown status - return exist data
+                    return result_data
+            except asyncio.TimeoutError as error:
+                if self._deadline_exceeded():
+                    break
+                self._log_error(logger, error, phase=TaskPhaseEnm.Poll)
+                raise
+            except CircuitOpenError:
+                # the API is known to be unavailable, traceback is not logged
+                raise
             except Exception as error:
-                logging.exception(error)
+                self._log_error(logger, error, phase=TaskPhaseEnm.Poll)
                 raise
 
-    async def __get_result(self, url_postfix: str = EndpointPostfixEnm.GET_TASK_RESULT.value) -> CaptchaResponseSer:
-        """
-        Function send the ASYNC request to service and wait for result
-        """
-        # initial waiting
-        await asyncio.sleep(self.captcha_params.sleep_time)
-
-        self.captcha_params.get_result_params.taskId = self.created_task_data.taskId
-        attempts = attempts_generator()
-        async with aiohttp.ClientSession() as session:
-            for _ in attempts:
-                try:
-                    async with session.post(
-                        parse.urljoin(self.captcha_params.request_url, url_postfix),
-                        json=self.captcha_params.get_result_params.to_dict(),
-                    ) as resp:
-                        if resp.status in VALID_STATUS_CODES:
-                            result_data = CaptchaResponseSer(**await resp.json())
-                            if result_data.status in (
-                                ResponseStatusEnm.Ready,
-                                ResponseStatusEnm.Failed,
-                            ):
-                                # if captcha ready\failed or have unknown status - return exist data
-                                return result_data
-                        else:
-                            raise ValueError(resp.reason)
-                except Exception as error:
-                    logging.exception(error)
-                    raise
-
-                # if captcha just created or in processing now - wait
-                await asyncio.sleep(self.captcha_params.sleep_time)
-
-        # default response if server is silent
-        self.result.errorId = 1
-        self.result.errorCode = self.CAPTCHA_UNSOLVABLE
-        self.result.errorDescription = self.CAPTCHA_UNSOLVABLE_DESCRIPTION
-        self.result.taskId = self.created_task_data.taskId
-        self.result.status = ResponseStatusEnm.Failed
-        return self.result
+            # if captcha just created or in processing now - wait
+            await asyncio.sleep(self._next_sleep(self.captcha_params.sleep_time))
+
+        # the deadline is reached and the captcha is still not ready
+        return self._timeout_result(task_id=self.task_id)
+
+    async def fetch_result(
+        self, session: aiohttp.ClientSession, url_postfix: str = EndpointPostfixEnm.GET_TASK_RESULT.value
+    ) -> CaptchaResponseSer:
+        """
+        Function send ``getTaskResult`` request for the ``task_id`` task, failed request is repeated by the retry policy
+        """
+        payload = RequestGetTaskResultSer(
+            clientKey=self.captcha_params.get_result_params.clientKey, taskId=self.task_id
+        ).to_dict()
+        endpoints = self.captcha_params.endpoints
+        # the task creation address is used first, the rest ones only if it fails
+        next_url = endpoints.rotation(pinned=self.endpoint)
+        result = CaptchaResponseSer(
+            **await self.captcha_params.retry_policy.aio_call(
+                lambda: endpoints.aio_call(
+                    lambda request_url: self._post(
+                        session=session, request_url=request_url, url_postfix=url_postfix, payload=payload
+                    ),
+                    next_url=next_url,
+                ),
+                deadline=self.deadline,
+            )
+        )
+        if result.errorId != 0 and error_kind(result.errorCode) == ErrorKindEnm.Permanent:
+            # polling will not fix the error, e.g. invalid task ID or unsolvable captcha
+            result.status = ResponseStatusEnm.Failed
+        return result
 
     @staticmethod
     async def send_post_request(
         payload: Optional[dict] = None,
+        session: Optional[aiohttp.ClientSession] = None,
         url_postfix: EndpointPostfixEnm = EndpointPostfixEnm.GET_BALANCE,
+        timeout: aiohttp.ClientTimeout = aiohttp.ClientTimeout(sock_connect=CONNECT_TIMEOUT, sock_read=READ_TIMEOUT),
+        request_url: str = REQUEST_URL,
+        retry_policy: Optional[RetryPolicy] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        endpoints: Optional[EndpointPool] = None,
     ) -> dict:
         """
-        Function send ASYNC request to service and wait for result
+        Function send ASYNC request to service and wait for result.
+        If ``endpoints`` pool is passed - it is used instead of the ``request_url`` and ``circuit_breaker``.
+        If ``session`` is not passed - new session is used for this call only.
+        The ``timeout`` is applied to every request, so the pooled session of the event loop can be passed
         """
+        if session is None:
+            async with aiohttp.ClientSession() as own_session:
+                return await AIOCaptchaInstrument.send_post_request(
+                    payload=payload,
+                    session=own_session,
+                    url_postfix=url_postfix,
+                    timeout=timeout,
+                    request_url=request_url,
+                    retry_policy=retry_policy,
+                    circuit_breaker=circuit_breaker,
+                    endpoints=endpoints,
+                )
 
-        async with aiohttp.ClientSession() as session:
-            try:
-                async with session.post(parse.urljoin(REQUEST_URL, url_postfix.value), json=payload) as resp:
-                    if resp.status == 200:
-                        return await resp.json()
-                    else:
-                        raise ValueError(resp.status)
-            except Exception as error:
-                logging.exception(error)
-                raise
+        async def post(url: str) -> dict:
+            async with session.post(parse.urljoin(url, url_postfix.value), json=payload, timeout=timeout) as resp:
+                if resp.status == 200:
+                    return await resp.json()
+                raise HTTPStatusError(status=resp.status, reason=resp.reason)
+
+        endpoints = endpoints or EndpointPool([request_url], circuit_breaker=circuit_breaker)
+        next_url = endpoints.rotation()
+        try:
+            return await (retry_policy or RetryPolicy()).aio_call(
+                lambda: endpoints.aio_call(post, next_url=next_url),
+                idempotent=url_postfix in IDEMPOTENT_ENDPOINTS,
+            )
+        except CircuitOpenError:
+            # the API is known to be unavailable, traceback is not logged
+            raise
+        except Exception as error:
+            log_error(logger, error, phase=TaskPhaseEnm.Request)
+            raise
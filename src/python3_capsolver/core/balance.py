@@ -0,0 +1,237 @@
+import time
+import atexit
+import logging
+import threading
+from typing import TYPE_CHECKING, Any, Dict, Callable, Optional
+
+from .log import log_error
+from .enum import TaskPhaseEnm
+from .exceptions import LowBalanceError, raise_for_error
+
+if TYPE_CHECKING:
+    from ..control import Control
+
+
+__all__ = ("BalanceMonitor",)
+
+logger = logging.getLogger(__name__)
+
+
+class BalanceMonitor:
+    """
+    Cached account balance with the background refresh and low balance alerts.
+
+    Balance is requested not more often than once per ``ttl`` seconds, between the requests
+    it is estimated locally - ``task_cost`` is subtracted for every solved task.
+    Call ``start`` to refresh the balance in the background thread over the pooled session of the ``Control``.
+    Pass the monitor to the captcha solving classes to count the solved tasks,
+    if ``block_tasks`` is set - new tasks are not created while the balance is below the ``threshold``.
+    One monitor can be shared by any number of threads and captcha solving class instances.
+
+    Args:
+        control: ``Control`` instance used for the ``getBalance`` requests
+        ttl: Seconds after which the cached balance is requested again, also the background refresh interval
+        threshold: Low balance level, ``None`` disables the low balance check
+        on_low_balance: Hook called with the balance when it drops below the ``threshold``,
+                        called again only after the balance was restored
+        block_tasks: Raise ``LowBalanceError`` instead of the task creation while the balance is below the ``threshold``
+        task_cost: Estimated cost of the single solved task
+
+    Examples:
+        >>> from python3_capsolver.control import Control
+        >>> from python3_capsolver.image_to_text import ImageToText
+        >>> from python3_capsolver.core.balance import BalanceMonitor
+        >>> monitor = BalanceMonitor(Control(api_key="CAI-12345...."),
+        ...                          ttl=60,
+        ...                          threshold=1.0,
+        ...                          on_low_balance=lambda balance: print(f"Low balance: {balance}"),
+        ...                          block_tasks=True,
+        ...                          task_cost=0.0004)
+        >>> monitor.start()
+        >>> ImageToText(api_key="CAI-12345....",
+        ...             balance_monitor=monitor
+        ...            ).captcha_handler(task_payload={"body": "/9j/4AAQSkZJRgABAQAAAQABAAD/2wCEAAoHCBUVxxxxx"})
+        {
+           "errorId":0,
+           "errorCode":"None",
+           "errorDescription":"None",
+           "taskId":"db0a3153-621d-4f5e-8554-a1c032597ee7",
+           "status":"ready",
+           "solution":{
+              "confidence":0.9585,
+              "text":"gcphjd"
+           }
+        }
+        >>> monitor.balance
+        48.6357
+    """
+
+    def __init__(
+        self,
+        control: "Control",
+        ttl: float = 60.0,
+        threshold: Optional[float] = None,
+        on_low_balance: Optional[Callable[[float], None]] = None,
+        block_tasks: bool = False,
+        task_cost: float = 0.0,
+    ):
+        if ttl <= 0:
+            raise ValueError("TTL must be positive")
+        self.control = control
+        self.ttl = ttl
+        self.threshold = threshold
+        self.on_low_balance = on_low_balance
+        self.block_tasks = block_tasks
+        self.task_cost = task_cost
+        # last balance received from the API and the moment of it request
+        self._fetched_balance: Optional[float] = None
+        self._fetched_at: Optional[float] = None
+        # tasks solved after the last request
+        self._solved = 0
+        self._low = False
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._refresher: Optional[threading.Thread] = None
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # another process starts own refresher
+        state = self.__dict__.copy()
+        for name in ("_lock", "_stop", "_refresher"):
+            state.pop(name)
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._refresher = None
+
+    @property
+    def balance(self) -> Optional[float]:
+        """
+        Estimated balance without the request, ``None`` if the balance was not requested yet
+        """
+        with self._lock:
+            return self._estimate()
+
+    @property
+    def is_low(self) -> bool:
+        """
+        Estimated balance is below the ``threshold``
+        """
+        balance = self.balance
+        return self.threshold is not None and balance is not None and balance < self.threshold
+
+    def _estimate(self) -> Optional[float]:
+        if self._fetched_balance is None:
+            return None
+        return self._fetched_balance - self._solved * self.task_cost
+
+    def _is_fresh(self) -> bool:
+        return self._fetched_at is not None and time.monotonic() - self._fetched_at < self.ttl
+
+    def get_balance(self) -> float:
+        """
+        Synchronous method return the cached balance, the balance is requested if the cache is expired
+        """
+        with self._lock:
+            if self._is_fresh():
+                return self._estimate()
+        return self.refresh()
+
+    async def aio_get_balance(self) -> float:
+        """
+        Asynchronous method return the cached balance, the balance is requested if the cache is expired
+        """
+        with self._lock:
+            if self._is_fresh():
+                return self._estimate()
+        return await self.aio_refresh()
+
+    def refresh(self) -> float:
+        """
+        Synchronous method request the balance and reset the local estimation
+        """
+        requested_at = time.monotonic()
+        return self._update(raise_for_error(self.control.get_balance()), requested_at)
+
+    async def aio_refresh(self) -> float:
+        """
+        Asynchronous method request the balance and reset the local estimation,
+        the request is sent over the control session of the running event loop
+        """
+        requested_at = time.monotonic()
+        return self._update(raise_for_error(await self.control.aio_get_balance()), requested_at)
+
+    def _update(self, response: Dict[str, Any], requested_at: float) -> float:
+        with self._lock:
+            if self._fetched_at is not None and requested_at < self._fetched_at:
+                # newer balance is already received by the concurrent request
+                return self._estimate()
+            self._fetched_balance = float(response["balance"])
+            self._fetched_at = requested_at
+            self._solved = 0
+        return self._check_threshold()
+
+    def record_solved(self, count: int = 1) -> None:
+        """
+        Method update the local estimation after the tasks solving
+        """
+        with self._lock:
+            self._solved += count
+        self._check_threshold()
+
+    def _check_threshold(self) -> Optional[float]:
+        """
+        Method call the ``on_low_balance`` hook if the balance dropped below the threshold
+        """
+        with self._lock:
+            balance = self._estimate()
+            low = self.threshold is not None and balance is not None and balance < self.threshold
+            alert = low and not self._low
+            self._low = low
+        if alert and self.on_low_balance is not None:
+            try:
+                self.on_low_balance(balance)
+            except Exception as error:
+                log_error(logger, error, phase=TaskPhaseEnm.Hook)
+        return balance
+
+    def check(self) -> None:
+        """
+        Method raise ``LowBalanceError`` if the new tasks are blocked because of the low balance.
+        Only the cached balance is checked, so the method does not send requests
+        """
+        if self.block_tasks and self.is_low:
+            raise LowBalanceError(balance=self.balance, threshold=self.threshold)
+
+    def start(self) -> None:
+        """
+        Method start the background balance refresh, the balance is requested at once and then every ``ttl`` seconds
+        """
+        with self._lock:
+            if self._refresher is not None and self._refresher.is_alive():
+                return
+            self._stop.clear()
+            self._refresher = threading.Thread(target=self._refresh_loop, name="python3-capsolver-balance", daemon=True)
+            self._refresher.start()
+        atexit.register(self.close)
+
+    def _refresh_loop(self) -> None:
+        while True:
+            try:
+                self.refresh()
+            except Exception as error:
+                log_error(logger, error, phase=TaskPhaseEnm.Balance)
+            if self._stop.wait(self.ttl):
+                return
+
+    def close(self) -> None:
+        """
+        Method stop the background balance refresh
+        """
+        self._stop.set()
+        refresher, self._refresher = self._refresher, None
+        if refresher is not None and refresher is not threading.current_thread():
+            refresher.join()
+        atexit.unregister(self.close)
@@ -1,9 +1,22 @@
-from typing import Any, Dict
+import threading
+from typing import Any, Dict, Union, Callable, Optional, Sequence
 
 from .enum import CaptchaTypeEnm
-from .const import REQUEST_URL
+from .const import REQUEST_URL, READ_TIMEOUT, SOLVE_TIMEOUT, CONNECT_TIMEOUT
+from .retry import RetryPolicy
+from .balance import BalanceMonitor
+from .hedging import HedgingPolicy
+from .journal import TaskJournal
+from .sessions import LoopSessions, ThreadLocalSessions
+from .endpoints import EndpointPool
 from .serializer import TaskSer, RequestCreateTaskSer, RequestGetTaskResultSer
+from .compression import RequestCompression
+from .concurrency import AdaptiveConcurrencyLimiter
+from .task_handle import TaskHandle
+from .cancellation import CancelToken
+from .process_pool import ProcessPoolPreprocessor
 from .context_instr import AIOContextManager, SIOContextManager
+from .circuit_breaker import CircuitBreaker
 from .captcha_instrument import CaptchaInstrumentBase
 from .aio_captcha_instrument import AIOCaptchaInstrument
 from .sio_captcha_instrument import SIOCaptchaInstrument
@@ -19,7 +32,38 @@ class CaptchaParams(SIOContextManager, AIOContextManager):
         api_key: Capsolver API key
         captcha_type: Captcha type name, like `ReCaptchaV2Task` and etc.
         sleep_time: The waiting time between requests to get the result of the Captcha
-        request_url: API address for sending requests
+        request_url: API address for sending requests or list of the addresses, e.g. regional gateways.
+                        For the list new tasks are created on the address with the best recent latency
+                        and error rate, check ``EndpointPool`` docstring for more info
+        timeout: Total captcha solving deadline in seconds, covers task creation and result polling.
+                    If ``None`` - there is no deadline.
+        connect_timeout: Single HTTP request connection timeout in seconds
+        read_timeout: Single HTTP request read timeout in seconds
+        hedging: Opt-in duplicate task submission policy for the slow solving tail reduction.
+                    Check ``HedgingPolicy`` docstring for more info
+        on_task_abandoned: Hook called with the task ID if the solving of the created task
+                            was cancelled before the result was received
+        retry_policy: Failed requests retry policy, default ``RetryPolicy`` is used if not set
+        circuit_breaker: API requests circuit breaker of the first ``request_url`` address,
+                            other addresses get own breakers with the same settings.
+                            If not set - process-wide breaker shared by all instances with the same address is used
+        concurrency_limiter: Opt-in adaptive limit of the in-flight ASYNC solvings.
+                                Check ``AdaptiveConcurrencyLimiter`` docstring for more info
+        journal: Opt-in write-ahead journal of the created tasks, unfinished tasks can be recovered
+                    after the process restart. Check ``TaskJournal`` docstring for more info
+        preprocessor: Opt-in process pool for the base64 encoding of the large binary ``createTask`` task fields.
+                        Check ``ProcessPoolPreprocessor`` docstring for more info
+        compression: Opt-in gzip compression of the large ``createTask`` request bodies.
+                        Check ``RequestCompression`` docstring for more info
+        balance_monitor: Opt-in cached account balance, solved tasks are subtracted from it
+                            and new tasks can be blocked on the low balance.
+                            Check ``BalanceMonitor`` docstring for more info
+
+    Notes:
+        Instance is thread-safe, one instance can be shared by all the threads of ``ThreadPoolExecutor``.
+        SYNC requests are sent over the per-thread sessions, check ``ThreadLocalSessions`` docstring,
+        ASYNC requests - over the per-event loop sessions, check ``LoopSessions`` docstring.
+        Call ``close`` or ``aio_close`` method or use the instance as context manager to close the sessions.
     """
 
     def __init__(
@@ -27,7 +71,19 @@ class CaptchaParams(SIOContextManager, AIOContextManager):
         api_key: str,
         captcha_type: CaptchaTypeEnm,
         sleep_time: int = 5,
-        request_url: str = REQUEST_URL,
+        request_url: Union[str, Sequence[str]] = REQUEST_URL,
+        timeout: Optional[float] = SOLVE_TIMEOUT,
+        connect_timeout: float = CONNECT_TIMEOUT,
+        read_timeout: float = READ_TIMEOUT,
+        hedging: Optional[HedgingPolicy] = None,
+        on_task_abandoned: Optional[Callable[[str], None]] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        concurrency_limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+        journal: Optional[TaskJournal] = None,
+        preprocessor: Optional[ProcessPoolPreprocessor] = None,
+        compression: Optional[RequestCompression] = None,
+        balance_monitor: Optional[BalanceMonitor] = None,
     ):
         # assign args to validator
         self.create_task_payload = RequestCreateTaskSer(clientKey=api_key)
@@ -35,11 +91,82 @@ class CaptchaParams(SIOContextManager, AIOContextManager):
         self.task_params = TaskSer(type=captcha_type.value).to_dict()
         # prepare `get task result` payload
         self.get_result_params = RequestGetTaskResultSer(clientKey=api_key)
-        self.request_url = request_url
+        self.endpoints = EndpointPool.from_request_url(request_url, circuit_breaker=circuit_breaker)
+        # the first address, kept for the single address usage
+        self.request_url = self.endpoints.urls[0]
         self._captcha_handling_instrument = CaptchaInstrumentBase()
         self.sleep_time = sleep_time
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.hedging = hedging
+        self.on_task_abandoned = on_task_abandoned
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.concurrency_limiter = concurrency_limiter
+        self.journal = journal
+        self.preprocessor = preprocessor
+        self.compression = compression
+        self.balance_monitor = balance_monitor
+        # SYNC sessions, one per thread
+        self.sessions = ThreadLocalSessions()
+        # ASYNC sessions, one per event loop
+        self.aio_sessions = LoopSessions()
+        # protects `task_params` updates from the concurrent calls
+        self._params_lock = threading.Lock()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # sessions, locks and the running instrument are not moved to another process
+        state = self.__dict__.copy()
+        for name in ("sessions", "aio_sessions", "_params_lock", "_captcha_handling_instrument"):
+            state.pop(name)
+        # worker processes must not start own pools
+        state["preprocessor"] = None
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self.sessions = ThreadLocalSessions()
+        self.aio_sessions = LoopSessions()
+        self._params_lock = threading.Lock()
+        self._captcha_handling_instrument = CaptchaInstrumentBase()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return super().__exit__(exc_type, exc_value, traceback)
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.aio_close()
+        return await super().__aexit__(exc_type, exc_value, traceback)
 
-    def captcha_handler(self, task_payload: Dict) -> Dict[str, Any]:
+    def close(self) -> None:
+        """
+        Method close SYNC sessions of all the threads and ASYNC sessions of all the event loops
+        """
+        self.sessions.close()
+        self.aio_sessions.close()
+
+    async def aio_close(self) -> None:
+        """
+        Method close ASYNC session of the running event loop
+        """
+        await self.aio_sessions.aio_close()
+
+    def _update_task_params(self, task_payload: Dict) -> Dict:
+        """
+        Method update task params with the call payload and return their snapshot for this call
+        """
+        with self._params_lock:
+            self.task_params.update(task_payload)
+            return dict(self.task_params)
+
+    def captcha_handler(
+        self,
+        task_payload: Dict,
+        timeout: Optional[float] = None,
+        connect_timeout: Optional[float] = None,
+        read_timeout: Optional[float] = None,
+        cancel_token: Optional[CancelToken] = None,
+    ) -> Dict[str, Any]:
         """
         Synchronous method for captcha solving
 
@@ -48,18 +175,37 @@ class CaptchaParams(SIOContextManager, AIOContextManager):
                             and will be passed to the payload under ``task`` key.
                             Like ``websiteURL``, ``image``, ``proxyPassword``, ``websiteKey`` and etc.
                             more info in service docs
+            timeout: Total solving deadline in seconds for this call, overrides the instance ``timeout``
+            connect_timeout: Single request connection timeout for this call
+            read_timeout: Single request read timeout for this call
+            cancel_token: Token for the solving cancellation from another thread,
+                            ``CaptchaCancelledError`` is raised after the token is cancelled
 
         Returns:
-            Dict with full server response
+            Dict with full server response.
+            If the deadline is reached before the captcha is solved - ``errorCode`` is ``ERROR_CLIENT_TIMEOUT``
 
         Notes:
             Check class docstirng for more info
         """
-        self.task_params.update(task_payload)
-        self._captcha_handling_instrument = SIOCaptchaInstrument(captcha_params=self)
-        return self._captcha_handling_instrument.processing_captcha()
+        instrument = SIOCaptchaInstrument(
+            captcha_params=self,
+            timeout=timeout,
+            connect_timeout=connect_timeout,
+            read_timeout=read_timeout,
+            cancel_token=cancel_token,
+            task_params=self._update_task_params(task_payload),
+        )
+        self._captcha_handling_instrument = instrument
+        return instrument.processing_captcha()
 
-    async def aio_captcha_handler(self, task_payload: Dict) -> Dict[str, Any]:
+    async def aio_captcha_handler(
+        self,
+        task_payload: Dict,
+        timeout: Optional[float] = None,
+        connect_timeout: Optional[float] = None,
+        read_timeout: Optional[float] = None,
+    ) -> Dict[str, Any]:
         """
         Asynchronous method for captcha solving
 
@@ -68,13 +214,75 @@ class CaptchaParams(SIOContextManager, AIOContextManager):
                             and will be passed to the payload under ``task`` key.
                             Like ``websiteURL``, ``image``, ``proxyPassword``, ``websiteKey`` and etc.
                             more info in service docs
+            timeout: Total solving deadline in seconds for this call, overrides the instance ``timeout``
+            connect_timeout: Single request connection timeout for this call
+            read_timeout: Single request read timeout for this call
 
         Returns:
-            Dict with full server response
+            Dict with full server response.
+            If the deadline is reached before the captcha is solved - ``errorCode`` is ``ERROR_CLIENT_TIMEOUT``
 
         Notes:
             Check class docstirng for more info
+
+            The call is cancelled with the common ``asyncio`` task cancellation,
+            ID of the already created task is passed to the ``on_task_abandoned`` hook
+        """
+        instrument = AIOCaptchaInstrument(
+            captcha_params=self,
+            timeout=timeout,
+            connect_timeout=connect_timeout,
+            read_timeout=read_timeout,
+            task_params=self._update_task_params(task_payload),
+        )
+        self._captcha_handling_instrument = instrument
+        return await instrument.processing_captcha()
+
+    def create_task_handle(self, task_payload: Dict) -> TaskHandle:
+        """
+        Synchronous method for the task creation without waiting for the task result
+
+        Args:
+            task_payload: Some additional parameters that will be used in creating the task
+                            and will be passed to the payload under ``task`` key.
+                            Like ``websiteURL``, ``image``, ``proxyPassword``, ``websiteKey`` and etc.
+                            more info in service docs
+
+        Examples:
+            >>> from python3_capsolver.image_to_text import ImageToText
+            >>> handle = ImageToText(api_key="CAI-12345....").create_task_handle(task_payload={"body": "base64"})
+            >>> handle.task_id
+            'db0a3153-621d-4f5e-8554-a1c032597ee7'
+            >>> handle.result()
+            {'errorId': 0, 'taskId': 'db0a3153-621d-4f5e-8554-a1c032597ee7', 'status': 'ready', 'solution': {...}}
+
+        Returns:
+            Created task handle, check ``TaskHandle`` docstring for more info
+        """
+        return TaskHandle.create(captcha_params=self, task_params=self._update_task_params(task_payload))
+
+    async def aio_create_task_handle(self, task_payload: Dict) -> TaskHandle:
+        """
+        Asynchronous method for the task creation without waiting for the task result
+
+        Args:
+            task_payload: Some additional parameters that will be used in creating the task
+                            and will be passed to the payload under ``task`` key.
+                            Like ``websiteURL``, ``image``, ``proxyPassword``, ``websiteKey`` and etc.
+                            more info in service docs
+
+        Examples:
+            >>> import asyncio
+            >>> from python3_capsolver.image_to_text import ImageToText
+            >>> async def main():
+            ...     handle = await ImageToText(api_key="CAI-12345....").aio_create_task_handle(
+            ...         task_payload={"body": "base64"}
+            ...     )
+            ...     return await handle.aio_result()
+            >>> asyncio.run(main())
+            {'errorId': 0, 'taskId': 'db0a3153-621d-4f5e-8554-a1c032597ee7', 'status': 'ready', 'solution': {...}}
+
+        Returns:
+            Created task handle, check ``TaskHandle`` docstring for more info
         """
-        self.task_params.update(task_payload)
-        self._captcha_handling_instrument = AIOCaptchaInstrument(captcha_params=self)
-        return await self._captcha_handling_instrument.processing_captcha()
+        return await TaskHandle.aio_create(captcha_params=self, task_params=self._update_task_params(task_payload))
@@ -0,0 +1,90 @@
+import threading
+from typing import List, Callable, Optional
+
+__all__ = ("CancelToken",)
+
+
+class CancelToken:
+    """
+    Token for the cooperative cancellation of the synchronous captcha solving.
+
+    The token can be cancelled from any thread, the solving will be stopped
+    before the next request or immediately if it is waiting between the result requests.
+
+    Examples:
+        >>> import threading
+        >>> from python3_capsolver.image_to_text import ImageToText
+        >>> from python3_capsolver.core.cancellation import CancelToken
+        >>> token = CancelToken()
+        >>> threading.Timer(10, token.cancel).start()
+        >>> ImageToText(api_key="CAI-12345....").captcha_handler(
+        ...                     task_payload={"body": "base64_image_body"}, cancel_token=token
+        ...                 )
+        Traceback (most recent call last):
+        ...
+        python3_capsolver.core.exceptions.CaptchaCancelledError: Captcha solving cancelled, abandoned task ID: db0a3153-xxxx
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], None]] = []
+        self._parent: Optional["CancelToken"] = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self) -> None:
+        """
+        Method cancel the token and run registered callbacks, repeated calls do nothing
+        """
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Method block until the token is cancelled or the timeout is passed
+
+        Returns:
+            ``True`` if the token was cancelled
+        """
+        return self._event.wait(timeout)
+
+    def add_callback(self, callback: Callable[[], None]) -> None:
+        """
+        Method register function called on the token cancelling, called immediately if already cancelled
+        """
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def remove_callback(self, callback: Callable[[], None]) -> None:
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def child(self) -> "CancelToken":
+        """
+        Method return new token which is cancelled together with the current one,
+        but can be cancelled separately too
+        """
+        token = CancelToken()
+        token._parent = self
+        self.add_callback(token.cancel)
+        return token
+
+    def detach(self) -> None:
+        """
+        Method unlink the child token from the parent one
+        """
+        if self._parent is not None:
+            self._parent.remove_callback(self.cancel)
+            self._parent = None
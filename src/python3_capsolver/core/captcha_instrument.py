@@ -1,19 +1,53 @@
 import os
+import mmap
+import time
 import uuid
 import base64
 import shutil
-from typing import Optional
+import asyncio
+import logging
+import contextlib
+from typing import TYPE_CHECKING, Dict, Union, Callable, Iterator, Optional
 from pathlib import Path
 
 import aiohttp
+import msgspec
 import requests
-from requests.adapters import HTTPAdapter
 
-from .enum import SaveFormatsEnm
-from .const import RETRIES, ASYNC_RETRIES
+from .log import log_error, task_fields
+from .enum import ErrorKindEnm, TaskPhaseEnm, SaveFormatsEnm, ResponseStatusEnm, EndpointPostfixEnm
+from .retry import RetryPolicy
+from .exceptions import HTTPStatusError, error_kind
 from .serializer import CaptchaResponseSer
+from .compression import GZIP_HEADERS, RequestCompression
 
-__all__ = ("CaptchaInstrumentBase", "FileInstrument")
+if TYPE_CHECKING:
+    from .balance import BalanceMonitor
+    from .journal import TaskJournal
+    from .process_pool import ProcessPoolPreprocessor
+    from .image_optimizer import ImageOptimizer
+
+
+__all__ = ("CaptchaInstrumentBase", "FileInstrument", "Buffer")
+
+logger = logging.getLogger(__name__)
+
+# the smallest timeout which will be set for the request made right before the deadline
+MIN_REQUEST_TIMEOUT = 0.01
+# requests which can be repeated after the read timeout, they do not create new tasks
+IDEMPOTENT_ENDPOINTS = (EndpointPostfixEnm.GET_BALANCE, EndpointPostfixEnm.GET_TASK_RESULT)
+# headers of the request with already encoded JSON body
+JSON_HEADERS = {"Content-Type": "application/json"}
+# binary image data types, accepted without copying
+Buffer = Union[bytes, bytearray, memoryview, mmap.mmap]
+BUFFER_TYPES = (bytes, bytearray, memoryview, mmap.mmap)
+# encoder of the payloads with binary fields, it writes them as base64 strings straight into the request body
+JSON_ENCODER = msgspec.json.Encoder()
+# local files of this size and larger are mapped to memory instead of reading
+MMAP_THRESHOLD = 256 * 1024
+# size of the mapped file part encoded at once, it is multiple of 3 and of the memory page size,
+# so the parts are encoded without padding and released from the process memory page by page
+ENCODE_CHUNK_SIZE = 3 * 256 * 1024
 
 
 class FileInstrument:
@@ -34,12 +68,37 @@ class FileInstrument:
     """
 
     @staticmethod
-    def _local_file_captcha(captcha_file: str):
+    @contextlib.contextmanager
+    def _local_file_captcha(captcha_file: str) -> Iterator[Buffer]:
         """
-        Method get local file, read it and prepare for sending to Captcha solving service
+        Method open local file and prepare it for sending to Captcha solving service.
+        Small files are read at once, large files are mapped to memory and read by the OS on access
         """
         with open(captcha_file, "rb") as file:
-            return file.read()
+            if os.fstat(file.fileno()).st_size < MMAP_THRESHOLD:
+                yield file.read()
+                return
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                yield mapped
+
+    @staticmethod
+    def _encode_mapped(mapped: mmap.mmap) -> str:
+        """
+        Method encode memory mapped file to the base64 string by chunks,
+        encoded chunks are dropped from the process memory and stay only in the OS page cache
+        """
+        if hasattr(mmap, "MADV_SEQUENTIAL"):
+            mapped.madvise(mmap.MADV_SEQUENTIAL)
+        encoded = bytearray(4 * ((len(mapped) + 2) // 3))
+        with memoryview(mapped) as view:
+            for start in range(0, len(mapped), ENCODE_CHUNK_SIZE):
+                with view[start : start + ENCODE_CHUNK_SIZE] as chunk:
+                    part = base64.b64encode(chunk)
+                    if hasattr(mmap, "MADV_DONTNEED"):
+                        mapped.madvise(mmap.MADV_DONTNEED, start, len(chunk))
+                offset = start // 3 * 4
+                encoded[offset : offset + len(part)] = part
+        return encoded.decode("utf-8")
 
     @staticmethod
     def _file_const_saver(content: bytes, file_path: str, file_extension: str = "png") -> str:
@@ -63,40 +122,114 @@ class FileInstrument:
         shutil.rmtree(full_file_path, ignore_errors=True)
 
     @staticmethod
-    def _url_read(url: str, **kwargs):
+    def _url_read(url: str, retry_policy: Optional[RetryPolicy] = None, **kwargs):
         """
         Method open links
         """
+        retry_policy = retry_policy or RetryPolicy()
+
+        def get() -> requests.Response:
+            resp = session.get(url=url, **kwargs)
+            if resp.status_code in retry_policy.retry_statuses:
+                raise HTTPStatusError(status=resp.status_code, reason=resp.reason)
+            return resp
+
         # prepare session
-        session = requests.Session()
-        session.mount("http://", HTTPAdapter(max_retries=RETRIES))
-        session.mount("https://", HTTPAdapter(max_retries=RETRIES))
-        session.verify = False
-        return session.get(url=url, **kwargs)
+        with requests.Session() as session:
+            session.verify = False
+            return retry_policy.call(get)
 
     @staticmethod
-    async def _aio_url_read(url: str, **kwargs) -> bytes:
+    async def _aio_url_read(url: str, retry_policy: Optional[RetryPolicy] = None, **kwargs) -> bytes:
         """
         Async method read bytes from link
         """
+        retry_policy = retry_policy or RetryPolicy()
+
+        async def get() -> bytes:
+            async with session.get(url=url, **kwargs) as resp:
+                if resp.status == 200:
+                    return await resp.content.read()
+                if resp.status in retry_policy.retry_statuses:
+                    raise HTTPStatusError(status=resp.status, reason=resp.reason)
+                return b""
+
         async with aiohttp.ClientSession() as session:
-            async for attempt in ASYNC_RETRIES:
-                with attempt:
-                    async with session.get(url=url, **kwargs) as resp:
-                        if resp.status == 200:
-                            return await resp.content.read()
-                        return b""
-        return b""
+            return await retry_policy.aio_call(get)
+
+    @staticmethod
+    def _select_optimizer(
+        optimizer: Optional[Union["ImageOptimizer", Dict[str, "ImageOptimizer"]]], module: Optional[str]
+    ) -> Optional["ImageOptimizer"]:
+        """
+        Method return image optimizer for the module, optimizers can be passed as the module name mapping
+        """
+        if isinstance(optimizer, dict):
+            return optimizer.get(module)
+        return optimizer
+
+    def _optimize(
+        self,
+        content: Buffer,
+        optimizer: Optional[Union["ImageOptimizer", Dict[str, "ImageOptimizer"]]],
+        module: Optional[str],
+    ) -> Buffer:
+        """
+        Method optimize image before the encoding, if the optimizer for the module is set
+        """
+        optimizer = self._select_optimizer(optimizer, module)
+        return content if optimizer is None else optimizer.optimize(content)
+
+    async def _aio_optimize(
+        self,
+        content: Buffer,
+        optimizer: Optional[Union["ImageOptimizer", Dict[str, "ImageOptimizer"]]],
+        module: Optional[str],
+    ) -> Buffer:
+        """
+        Async method optimize image in the thread pool, if the optimizer for the module is set
+        """
+        optimizer = self._select_optimizer(optimizer, module)
+        if optimizer is None:
+            return content
+        return await asyncio.get_running_loop().run_in_executor(None, optimizer.optimize, content)
+
+    @staticmethod
+    def _encode(content: Buffer, preprocessor: Optional["ProcessPoolPreprocessor"] = None) -> str:
+        """
+        Method encode file content to the base64 string, in the process pool if it is passed
+        """
+        if preprocessor is not None:
+            return preprocessor.encode_image(content)
+        if isinstance(content, mmap.mmap):
+            return FileInstrument._encode_mapped(content)
+        return base64.b64encode(content).decode("utf-8")
+
+    @staticmethod
+    async def _aio_encode(content: Buffer, preprocessor: Optional["ProcessPoolPreprocessor"] = None) -> str:
+        """
+        Async method encode file content to the base64 string, in the process pool if it is passed.
+        Mapped large files are encoded in the thread pool, so the event loop is not blocked
+        """
+        if preprocessor is not None:
+            return await preprocessor.aio_encode_image(content)
+        if isinstance(content, mmap.mmap):
+            return await asyncio.get_running_loop().run_in_executor(None, FileInstrument._encode_mapped, content)
+        return base64.b64encode(content).decode("utf-8")
 
     def file_processing(
         self,
         captcha_link: Optional[str] = None,
         captcha_file: Optional[str] = None,
-        captcha_base64: Optional[bytes] = None,
+        captcha_base64: Optional[Buffer] = None,
         save_format: SaveFormatsEnm = SaveFormatsEnm.TEMP,
         img_clearing: bool = True,
         file_path: str = "/tmp/",
         file_extension: str = "png",
+        retry_policy: Optional[RetryPolicy] = None,
+        preprocessor: Optional["ProcessPoolPreprocessor"] = None,
+        optimizer: Optional[Union["ImageOptimizer", Dict[str, "ImageOptimizer"]]] = None,
+        module: Optional[str] = None,
         **kwargs,
     ) -> str:
         """
@@ -107,8 +240,9 @@ class FileInstrument:
 
         Args:
             captcha_link: URL link to file. Instrument will send GET request to it and read content
-            captcha_file: Local file path. Instrument will read it
-            captcha_base64: Readed file base64 data. Instrument will decode it in ``utf-8``
+            captcha_file: Local file path. Instrument will read it, large files are mapped to memory
+            captcha_base64: Readed file data - ``bytes``, ``bytearray``, ``memoryview`` or ``mmap.mmap``.
+                            Instrument will encode it to base64 without copying
             save_format: This arg works only with ``captcha_link`` arg.
                             If ``SaveFormatsEnm.CONST`` is set - file will be loaded and saved locally.
             img_clearing: This arg works only with ``captcha_link`` arg.
@@ -117,6 +251,12 @@ class FileInstrument:
                         In this param u can set locally path for downloaded file saving.
             file_extension: This arg works only with ``file_path`` args.
                         In this param u MUST set file format for saving.
+            retry_policy: This arg works only with ``captcha_link`` arg.
+                        Failed file download retry policy, default ``RetryPolicy`` is used if not set.
+            preprocessor: Process pool for the base64 encoding, file is encoded in the current process if not set.
+            optimizer: Image optimizer used before the encoding, or mapping of the ``module`` name to the optimizer.
+                        Image is sent as is if not set.
+            module: Captcha solving module name, like ``common``, used for the optimizer selection
 
         Examples:
             >>> from python3_capsolver.core.captcha_instrument import FileInstrument
@@ -128,19 +268,20 @@ class FileInstrument:
         """
         # if a local file link is passed
         if captcha_file:
-            return base64.b64encode(self._local_file_captcha(captcha_file=captcha_file)).decode("utf-8")
+            with self._local_file_captcha(captcha_file=captcha_file) as content:
+                return self._encode(self._optimize(content, optimizer, module), preprocessor=preprocessor)
         # if the file is transferred in base64 encoding
         elif captcha_base64:
-            return base64.b64encode(captcha_base64).decode("utf-8")
+            return self._encode(self._optimize(captcha_base64, optimizer, module), preprocessor=preprocessor)
         # if a URL is passed
         elif captcha_link:
-            content = self._url_read(url=captcha_link, **kwargs).content
+            content = self._url_read(url=captcha_link, retry_policy=retry_policy, **kwargs).content
             # according to the value of the passed parameter, select the function to save the image
             if save_format == SaveFormatsEnm.CONST.value:
                 full_file_path = self._file_const_saver(content, file_path, file_extension=file_extension)
                 if img_clearing:
                     self._file_clean(full_file_path=full_file_path)
-            return base64.b64encode(content).decode("utf-8")
+            return self._encode(self._optimize(content, optimizer, module), preprocessor=preprocessor)
         else:
             raise ValueError("No valid captcha variant is set.")
 
@@ -148,11 +289,15 @@ class FileInstrument:
         self,
         captcha_link: Optional[str] = None,
         captcha_file: Optional[str] = None,
-        captcha_base64: Optional[bytes] = None,
+        captcha_base64: Optional[Buffer] = None,
         save_format: SaveFormatsEnm = SaveFormatsEnm.TEMP,
         img_clearing: bool = True,
         file_path: str = "/tmp/",
         file_extension: str = "png",
+        retry_policy: Optional[RetryPolicy] = None,
+        preprocessor: Optional["ProcessPoolPreprocessor"] = None,
+        optimizer: Optional[Union["ImageOptimizer", Dict[str, "ImageOptimizer"]]] = None,
+        module: Optional[str] = None,
         **kwargs,
     ) -> str:
         """
@@ -163,8 +308,9 @@ class FileInstrument:
 
         Args:
             captcha_link: URL link to file. Instrument will send GET request to it and read content
-            captcha_file: Local file path. Instrument will read it
-            captcha_base64: Readed file base64 data. Instrument will decode it in ``utf-8``
+            captcha_file: Local file path. Instrument will read it, large files are mapped to memory
+            captcha_base64: Readed file data - ``bytes``, ``bytearray``, ``memoryview`` or ``mmap.mmap``.
+                            Instrument will encode it to base64 without copying
             save_format: This arg works only with ``captcha_link`` arg.
                             If ``SaveFormatsEnm.CONST`` is set - file will be loaded and saved locally.
             img_clearing: This arg works only with ``captcha_link`` arg.
@@ -173,6 +319,12 @@ class FileInstrument:
                         In this param u can set locally path for downloaded file saving.
             file_extension: This arg works only with ``file_path`` args.
                         In this param u MUST set file format for saving.
+            retry_policy: This arg works only with ``captcha_link`` arg.
+                        Failed file download retry policy, default ``RetryPolicy`` is used if not set.
+            preprocessor: Process pool for the base64 encoding, file is encoded in the current process if not set.
+            optimizer: Image optimizer used before the encoding, or mapping of the ``module`` name to the optimizer.
+                        Image is sent as is if not set.
+            module: Captcha solving module name, like ``common``, used for the optimizer selection
 
         Examples:
             >>> import asyncio
@@ -186,19 +338,23 @@ class FileInstrument:
         """
         # if a local file link is passed
         if captcha_file:
-            return base64.b64encode(self._local_file_captcha(captcha_file=captcha_file)).decode("utf-8")
+            with self._local_file_captcha(captcha_file=captcha_file) as content:
+                content = await self._aio_optimize(content, optimizer, module)
+                return await self._aio_encode(content, preprocessor=preprocessor)
         # if the file is transferred in base64 encoding
         elif captcha_base64:
-            return base64.b64encode(captcha_base64).decode("utf-8")
+            content = await self._aio_optimize(captcha_base64, optimizer, module)
+            return await self._aio_encode(content, preprocessor=preprocessor)
         # if a URL is passed
         elif captcha_link:
-            content = await self._aio_url_read(url=captcha_link, **kwargs)
+            content = await self._aio_url_read(url=captcha_link, retry_policy=retry_policy, **kwargs)
             # according to the value of the passed parameter, select the function to save the image
             if save_format == SaveFormatsEnm.CONST.value:
                 full_file_path = self._file_const_saver(content, file_path, file_extension=file_extension)
                 if img_clearing:
                     self._file_clean(full_file_path=full_file_path)
-            return base64.b64encode(content).decode("utf-8")
+            content = await self._aio_optimize(content, optimizer, module)
+            return await self._aio_encode(content, preprocessor=preprocessor)
 
         else:
             raise ValueError("No valid captcha variant is set.")
@@ -207,6 +363,8 @@ class FileInstrument:
 class CaptchaInstrumentBase:
     CAPTCHA_UNSOLVABLE = "ERROR_CAPTCHA_UNSOLVABLE"
     CAPTCHA_UNSOLVABLE_DESCRIPTION = "Captcha not recognized"
+    CAPTCHA_TIMEOUT = "ERROR_CLIENT_TIMEOUT"
+    CAPTCHA_TIMEOUT_DESCRIPTION = "Captcha solving deadline exceeded"
     """
     Basic Captcha solving class
 
@@ -217,5 +375,201 @@ class CaptchaInstrumentBase:
         request_url: API address for sending requests
     """
 
-    def __init__(self):
-        self.result = CaptchaResponseSer()
+    # per-task state only, shared settings and sessions are kept by the captcha params instance,
+    # so the thousands of the pending tasks do not carry own `__dict__`
+    __slots__ = ("task_params", "started_at", "deadline", "task_id", "superseded", "create_latency", "endpoint")
+
+    def __init__(self, task_params: Optional[dict] = None):
+        # `task` body of the solved captcha
+        self.task_params = task_params
+        # `time.monotonic` moment of the solving start
+        self.started_at: Optional[float] = None
+        self.deadline: Optional[float] = None
+        # ID of the task created by the instrument
+        self.task_id: Optional[str] = None
+        # the task result is not needed anymore, e.g. the hedged twin task is solved first
+        self.superseded = False
+        # `createTask` request duration in seconds
+        self.create_latency: Optional[float] = None
+        # API address which created the task, results are requested from it
+        self.endpoint: Optional[str] = None
+
+    def _start_deadline(self, timeout: Optional[float]) -> None:
+        """
+        Method fix the moment after which captcha solving must be stopped
+        """
+        self.started_at = time.monotonic()
+        self.deadline = None if timeout is None else self.started_at + timeout
+
+    def _time_left(self) -> Optional[float]:
+        """
+        Method return seconds left before the deadline, ``None`` if there is no deadline
+        """
+        if self.deadline is None:
+            return None
+        return max(self.deadline - time.monotonic(), 0)
+
+    def _deadline_exceeded(self) -> bool:
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def _next_sleep(self, sleep_time: float) -> float:
+        """
+        Method return waiting time before the next polling request, clipped by the deadline
+        """
+        time_left = self._time_left()
+        return sleep_time if time_left is None else min(sleep_time, time_left)
+
+    def _log_debug(self, logger: logging.Logger, phase: TaskPhaseEnm, message: str, *args) -> None:
+        """
+        Method log the solving step with the task structured fields.
+        Call it only if the logger accepts debug records, so the disabled logging does not build the fields
+        """
+        logger.debug(message, *args, extra=task_fields(phase=phase, **self._log_fields()))
+
+    def _log_error(self, logger: logging.Logger, error: BaseException, phase: TaskPhaseEnm) -> None:
+        """
+        Method log the solving error with the task structured fields, check ``log_error`` docstring
+        """
+        log_error(logger, error, phase=phase, **self._log_fields())
+
+    def _log_fields(self) -> dict:
+        return dict(
+            task_id=self.task_id,
+            captcha_type=self.task_params.get("type") if self.task_params else None,
+            duration=None if self.started_at is None else time.monotonic() - self.started_at,
+        )
+
+    def _report_abandoned(self, hook: Optional[Callable[[str], None]]) -> None:
+        """
+        Method pass ID of the created, but abandoned task to the hook
+        """
+        if hook is None or self.task_id is None:
+            return
+        try:
+            hook(self.task_id)
+        except Exception as error:
+            self._log_error(logger, error, phase=TaskPhaseEnm.Hook)
+
+    def _journal_created(self, journal: Optional["TaskJournal"], captcha_type: Optional[str]) -> None:
+        """
+        Method save created task in the journal
+        """
+        if journal is not None and self.task_id is not None:
+            journal.record_created(
+                task_id=self.task_id, captcha_type=captcha_type, created_at=time.time(), endpoint=self.endpoint
+            )
+
+    def _journal_done(self, journal: Optional["TaskJournal"], result: Optional[CaptchaResponseSer] = None) -> None:
+        """
+        Method mark the task as done in the journal, it result is returned to the caller.
+        After the client side deadline the task is still solved by the API, so it is left for the recovery
+        """
+        if result is not None and result.errorCode == self.CAPTCHA_TIMEOUT:
+            return
+        if journal is not None and self.task_id is not None:
+            journal.record_done(task_id=self.task_id)
+
+    @staticmethod
+    def _check_balance(monitor: Optional["BalanceMonitor"]) -> None:
+        """
+        Method raise ``LowBalanceError`` if the new tasks are blocked by the balance monitor
+        """
+        if monitor is not None:
+            monitor.check()
+
+    @staticmethod
+    def _balance_solved(monitor: Optional["BalanceMonitor"], result: CaptchaResponseSer) -> None:
+        """
+        Method subtract the solved task from the estimated balance
+        """
+        if monitor is not None and result.errorId == 0 and result.status == ResponseStatusEnm.Ready:
+            monitor.record_solved()
+
+    def _load_signal(self, result: CaptchaResponseSer) -> Optional[bool]:
+        """
+        Method check what the solving result tells about the API load
+
+        Returns:
+            ``True`` if the captcha is solved, ``False`` on the client timeout or not permanent API error,
+            ``None`` if the result does not depend on the load, e.g. invalid task data
+        """
+        if result.errorCode == self.CAPTCHA_TIMEOUT:
+            return False
+        if result.errorId != 0:
+            return None if error_kind(result.errorCode) == ErrorKindEnm.Permanent else False
+        return result.status == ResponseStatusEnm.Ready
+
+    @staticmethod
+    def _encode_buffers(payload: dict) -> Union[dict, bytearray]:
+        """
+        Method encode payload with the binary task fields to the JSON request body.
+        Binary fields are written as base64 strings into the buffer preallocated for the whole body,
+        without the intermediate ``bytes`` and ``str`` copies.
+
+        Returns:
+            Encoded request body, or the same payload if there are no binary fields
+        """
+        task = payload.get("task") or {}
+        if not any(isinstance(value, BUFFER_TYPES) for value in task.values()):
+            return payload
+
+        with contextlib.ExitStack() as stack:
+            fields, views = {}, {}
+            for key, value in task.items():
+                if isinstance(value, BUFFER_TYPES):
+                    # `mmap` is not supported by the encoder, all the buffers are passed as the byte views
+                    views[key] = stack.enter_context(stack.enter_context(memoryview(value)).cast("B"))
+                else:
+                    fields[key] = value
+            # other fields, base64 strings with the quotes, keys and separators
+            size = len(JSON_ENCODER.encode({**payload, "task": fields}))
+            size += sum(4 * ((view.nbytes + 2) // 3) + len(key) + 8 for key, view in views.items())
+
+            body = bytearray(size)
+            JSON_ENCODER.encode_into({**payload, "task": {**fields, **views}}, body)
+            return body
+
+    @staticmethod
+    def _pooled_fields(payload: dict, preprocessor: Optional["ProcessPoolPreprocessor"]) -> Dict[str, Buffer]:
+        """
+        Method return binary task fields which are large enough to be encoded by the process pool
+        """
+        if preprocessor is None:
+            return {}
+        return {key: value for key, value in (payload.get("task") or {}).items() if preprocessor.is_large_buffer(value)}
+
+    @staticmethod
+    def _compressible_body(
+        payload: Union[dict, bytes, bytearray], compression: Optional[RequestCompression]
+    ) -> Optional[Union[bytes, bytearray]]:
+        """
+        Method return JSON request body if it must be compressed, else ``None``
+        """
+        if compression is None:
+            return None
+        body = payload if isinstance(payload, (bytes, bytearray)) else JSON_ENCODER.encode(payload)
+        return body if compression.should_compress(body) else None
+
+    @staticmethod
+    def _body_kwargs(payload: Union[dict, bytes, bytearray], compressed: bool = False) -> dict:
+        """
+        Method return request body args, payload can be already encoded to JSON or compressed
+        """
+        if compressed:
+            return {"data": payload, "headers": GZIP_HEADERS}
+        if isinstance(payload, (bytes, bytearray)):
+            return {"data": payload, "headers": JSON_HEADERS}
+        return {"json": payload}
+
+    @classmethod
+    def _timeout_result(cls, task_id: Optional[str] = None) -> CaptchaResponseSer:
+        """
+        Method prepare response for the captcha which was not solved before the deadline
+        """
+        return CaptchaResponseSer(
+            errorId=1,
+            errorCode=cls.CAPTCHA_TIMEOUT,
+            errorDescription=cls.CAPTCHA_TIMEOUT_DESCRIPTION,
+            taskId=task_id,
+            status=ResponseStatusEnm.Failed,
+        )
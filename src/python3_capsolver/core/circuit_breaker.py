@@ -0,0 +1,239 @@
+import time
+import asyncio
+import logging
+import threading
+from typing import Any, Dict, Callable, Optional, Awaitable
+from collections import deque
+
+import aiohttp
+import requests
+
+from .enum import ErrorKindEnm, CircuitStateEnm
+from .const import REQUEST_URL
+from .exceptions import HTTPStatusError, CircuitOpenError, error_kind, status_error_kind
+
+__all__ = ("CircuitBreaker",)
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker for the API requests.
+
+    Breaker is closed while the API works fine. When the share of the failed or slow requests
+    among the recent ones reaches the threshold - breaker is opened and all the requests
+    are rejected with ``CircuitOpenError`` without sending. After ``open_duration`` seconds
+    breaker is half-open: only ``half_open_requests`` probe requests are sent,
+    if all of them are successful - breaker is closed, otherwise it is opened again.
+
+    Network errors, timeouts, HTTP 5xx/429 and not permanent API error codes are counted as failures,
+    permanent errors like invalid key do not mean the API problems and are counted as successes.
+
+    By default one breaker is shared by all captcha solving class instances with the same ``request_url``.
+    Breaker is thread-safe.
+
+    Args:
+        request_url: API address, used in the errors messages
+        failure_rate: Share of the failed requests (0-1) after which the breaker is opened
+        slow_request_duration: Request is counted as failed if it takes more seconds
+        window: Number of the recent requests used for the failure rate calculation
+        min_requests: Min number of the recent requests to calculate the failure rate
+        open_duration: Seconds before the probe requests are allowed
+        half_open_requests: Number of the probe requests
+
+    Examples:
+        >>> from python3_capsolver.image_to_text import ImageToText
+        >>> from python3_capsolver.core.circuit_breaker import CircuitBreaker
+        >>> breaker = CircuitBreaker(failure_rate=0.3, open_duration=60)
+        >>> ImageToText(api_key="CAI-12345....", circuit_breaker=breaker).captcha_handler(
+        ...                     task_payload={"body": "base64_image_body"}
+        ...                 )
+
+        >>> from python3_capsolver.core.circuit_breaker import CircuitBreaker
+        >>> CircuitBreaker.shared("https://api.capsolver.com").state
+        <CircuitStateEnm.Closed: 'closed'>
+    """
+
+    _shared: Dict[str, "CircuitBreaker"] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(
+        self,
+        request_url: str = REQUEST_URL,
+        failure_rate: float = 0.5,
+        slow_request_duration: float = 30,
+        window: int = 100,
+        min_requests: int = 20,
+        open_duration: float = 30,
+        half_open_requests: int = 3,
+    ):
+        if not 0 < failure_rate <= 1:
+            raise ValueError("Failure rate must be in (0, 1] range.")
+
+        self.request_url = request_url
+        self.failure_rate = failure_rate
+        self.slow_request_duration = slow_request_duration
+        self.min_requests = min_requests
+        self.open_duration = open_duration
+        self.half_open_requests = half_open_requests
+
+        self._results = deque(maxlen=window)
+        self._state = CircuitStateEnm.Closed
+        self._opened_at = 0.0
+        self._probes_sent = 0
+        self._probes_succeeded = 0
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state.pop("_lock")
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls, request_url: str) -> "CircuitBreaker":
+        """
+        Method return process-wide breaker for the API address
+        """
+        with cls._shared_lock:
+            if request_url not in cls._shared:
+                cls._shared[request_url] = cls(request_url=request_url)
+            return cls._shared[request_url]
+
+    def clone(self, request_url: str) -> "CircuitBreaker":
+        """
+        Method return new closed breaker with the same settings for another API address
+        """
+        return self.__class__(
+            request_url=request_url,
+            failure_rate=self.failure_rate,
+            slow_request_duration=self.slow_request_duration,
+            window=self._results.maxlen,
+            min_requests=self.min_requests,
+            open_duration=self.open_duration,
+            half_open_requests=self.half_open_requests,
+        )
+
+    @property
+    def state(self) -> CircuitStateEnm:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> CircuitStateEnm:
+        if self._state == CircuitStateEnm.Open and time.monotonic() - self._opened_at >= self.open_duration:
+            self._state = CircuitStateEnm.HalfOpen
+            self._probes_sent = 0
+            self._probes_succeeded = 0
+        return self._state
+
+    def acquire(self) -> None:
+        """
+        Method check if the request can be sent
+
+        Raises:
+            CircuitOpenError: If the breaker is open or all the probe requests are already sent
+        """
+        with self._lock:
+            state = self._current_state()
+            if state == CircuitStateEnm.Closed:
+                return
+            if state == CircuitStateEnm.HalfOpen and self._probes_sent < self.half_open_requests:
+                self._probes_sent += 1
+                return
+            retry_after = max(self._opened_at + self.open_duration - time.monotonic(), 0)
+        raise CircuitOpenError(request_url=self.request_url, retry_after=retry_after)
+
+    def release(self) -> None:
+        """
+        Method return the probe permission if the request was interrupted without the result, e.g. cancelled
+        """
+        with self._lock:
+            if self._state == CircuitStateEnm.HalfOpen and self._probes_sent > self._probes_succeeded:
+                self._probes_sent -= 1
+
+    def record(self, success: bool) -> None:
+        """
+        Method save the request result and switch the breaker state
+        """
+        with self._lock:
+            state = self._current_state()
+            if state == CircuitStateEnm.HalfOpen:
+                if not success:
+                    self._open()
+                else:
+                    self._probes_succeeded += 1
+                    if self._probes_succeeded >= self.half_open_requests:
+                        self._state = CircuitStateEnm.Closed
+                        self._results.clear()
+                        logger.warning("Circuit breaker is closed for %s", self.request_url)
+            elif state == CircuitStateEnm.Closed:
+                self._results.append(success)
+                if len(self._results) >= self.min_requests:
+                    failures = self._results.count(False)
+                    if failures / len(self._results) >= self.failure_rate:
+                        self._open()
+
+    def _open(self) -> None:
+        self._state = CircuitStateEnm.Open
+        self._opened_at = time.monotonic()
+        self._results.clear()
+        logger.warning("Circuit breaker is open for %s during %s sec", self.request_url, self.open_duration)
+
+    def is_failure(self, result: Any = None, error: Optional[BaseException] = None, duration: float = 0) -> bool:
+        """
+        Method check if the request result means the API problems
+        """
+        if duration > self.slow_request_duration:
+            return True
+        if error is None:
+            if not isinstance(result, dict) or result.get("errorId", 0) == 0:
+                return False
+            return error_kind(result.get("errorCode")) != ErrorKindEnm.Permanent
+        if isinstance(error, HTTPStatusError):
+            return status_error_kind(error.status) != ErrorKindEnm.Permanent
+        return isinstance(error, (requests.RequestException, aiohttp.ClientError, asyncio.TimeoutError))
+
+    def call(self, func: Callable[[], Any]) -> Any:
+        """
+        Synchronous method send the request through the breaker
+
+        Args:
+            func: Function sending single request
+        """
+        self.acquire()
+        started = time.monotonic()
+        try:
+            result = func()
+        except Exception as error:
+            self.record(not self.is_failure(error=error, duration=time.monotonic() - started))
+            raise
+        except BaseException:
+            self.release()
+            raise
+        self.record(not self.is_failure(result=result, duration=time.monotonic() - started))
+        return result
+
+    async def aio_call(self, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Asynchronous method send the request through the breaker
+
+        Args:
+            func: Coroutine function sending single request
+        """
+        self.acquire()
+        started = time.monotonic()
+        try:
+            result = await func()
+        except Exception as error:
+            self.record(not self.is_failure(error=error, duration=time.monotonic() - started))
+            raise
+        except BaseException:
+            # cancelled request tells nothing about the API health
+            self.release()
+            raise
+        self.record(not self.is_failure(result=result, duration=time.monotonic() - started))
+        return result
@@ -0,0 +1,106 @@
+import gzip
+import asyncio
+import threading
+from typing import Set, Tuple, Union
+
+__all__ = ("RequestCompression",)
+
+# headers of the request with the compressed JSON body
+GZIP_HEADERS = {"Content-Type": "application/json", "Content-Encoding": "gzip"}
+
+
+class RequestCompression:
+    """
+    Opt-in gzip compression of the large ``createTask`` request bodies.
+
+    Base64 images encoded in JSON are compressed well, so the images are uploaded faster.
+    If the API address rejects the compressed body - the same request is sent uncompressed at once,
+    and if it is accepted - bodies are not compressed for this address anymore.
+    One policy instance can be shared between several captcha solving class instances, it is thread-safe.
+
+    Args:
+        threshold: Request bodies of this size in bytes and larger are compressed
+        level: Compression level, 1 (fastest) - 9 (smallest)
+        offload_threshold: ASYNC request bodies of this size in bytes and larger are compressed in the thread pool,
+                            so the event loop is not blocked
+        reject_statuses: HTTP statuses of the compressed request rejection. ``400`` is not included by default,
+                            the API answers it for the usual errors, so the failed task would be sent twice
+
+    Examples:
+        >>> from python3_capsolver.image_to_text import ImageToText
+        >>> from python3_capsolver.core.compression import RequestCompression
+        >>> ImageToText(api_key="CAI-12345....",
+        ...             compression=RequestCompression(threshold=16 * 1024, level=5)
+        ...            ).captcha_handler(task_payload={"body": "/9j/4AAQSkZJRgABAQAAAQABAAD/2wCEAAoHCBUVxxxxx"})
+        {
+           "errorId":0,
+           "errorCode":"None",
+           "errorDescription":"None",
+           "taskId":"db0a3153-621d-4f5e-8554-a1c032597ee7",
+           "status":"ready",
+           "solution":{
+              "confidence":0.9585,
+              "text":"gcphjd"
+           }
+        }
+    """
+
+    def __init__(
+        self,
+        threshold: int = 32 * 1024,
+        level: int = 6,
+        offload_threshold: int = 256 * 1024,
+        reject_statuses: Tuple[int, ...] = (415,),
+    ):
+        if not 1 <= level <= 9:
+            raise ValueError("Compression level must be in 1-9 range")
+        self.threshold = threshold
+        self.level = level
+        self.offload_threshold = offload_threshold
+        self.reject_statuses = reject_statuses
+        # API addresses which do not accept the compressed bodies
+        self._rejected: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state.pop("_lock")
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def should_compress(self, body: Union[bytes, bytearray]) -> bool:
+        """
+        Method check if the request body is large enough for the compression
+        """
+        return len(body) >= self.threshold
+
+    def accepts(self, request_url: str) -> bool:
+        """
+        Method check if the API address is not known to reject the compressed bodies
+        """
+        with self._lock:
+            return request_url not in self._rejected
+
+    def reject(self, request_url: str) -> None:
+        """
+        Method mark the API address as not accepting the compressed bodies
+        """
+        with self._lock:
+            self._rejected.add(request_url)
+
+    def compress(self, body: Union[bytes, bytearray]) -> bytes:
+        """
+        Synchronous method compress the request body
+        """
+        return gzip.compress(body, compresslevel=self.level, mtime=0)
+
+    async def aio_compress(self, body: Union[bytes, bytearray]) -> bytes:
+        """
+        Asynchronous method compress the request body, large bodies are compressed in the thread pool
+        """
+        if len(body) < self.offload_threshold:
+            return self.compress(body)
+        return await asyncio.get_running_loop().run_in_executor(None, self.compress, body)
@@ -0,0 +1,186 @@
+import time
+import asyncio
+import threading
+from typing import Any, Dict, Deque, Callable, Optional
+from collections import deque
+
+__all__ = ("AdaptiveConcurrencyLimiter",)
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Adaptive limit of the in-flight ASYNC captcha solvings, based on AIMD (additive increase, multiplicative decrease).
+
+    While solvings are successful - the limit is increased by ``increase`` per ``limit`` solved captchas.
+    On errors, client timeouts or ``createTask`` latency rising above ``latency_tolerance`` times
+    of the usual latency - the limit is multiplied by ``decrease_factor``.
+    Solvings over the limit wait for the free slot before the task creation.
+    Limiter is thread-safe and can be shared between event loops.
+
+    Args:
+        initial_limit: Start limit of the in-flight solvings
+        min_limit: The lowest possible limit
+        max_limit: The highest possible limit
+        increase: Limit increase per ``limit`` successful solvings
+        decrease_factor: Limit multiplier on overload signal, in (0, 1) range
+        latency_tolerance: ``createTask`` latency is counted as overload signal
+                            if it is more than the usual latency multiplied by this value
+        latency_window: Number of the recent ``createTask`` latencies used to find the usual latency
+        on_limit_change: Hook called with the new limit value, e.g. for the metrics export
+
+    Examples:
+        >>> import asyncio
+        >>> from python3_capsolver.image_to_text import ImageToText
+        >>> from python3_capsolver.core.concurrency import AdaptiveConcurrencyLimiter
+        >>> limiter = AdaptiveConcurrencyLimiter(initial_limit=20, max_limit=500)
+        >>> solver = ImageToText(api_key="CAI-12345....", concurrency_limiter=limiter)
+        >>> async def main():
+        ...     return await asyncio.gather(
+        ...         *[solver.aio_captcha_handler(task_payload={"body": body}) for body in bodies]
+        ...     )
+        >>> asyncio.run(main())
+        >>> limiter.limit
+        34
+
+    Notes:
+        Only ASYNC solving methods are limited
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 10,
+        min_limit: int = 1,
+        max_limit: int = 200,
+        increase: float = 1,
+        decrease_factor: float = 0.5,
+        latency_tolerance: float = 2,
+        latency_window: int = 100,
+        on_limit_change: Optional[Callable[[int], None]] = None,
+    ):
+        if not 1 <= min_limit <= initial_limit <= max_limit:
+            raise ValueError("Limits must satisfy `1 <= min_limit <= initial_limit <= max_limit`.")
+        if not 0 < decrease_factor < 1:
+            raise ValueError("Decrease factor must be in (0, 1) range.")
+
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self.on_limit_change = on_limit_change
+
+        self._limit = float(initial_limit)
+        self._in_flight = 0
+        self._last_decrease = 0.0
+        self._latencies: Deque[float] = deque(maxlen=latency_window)
+        self._latency_ewma: Optional[float] = None
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # waiters and in-flight solvings belong to the current process
+        state = self.__dict__.copy()
+        for name in ("_lock", "_waiters"):
+            state.pop(name)
+        state["_in_flight"] = 0
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._waiters = deque()
+        self._lock = threading.Lock()
+
+    @property
+    def limit(self) -> int:
+        """
+        Current limit of the in-flight solvings
+        """
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        """
+        Current number of the in-flight solvings
+        """
+        return self._in_flight
+
+    async def acquire(self) -> float:
+        """
+        Method wait for the free slot
+
+        Returns:
+            Slot acquiring time, it must be passed to the ``release`` method
+        """
+        with self._lock:
+            if self._in_flight < self.limit and not self._waiters:
+                self._in_flight += 1
+                return time.monotonic()
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter.done() and not waiter.cancelled():
+                    # the slot was already given to the cancelled waiter - return it
+                    self._in_flight -= 1
+                elif waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                # otherwise the slot is returned by the scheduled wake up
+                self._wake_waiters()
+            raise
+        return time.monotonic()
+
+    def release(self, acquired_at: float, success: Optional[bool], create_latency: Optional[float] = None) -> None:
+        """
+        Method free the slot and adapt the limit
+
+        Args:
+            acquired_at: Value returned by the ``acquire`` method
+            success: ``True`` - the captcha is solved, ``False`` - overload signal (error or timeout),
+                        ``None`` - the result does not tell anything about the API load, e.g. cancelled solving
+            create_latency: ``createTask`` request latency in seconds, if the task was created
+        """
+        with self._lock:
+            self._in_flight -= 1
+            old_limit = self.limit
+            if success and create_latency is not None and self._is_slow(create_latency):
+                success = False
+            if success:
+                self._limit = min(self._limit + self.increase / self._limit, self.max_limit)
+            elif success is not None and acquired_at >= self._last_decrease:
+                # the solvings started before the last decrease do not decrease the limit again
+                self._limit = max(self._limit * self.decrease_factor, self.min_limit)
+                self._last_decrease = time.monotonic()
+            self._wake_waiters()
+            new_limit = self.limit
+        if new_limit != old_limit and self.on_limit_change is not None:
+            self.on_limit_change(new_limit)
+
+    def _is_slow(self, latency: float) -> bool:
+        """
+        Method save the latency and check if the smoothed latency is too far from the usual one
+        """
+        self._latencies.append(latency)
+        self._latency_ewma = latency if self._latency_ewma is None else 0.8 * self._latency_ewma + 0.2 * latency
+        if len(self._latencies) < 10:
+            return False
+        usual_latency = sorted(self._latencies)[len(self._latencies) // 10]
+        return self._latency_ewma > usual_latency * self.latency_tolerance
+
+    def _wake_waiters(self) -> None:
+        while self._waiters and self._in_flight < self.limit:
+            waiter = self._waiters.popleft()
+            if waiter.done():
+                continue
+            self._in_flight += 1
+            waiter.get_loop().call_soon_threadsafe(self._wake, waiter)
+
+    def _wake(self, waiter: asyncio.Future) -> None:
+        if waiter.done():
+            # waiter was cancelled before the wake up - return the slot
+            with self._lock:
+                self._in_flight -= 1
+                self._wake_waiters()
+        else:
+            waiter.set_result(None)
@@ -1,21 +1,64 @@
 import urllib3
-from tenacity import AsyncRetrying, wait_fixed, stop_after_attempt
-from requests.adapters import Retry
 
 __all__ = (
     "APP_ID",
-    "RETRIES",
     "REQUEST_URL",
-    "ASYNC_RETRIES",
+    "READ_TIMEOUT",
+    "SOLVE_TIMEOUT",
+    "CONNECT_TIMEOUT",
+    "GATEWAY_HOST",
+    "GATEWAY_PORT",
+    "RETRY_ERROR_CODES",
+    "RETRY_STATUS_CODES",
+    "REJECTED_STATUS_CODES",
+    "DELAYED_ERROR_CODES",
+    "PERMANENT_ERROR_CODES",
+    "TRANSIENT_ERROR_CODES",
     "VALID_STATUS_CODES",
 )
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
-RETRIES = Retry(total=5, backoff_factor=0.9, status_forcelist=[500, 502, 503, 504])
-ASYNC_RETRIES = AsyncRetrying(wait=wait_fixed(5), stop=stop_after_attempt(5), reraise=True)
-
 REQUEST_URL = "https://api.capsolver.com"
 VALID_STATUS_CODES = (200, 202, 400, 401, 405)
 
+# API error codes taxonomy, unknown error codes are treated as permanent
+# repeated request with the same data will fail again
+PERMANENT_ERROR_CODES = (
+    "ERROR_KEY_DENIED_ACCESS",
+    "ERROR_ZERO_BALANCE",
+    "ERROR_SETTLEMENT_FAILED",
+    "ERROR_IP_BANNED",
+    "ERROR_INVALID_TASK_DATA",
+    "ERROR_BAD_REQUEST",
+    "ERROR_TASK_NOT_SUPPORTED",
+    "ERROR_TASKID_INVALID",
+    "ERROR_TASK_TIMEOUT",
+    "ERROR_CAPTCHA_UNSOLVABLE",
+    "ERROR_UNKNOWN_QUESTION",
+    "ERROR_INVALID_IMAGE",
+    "ERROR_PARSE_IMAGE_FAIL",
+    "ERROR_PROXY_BANNED",
+)
+# API is out of capacity or the client is throttled - request must be repeated after the noticeable delay
+DELAYED_ERROR_CODES = ("ERROR_RATE_LIMIT", "ERROR_KEY_TEMP_BLOCKED")
+# short-lived API failure - request can be repeated soon
+TRANSIENT_ERROR_CODES = ("ERROR_SERVICE_UNAVALIABLE", "ERROR_SERVICE_UNAVAILABLE")
+
+# HTTP statuses and API error codes after which the request can be safely repeated
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+RETRY_ERROR_CODES = DELAYED_ERROR_CODES + TRANSIENT_ERROR_CODES
+# HTTP statuses of the requests rejected before the processing, so the task creation request can be repeated
+REJECTED_STATUS_CODES = (429, 503)
+
+# total captcha solving deadline (task creation + result polling), in seconds
+SOLVE_TIMEOUT = 180
+# single HTTP request timeouts, in seconds
+CONNECT_TIMEOUT = 10
+READ_TIMEOUT = 30
+
+# local solver gateway default address
+GATEWAY_HOST = "127.0.0.1"
+GATEWAY_PORT = 8765
+
 APP_ID = "3E36E3CD-7EB5-4CAF-AA15-91011E652321"
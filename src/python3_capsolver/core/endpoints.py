@@ -0,0 +1,232 @@
+import time
+import itertools
+import threading
+from typing import Any, Dict, List, Union, Callable, Optional, Sequence, Awaitable
+
+from .enum import CircuitStateEnm
+from .exceptions import CircuitOpenError
+from .circuit_breaker import CircuitBreaker
+
+__all__ = ("EndpointPool",)
+
+
+class EndpointStats:
+    """
+    Recent latency and error rate of the single API address
+    """
+
+    __slots__ = ("latency", "error_rate", "updated_at")
+
+    def __init__(self):
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.updated_at = 0.0
+
+
+class EndpointPool:
+    """
+    Pool of the API addresses, e.g. regional proxies or gateways to the same API.
+
+    Pool tracks recent latency and error rate of every address (exponentially weighted),
+    new tasks are created on the address with the best score - ``latency * (1 + error_penalty * error_rate)``.
+    Addresses with the open circuit breaker are used only when all the other addresses are unavailable,
+    addresses without the recent requests are probed first, so the recovered address gets traffic again.
+    Failed request attempt is repeated on the next address from the list, so the endpoint failure is
+    handled by the retry policy transparently.
+
+    ``getTaskResult`` requests are pinned to the address which created the task,
+    other addresses are used only if the pinned one fails, so the in-flight tasks are not lost.
+
+    Pool is created by ``CaptchaParams`` from the ``request_url`` list and is thread-safe.
+
+    Args:
+        urls: API addresses
+        circuit_breaker: Breaker of the first address, other addresses get own breakers with the same settings.
+                            If not set - process-wide breaker shared by all instances with the same address
+                            is used for every address
+        smoothing: Weight (0-1] of the new sample in the latency and error rate averages
+        error_penalty: Error rate multiplier in the address score
+        stale_after: Seconds after which the address without requests is probed again
+
+    Examples:
+        >>> from python3_capsolver.image_to_text import ImageToText
+        >>> ImageToText(
+        ...     api_key="CAI-12345....",
+        ...     request_url=["https://eu-gateway.example.com", "https://us-gateway.example.com"],
+        ... ).captcha_handler(task_payload={"body": "base64_image_body"})
+
+        >>> from python3_capsolver.core.endpoints import EndpointPool
+        >>> pool = EndpointPool(["https://eu-gateway.example.com", "https://us-gateway.example.com"])
+        >>> pool.ordered()
+        ['https://eu-gateway.example.com', 'https://us-gateway.example.com']
+    """
+
+    def __init__(
+        self,
+        urls: Sequence[str],
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        smoothing: float = 0.2,
+        error_penalty: float = 10,
+        stale_after: float = 60,
+    ):
+        if not urls:
+            raise ValueError("At least one API address is required.")
+        if not 0 < smoothing <= 1:
+            raise ValueError("Smoothing must be in (0, 1] range.")
+
+        self.urls = list(dict.fromkeys(urls))
+        # every address has own breaker, so one address failures do not block the other ones
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        if circuit_breaker is not None:
+            self._breakers = {url: circuit_breaker.clone(request_url=url) for url in self.urls[1:]}
+            self._breakers[self.urls[0]] = circuit_breaker
+        self.smoothing = smoothing
+        self.error_penalty = error_penalty
+        self.stale_after = stale_after
+
+        self._stats: Dict[str, EndpointStats] = {url: EndpointStats() for url in self.urls}
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state.pop("_lock")
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_request_url(
+        cls, request_url: Union[str, Sequence[str]], circuit_breaker: Optional[CircuitBreaker] = None
+    ) -> "EndpointPool":
+        """
+        Method create pool from the single API address or the addresses list
+        """
+        return cls([request_url] if isinstance(request_url, str) else request_url, circuit_breaker=circuit_breaker)
+
+    def breaker(self, url: str) -> CircuitBreaker:
+        """
+        Method return circuit breaker used for the address
+        """
+        return self._breakers.get(url) or CircuitBreaker.shared(url)
+
+    def score(self, url: str) -> float:
+        """
+        Method return address score, the lower is the better
+        """
+        stats = self._stats[url]
+        if stats.latency is None or time.monotonic() - stats.updated_at > self.stale_after:
+            # unknown or stale address is probed first
+            return 0.0
+        return stats.latency * (1 + self.error_penalty * stats.error_rate)
+
+    def ordered(self, pinned: Optional[str] = None) -> List[str]:
+        """
+        Method return addresses from the best to the worst one
+
+        Args:
+            pinned: Address which must be the first one if it is available, e.g. the task creation address
+        """
+        if len(self.urls) == 1:
+            return self.urls
+        with self._lock:
+            urls = sorted(
+                self.urls,
+                key=lambda url: (
+                    self.breaker(url).state == CircuitStateEnm.Open,
+                    url != pinned,
+                    self.score(url),
+                ),
+            )
+        return urls
+
+    def rotation(self, pinned: Optional[str] = None) -> Callable[[], str]:
+        """
+        Method return function which gives the address for every next request attempt,
+        starting from the best one and cycling over the rest ones
+        """
+        urls = self.ordered(pinned=pinned)
+        counter = itertools.count()
+        return lambda: urls[next(counter) % len(urls)]
+
+    def record(self, url: str, duration: float, failure: bool) -> None:
+        """
+        Method save the request attempt result
+        """
+        if url not in self._stats:
+            return
+        with self._lock:
+            stats = self._stats[url]
+            if stats.latency is None:
+                stats.latency, stats.error_rate = duration, float(failure)
+            else:
+                stats.latency += self.smoothing * (duration - stats.latency)
+                stats.error_rate += self.smoothing * (float(failure) - stats.error_rate)
+            stats.updated_at = time.monotonic()
+
+    def call(self, func: Callable[[str], Any], next_url: Optional[Callable[[], str]] = None) -> Any:
+        """
+        Synchronous method send single request attempt through the address circuit breaker,
+        addresses with the open breaker are skipped
+
+        Args:
+            func: Function sending the request to the passed address
+            next_url: Function returned by the ``rotation`` method, new rotation is used if not set
+        """
+        next_url = next_url or self.rotation()
+        error = None
+        for _ in self.urls:
+            url = next_url()
+            breaker = self.breaker(url)
+            started = time.monotonic()
+            try:
+                result = breaker.call(lambda: func(url))
+            except CircuitOpenError as open_error:
+                # the request was not sent, so the next address is tried at once
+                error = open_error
+                continue
+            except Exception as request_error:
+                self._record_error(url, breaker, request_error, started)
+                raise
+            self._record_result(url, breaker, result, started)
+            return result
+        raise error
+
+    async def aio_call(
+        self, func: Callable[[str], Awaitable[Any]], next_url: Optional[Callable[[], str]] = None
+    ) -> Any:
+        """
+        Asynchronous method send single request attempt through the address circuit breaker,
+        addresses with the open breaker are skipped
+
+        Args:
+            func: Coroutine function sending the request to the passed address
+            next_url: Function returned by the ``rotation`` method, new rotation is used if not set
+        """
+        next_url = next_url or self.rotation()
+        error = None
+        for _ in self.urls:
+            url = next_url()
+            breaker = self.breaker(url)
+            started = time.monotonic()
+            try:
+                result = await breaker.aio_call(lambda: func(url))
+            except CircuitOpenError as open_error:
+                # the request was not sent, so the next address is tried at once
+                error = open_error
+                continue
+            except Exception as request_error:
+                self._record_error(url, breaker, request_error, started)
+                raise
+            self._record_result(url, breaker, result, started)
+            return result
+        raise error
+
+    def _record_result(self, url: str, breaker: CircuitBreaker, result: Any, started: float) -> None:
+        duration = time.monotonic() - started
+        self.record(url, duration=duration, failure=breaker.is_failure(result=result, duration=duration))
+
+    def _record_error(self, url: str, breaker: CircuitBreaker, error: Exception, started: float) -> None:
+        duration = time.monotonic() - started
+        self.record(url, duration=duration, failure=breaker.is_failure(error=error, duration=duration))
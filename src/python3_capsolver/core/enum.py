@@ -1,7 +1,16 @@
 from enum import Enum
 from typing import List
 
-__all__ = ("EndpointPostfixEnm", "CaptchaTypeEnm", "ResponseStatusEnm", "SaveFormatsEnm")
+__all__ = (
+    "EndpointPostfixEnm",
+    "CaptchaTypeEnm",
+    "ResponseStatusEnm",
+    "SaveFormatsEnm",
+    "JournalEventEnm",
+    "ErrorKindEnm",
+    "CircuitStateEnm",
+    "TaskPhaseEnm",
+)
 
 
 class MyEnum(str, Enum):
@@ -84,3 +93,45 @@ class ResponseStatusEnm(MyEnum):
 class SaveFormatsEnm(MyEnum):
     TEMP = "temp"
     CONST = "const"
+
+
+class JournalEventEnm(MyEnum):
+    """
+    Enum store task journal events
+    """
+
+    Created = "created"  # Task created on the server side
+    Done = "done"  # Task result returned to the caller
+
+
+class ErrorKindEnm(MyEnum):
+    """
+    Enum store API errors classes
+    """
+
+    Permanent = "permanent"  # Repeated request will fail again, e.g. invalid key or zero balance
+    RetryAfterDelay = "retry_after_delay"  # API capacity or client rate limit is reached
+    Transient = "transient"  # Short-lived network or API failure
+
+
+class CircuitStateEnm(MyEnum):
+    """
+    Enum store circuit breaker states
+    """
+
+    Closed = "closed"  # Requests are sent as usual
+    Open = "open"  # Requests are rejected without sending
+    HalfOpen = "half_open"  # Limited number of probe requests are sent
+
+
+class TaskPhaseEnm(MyEnum):
+    """
+    Enum store captcha solving phases, they are added to the log records
+    """
+
+    Create = "create"  # `createTask` request
+    Poll = "poll"  # `getTaskResult` request
+    Request = "request"  # Other API requests, e.g. `getBalance`
+    Hook = "hook"  # User hook call
+    Journal = "journal"  # Task journal writing
+    Balance = "balance"  # Background balance refresh
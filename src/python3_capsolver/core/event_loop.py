@@ -0,0 +1,108 @@
+import sys
+import asyncio
+import logging
+from typing import Any, Optional, Coroutine
+
+try:
+    import uvloop
+except ImportError:  # optional dependency, `pip install python3-capsolver[uvloop]`
+    uvloop = None
+
+__all__ = ("enable_uvloop", "uvloop_enabled", "new_event_loop", "run")
+
+logger = logging.getLogger(__name__)
+
+# process-wide opt-in, used by the loops created by the library
+_uvloop_requested = False
+
+
+def enable_uvloop(enabled: bool = True) -> bool:
+    """
+    Function enable ``uvloop`` for all the event loops created by the library:
+    ``BackgroundLoop`` of the ``SyncLoopClient``, bulk solving CLI and ``SolverGateway``.
+    If ``uvloop`` is not installed - the standard event loop is used.
+
+    Args:
+        enabled: ``False`` returns the standard event loop back
+
+    Examples:
+        >>> from python3_capsolver.core.event_loop import enable_uvloop
+        >>> enable_uvloop()
+        True
+
+    Returns:
+        ``True`` if ``uvloop`` will be used
+
+    Notes:
+        Loops created by the application code are not changed,
+        use ``run`` instead of ``asyncio.run`` to run the application coroutine on ``uvloop``
+    """
+    global _uvloop_requested
+    _uvloop_requested = enabled
+    return uvloop_enabled()
+
+
+def uvloop_enabled(use_uvloop: Optional[bool] = None) -> bool:
+    """
+    Function check if ``uvloop`` is requested and installed
+
+    Args:
+        use_uvloop: Explicit choice, process-wide ``enable_uvloop`` setting is used if not set
+    """
+    requested = _uvloop_requested if use_uvloop is None else use_uvloop
+    if requested and uvloop is None:
+        logger.warning("uvloop is not installed, the standard event loop is used")
+        return False
+    return requested
+
+
+def new_event_loop(use_uvloop: Optional[bool] = None) -> asyncio.AbstractEventLoop:
+    """
+    Function create new event loop, ``uvloop`` one if it is enabled and installed
+
+    Args:
+        use_uvloop: Explicit choice, process-wide ``enable_uvloop`` setting is used if not set
+    """
+    if uvloop_enabled(use_uvloop):
+        return uvloop.new_event_loop()
+    return asyncio.new_event_loop()
+
+
+def run(coroutine: Coroutine, use_uvloop: Optional[bool] = None) -> Any:
+    """
+    Function run the coroutine in the new event loop, like ``asyncio.run``,
+    on ``uvloop`` if it is enabled and installed
+
+    Args:
+        coroutine: Coroutine to run
+        use_uvloop: Explicit choice, process-wide ``enable_uvloop`` setting is used if not set
+
+    Examples:
+        >>> from python3_capsolver.image_to_text import ImageToText
+        >>> from python3_capsolver.core.event_loop import run
+        >>> run(ImageToText(api_key="CAI-12345....").aio_captcha_handler(task_payload={"body": "base64"}),
+        ...     use_uvloop=True)
+        {'errorId': 0, 'taskId': 'db0a3153-621d-4f5e-8554-a1c032597ee7', 'status': 'ready', 'solution': {...}}
+
+    Returns:
+        Coroutine result
+    """
+    if sys.version_info >= (3, 11):
+        with asyncio.Runner(loop_factory=lambda: new_event_loop(use_uvloop)) as runner:
+            return runner.run(coroutine)
+
+    loop = new_event_loop(use_uvloop)
+    try:
+        asyncio.set_event_loop(loop)
+        return loop.run_until_complete(coroutine)
+    finally:
+        try:
+            pending = asyncio.all_tasks(loop)
+            for task in pending:
+                task.cancel()
+            if pending:
+                loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            loop.run_until_complete(loop.shutdown_asyncgens())
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
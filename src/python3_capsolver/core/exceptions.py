@@ -0,0 +1,197 @@
+from typing import Any, Dict, Type, Optional
+
+from .enum import ErrorKindEnm
+from .const import DELAYED_ERROR_CODES, TRANSIENT_ERROR_CODES
+
+__all__ = (
+    "HTTPStatusError",
+    "CompressionRejectedError",
+    "CaptchaCancelledError",
+    "CircuitOpenError",
+    "LowBalanceError",
+    "CapsolverAPIError",
+    "PermanentAPIError",
+    "RetryAfterDelayAPIError",
+    "TransientAPIError",
+    "error_kind",
+    "status_error_kind",
+    "raise_for_error",
+)
+
+
+class CaptchaCancelledError(Exception):
+    """
+    Captcha solving was cancelled by the caller
+
+    Args:
+        task_id: ID of the abandoned task, ``None`` if the task was not created yet
+    """
+
+    def __init__(self, task_id: Optional[str] = None):
+        super().__init__(f"Captcha solving cancelled, abandoned task ID: {task_id}")
+        self.task_id = task_id
+
+
+class HTTPStatusError(ValueError):
+    """
+    Server responded with the unexpected HTTP status
+
+    Args:
+        status: Response HTTP status code
+        reason: Response status reason
+    """
+
+    def __init__(self, status: int, reason: Optional[str] = None):
+        super().__init__(status if reason is None else f"{status} {reason}")
+        self.status = status
+        self.reason = reason
+
+
+class CompressionRejectedError(HTTPStatusError):
+    """
+    Server rejected the compressed request body, the request must be sent uncompressed
+    """
+
+
+class CircuitOpenError(Exception):
+    """
+    Request was not sent, because the API circuit breaker is open after the recent failures
+
+    Args:
+        request_url: API address
+        retry_after: Seconds left before the next probe request will be allowed
+    """
+
+    def __init__(self, request_url: str, retry_after: float):
+        super().__init__(f"Circuit breaker is open for {request_url}, retry after {retry_after:.1f} sec")
+        self.request_url = request_url
+        self.retry_after = retry_after
+
+
+class LowBalanceError(Exception):
+    """
+    Task was not created, because the account balance is below the ``BalanceMonitor`` threshold
+
+    Args:
+        balance: Estimated account balance
+        threshold: Low balance level
+    """
+
+    def __init__(self, balance: float, threshold: float):
+        super().__init__(f"Balance {balance} is below the threshold {threshold}, new tasks are blocked")
+        self.balance = balance
+        self.threshold = threshold
+
+
+def error_kind(error_code: Optional[str]) -> ErrorKindEnm:
+    """
+    Function classify API ``errorCode``, unknown codes are treated as permanent
+
+    Examples:
+        >>> from python3_capsolver.core.exceptions import error_kind
+        >>> error_kind("ERROR_ZERO_BALANCE")
+        <ErrorKindEnm.Permanent: 'permanent'>
+        >>> error_kind("ERROR_RATE_LIMIT")
+        <ErrorKindEnm.RetryAfterDelay: 'retry_after_delay'>
+    """
+    if error_code in DELAYED_ERROR_CODES:
+        return ErrorKindEnm.RetryAfterDelay
+    if error_code in TRANSIENT_ERROR_CODES:
+        return ErrorKindEnm.Transient
+    return ErrorKindEnm.Permanent
+
+
+def status_error_kind(status: int) -> ErrorKindEnm:
+    """
+    Function classify unexpected HTTP response status
+    """
+    if status == 429:
+        return ErrorKindEnm.RetryAfterDelay
+    if status >= 500:
+        return ErrorKindEnm.Transient
+    return ErrorKindEnm.Permanent
+
+
+class CapsolverAPIError(Exception):
+    """
+    API responded with the ``errorId`` not equal to ``0``
+
+    Args:
+        error_id: Response ``errorId``
+        error_code: Response ``errorCode``
+        error_description: Response ``errorDescription``
+        response: Full server response
+    """
+
+    kind: Optional[ErrorKindEnm] = None
+
+    def __init__(
+        self,
+        error_id: int,
+        error_code: Optional[str] = None,
+        error_description: Optional[str] = None,
+        response: Optional[Dict[str, Any]] = None,
+    ):
+        super().__init__(f"{error_code}: {error_description}")
+        self.error_id = error_id
+        self.error_code = error_code
+        self.error_description = error_description
+        self.response = response
+
+
+class PermanentAPIError(CapsolverAPIError):
+    """
+    Repeated request will fail again, e.g. invalid key, zero balance or invalid task data
+    """
+
+    kind = ErrorKindEnm.Permanent
+
+
+class RetryAfterDelayAPIError(CapsolverAPIError):
+    """
+    API capacity or client rate limit is reached, request can be repeated after the delay
+    """
+
+    kind = ErrorKindEnm.RetryAfterDelay
+
+
+class TransientAPIError(CapsolverAPIError):
+    """
+    Short-lived API failure, request can be repeated soon
+    """
+
+    kind = ErrorKindEnm.Transient
+
+
+API_ERRORS: Dict[ErrorKindEnm, Type[CapsolverAPIError]] = {
+    ErrorKindEnm.Permanent: PermanentAPIError,
+    ErrorKindEnm.RetryAfterDelay: RetryAfterDelayAPIError,
+    ErrorKindEnm.Transient: TransientAPIError,
+}
+
+
+def raise_for_error(response: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Function raise exception of the error kind class if the server response contains error
+
+    Examples:
+        >>> from python3_capsolver.control import Control
+        >>> from python3_capsolver.core.exceptions import PermanentAPIError, raise_for_error
+        >>> try:
+        ...     raise_for_error(Control(api_key="CAI-1324...").get_balance())
+        ... except PermanentAPIError as error:
+        ...     print(error.error_code)
+        ERROR_KEY_DENIED_ACCESS
+
+    Returns:
+        The same response if it does not contain error
+    """
+    if response.get("errorId", 0) == 0:
+        return response
+    error_code = response.get("errorCode")
+    raise API_ERRORS[error_kind(error_code)](
+        error_id=response["errorId"],
+        error_code=error_code,
+        error_description=response.get("errorDescription"),
+        response=response,
+    )
@@ -0,0 +1,168 @@
+import queue
+import atexit
+import logging
+import threading
+from typing import TYPE_CHECKING, Any, Dict, List, Tuple, Callable, Optional
+
+from .log import log_error
+from .enum import TaskPhaseEnm
+from .exceptions import raise_for_error
+
+if TYPE_CHECKING:
+    from ..control import Control
+
+
+__all__ = ("FeedbackQueue",)
+
+logger = logging.getLogger(__name__)
+
+
+class FeedbackQueue:
+    """
+    Background queue of the ``feedbackTask`` requests.
+
+    Feedback is accepted at once and sent by the background threads, so it is not on the caller critical path.
+    Requests are sent by ``concurrency`` threads over the pooled per-thread sessions of the ``Control`` instance
+    and repeated according to it ``retry_policy``.
+    Enqueued feedback is sent before the process exit, call ``flush`` or ``close`` to wait for it explicitly.
+
+    Args:
+        control: ``Control`` instance used for the requests
+        concurrency: Max number of the concurrent requests
+        max_size: Max number of the not sent feedbacks, new feedback is dropped if the queue is full
+        on_error: Hook called with the task ID and the exception if the feedback was not accepted
+
+    Examples:
+        >>> from python3_capsolver.control import Control
+        >>> from python3_capsolver.core.feedback import FeedbackQueue
+        >>> with Control(api_key="CAI-1324...") as control:
+        ...     feedback = FeedbackQueue(control, concurrency=8)
+        ...     feedback.submit(task_id="db0a3153-xxxx", result_payload={"invalid": True, "code": 1001})
+        ...     feedback.close()
+        True
+    """
+
+    def __init__(
+        self,
+        control: "Control",
+        concurrency: int = 4,
+        max_size: int = 10_000,
+        on_error: Optional[Callable[[str, Exception], None]] = None,
+    ):
+        if concurrency < 1:
+            raise ValueError("Concurrency must be at least 1")
+        self.control = control
+        self.concurrency = concurrency
+        self.on_error = on_error
+        # number of the sent, failed and dropped feedbacks
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+        self._queue: "queue.Queue[Optional[Tuple[str, Dict]]]" = queue.Queue(maxsize=max_size)
+        self._workers: List[threading.Thread] = []
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # another process gets own workers
+        state = self.__dict__.copy()
+        for name in ("_queue", "_workers", "_lock"):
+            state.pop(name)
+        state["max_size"] = self._queue.maxsize
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._queue = queue.Queue(maxsize=self.__dict__.pop("max_size"))
+        self._workers = []
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        """
+        Number of the not sent feedbacks
+        """
+        return self._queue.unfinished_tasks
+
+    def submit(self, task_id: str, result_payload: Dict) -> bool:
+        """
+        Method enqueue the feedback, it does not wait for the request
+
+        Args:
+            task_id: Task ID to report
+            result_payload: Parameters passed to the payload under ``result`` key,
+                            like ``invalid``, ``code``, ``message`` and etc.
+
+        Returns:
+            ``False`` if the queue is full and the feedback was dropped
+        """
+        self._start_workers()
+        try:
+            self._queue.put_nowait((task_id, result_payload))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            logger.warning("Feedback queue is full, feedback for the task %s is dropped", task_id)
+            return False
+        return True
+
+    def _start_workers(self) -> None:
+        with self._lock:
+            if self._workers and all(worker.is_alive() for worker in self._workers):
+                return
+            self._workers = [worker for worker in self._workers if worker.is_alive()]
+            for _ in range(self.concurrency - len(self._workers)):
+                worker = threading.Thread(target=self._send_loop, name="python3-capsolver-feedback", daemon=True)
+                worker.start()
+                self._workers.append(worker)
+            atexit.register(self.close)
+
+    def _send_loop(self) -> None:
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    # stop marker received
+                    return
+                self._send(*item)
+            finally:
+                self._queue.task_done()
+
+    def _send(self, task_id: str, result_payload: Dict) -> None:
+        try:
+            raise_for_error(self.control.feedback_task(task_id=task_id, result_payload=result_payload))
+        except Exception as error:
+            with self._lock:
+                self.failed += 1
+            self._report_error(task_id, error)
+        else:
+            with self._lock:
+                self.sent += 1
+
+    def _report_error(self, task_id: str, error: Exception) -> None:
+        if self.on_error is None:
+            return
+        try:
+            self.on_error(task_id, error)
+        except Exception as hook_error:
+            log_error(logger, hook_error, phase=TaskPhaseEnm.Hook, task_id=task_id)
+
+    def flush(self) -> None:
+        """
+        Method block until all the enqueued feedbacks are sent
+        """
+        if any(worker.is_alive() for worker in self._workers):
+            self._queue.join()
+
+    def close(self) -> None:
+        """
+        Method send enqueued feedbacks and stop the background threads
+        """
+        with self._lock:
+            workers = [worker for worker in self._workers if worker.is_alive()]
+            self._workers = []
+        for _ in workers:
+            # markers are queued after the feedbacks, so all of them are sent before the stop
+            self._queue.put(None)
+        for worker in workers:
+            worker.join()
+        atexit.unregister(self.close)
@@ -0,0 +1,120 @@
+import threading
+from typing import Any, Dict
+from collections import deque
+
+__all__ = ("HedgingPolicy",)
+
+
+class HedgingPolicy:
+    """
+    Opt-in policy of the duplicate (hedged) task submission for the slow captcha solving.
+
+    If the task is not solved when the configured percentile of the recent solving latencies is reached -
+    the second identical task is created and the first solved task result is returned.
+    One policy instance can be shared between several captcha solving class instances, it is thread-safe.
+
+    Args:
+        percentile: Solving latency percentile (0-100) after which the duplicate task is created
+        initial_delay: Hedging delay in seconds, used until ``min_samples`` latencies are collected
+        min_delay: The lowest possible hedging delay in seconds
+        max_extra_ratio: Max share of the duplicated tasks among all tasks, caps the extra spend.
+                            ``0.1`` means no more than 1 duplicate per 10 tasks
+        window: Number of the recent solving latencies used for the percentile calculation
+        min_samples: Min number of collected latencies to start using the percentile
+
+    Examples:
+        >>> from python3_capsolver.recaptcha import ReCaptcha
+        >>> from python3_capsolver.core.enum import CaptchaTypeEnm
+        >>> from python3_capsolver.core.hedging import HedgingPolicy
+        >>> ReCaptcha(api_key="CAI-12345....",
+        ...             captcha_type=CaptchaTypeEnm.ReCaptchaV2Task,
+        ...             hedging=HedgingPolicy(percentile=90, max_extra_ratio=0.05)
+        ...         ).captcha_handler(task_payload={"websiteURL": "https://demo.com/", "websiteKey": "6LcpsXsnAAAbbAcxxxx"})
+        {
+           "errorId":0,
+           "errorCode":"None",
+           "errorDescription":"None",
+           "taskId":"db0a3153-621d-4f5e-8554-a1c032597ee7",
+           "status":"ready",
+           "solution":{
+              "gRecaptchaResponse":"03AGdBq25SxXT-pmSeBXjzScW-xxxx"
+           }
+        }
+    """
+
+    def __init__(
+        self,
+        percentile: float = 95,
+        initial_delay: float = 30,
+        min_delay: float = 1,
+        max_extra_ratio: float = 0.1,
+        window: int = 200,
+        min_samples: int = 20,
+    ):
+        if not 0 < percentile <= 100:
+            raise ValueError("Percentile must be in (0, 100] range.")
+        if max_extra_ratio < 0:
+            raise ValueError("Max extra ratio can't be negative.")
+
+        self.percentile = percentile
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.max_extra_ratio = max_extra_ratio
+        self.min_samples = min_samples
+
+        self._latencies = deque(maxlen=window)
+        self._tasks_count = 0
+        self._hedged_count = 0
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state.pop("_lock")
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @property
+    def tasks_count(self) -> int:
+        return self._tasks_count
+
+    @property
+    def hedged_count(self) -> int:
+        return self._hedged_count
+
+    def register_task(self) -> None:
+        """
+        Method count new solving started with the policy
+        """
+        with self._lock:
+            self._tasks_count += 1
+
+    def record_latency(self, latency: float) -> None:
+        """
+        Method save successful solving latency in seconds
+        """
+        with self._lock:
+            self._latencies.append(latency)
+
+    def hedge_delay(self) -> float:
+        """
+        Method return the waiting time in seconds before the duplicate task creation
+        """
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return max(self.initial_delay, self.min_delay)
+            latencies = sorted(self._latencies)
+        index = min(int(len(latencies) * self.percentile / 100), len(latencies) - 1)
+        return max(latencies[index], self.min_delay)
+
+    def acquire_hedge(self) -> bool:
+        """
+        Method check extra spend limit and reserve one duplicate task if it is allowed
+        """
+        with self._lock:
+            if self._hedged_count + 1 > self._tasks_count * self.max_extra_ratio:
+                return False
+            self._hedged_count += 1
+            return True
@@ -0,0 +1,99 @@
+import io
+from typing import Tuple, Optional
+
+from .captcha_instrument import Buffer
+
+try:
+    from PIL import Image
+except ImportError:  # pragma: no cover
+    Image = None
+
+__all__ = ("ImageOptimizer",)
+
+
+class ImageOptimizer:
+    """
+    Optional client-side image optimization before the upload, requires ``Pillow``
+    (``pip install python3-capsolver[image]``).
+
+    Image is cropped, downsampled, converted to grayscale and re-encoded before the base64 encoding,
+    so smaller request is uploaded and processed by the API faster.
+    Some modules answer with the image coordinates (e.g. ``VisionEngine`` modules),
+    so the optimization must be chosen per ``module`` - pass the mapping of the module name to the optimizer
+    to the ``FileInstrument`` methods.
+
+    Args:
+        max_size: Max image ``(width, height)``, larger images are downsampled with the aspect ratio kept
+        crop: Image region ``(left, upper, right, lower)`` which is sent instead of the whole image
+        grayscale: Convert image to grayscale
+        image_format: Format for the re-encoding, like ``JPEG``, ``PNG`` or ``WEBP``, the source format by default
+        quality: Re-encoding quality for the lossy formats, 1-100
+
+    Examples:
+        >>> from python3_capsolver.image_to_text import ImageToText
+        >>> from python3_capsolver.core.image_optimizer import ImageOptimizer
+        >>> from python3_capsolver.core.captcha_instrument import FileInstrument
+        >>> optimizers = {
+        ...     "common": ImageOptimizer(max_size=(400, 200), grayscale=True),
+        ...     "number": ImageOptimizer(image_format="JPEG", quality=80),
+        ... }
+        >>> body = FileInstrument().file_processing(
+        ...     captcha_file="captcha_example.png", optimizer=optimizers, module="common"
+        ... )
+        >>> ImageToText(api_key="CAI-12345....").captcha_handler(
+        ...                     task_payload={"body": body, "module": "common"}
+        ...                     )
+
+    Notes:
+        If only the re-encoding and downsampling are set and the result is not smaller -
+        the source image is sent as is.
+    """
+
+    def __init__(
+        self,
+        max_size: Optional[Tuple[int, int]] = None,
+        crop: Optional[Tuple[int, int, int, int]] = None,
+        grayscale: bool = False,
+        image_format: Optional[str] = None,
+        quality: Optional[int] = None,
+    ):
+        if Image is None:
+            raise ImportError(
+                "Image optimization requires Pillow, install it with `pip install python3-capsolver[image]`"
+            )
+        if quality is not None and not 1 <= quality <= 100:
+            raise ValueError("Quality must be in 1-100 range")
+        self.max_size = max_size
+        self.crop = crop
+        self.grayscale = grayscale
+        self.image_format = image_format.upper() if image_format else None
+        self.quality = quality
+
+    def optimize(self, content: Buffer) -> Buffer:
+        """
+        Method return optimized image file content
+        """
+        with Image.open(io.BytesIO(content)) as source:
+            image_format = self.image_format or source.format or "PNG"
+            image = source
+            if self.crop is not None:
+                image = image.crop(self.crop)
+            if self.max_size is not None and (image.width > self.max_size[0] or image.height > self.max_size[1]):
+                image = image.copy() if image is source else image
+                image.thumbnail(self.max_size)
+            if self.grayscale:
+                image = image.convert("L")
+            if image_format == "JPEG" and image.mode not in ("RGB", "L"):
+                image = image.convert("RGB")
+
+            options = {"optimize": True}
+            if self.quality is not None:
+                options["quality"] = self.quality
+            output = io.BytesIO()
+            image.save(output, format=image_format, **options)
+
+        optimized = output.getvalue()
+        if len(optimized) >= len(content) and self.crop is None and not self.grayscale:
+            # re-encoding did not make it smaller, the source is sent as is
+            return content
+        return optimized
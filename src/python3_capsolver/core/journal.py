@@ -0,0 +1,375 @@
+import os
+import abc
+import queue
+import atexit
+import logging
+import sqlite3
+import threading
+from typing import TYPE_CHECKING, Any, Dict, List, Union, Callable, Optional
+from contextlib import closing
+
+import msgspec
+
+from .log import log_error
+from .enum import TaskPhaseEnm, JournalEventEnm
+from .serializer import JournalRecordSer
+from .task_handle import TaskHandle
+
+if TYPE_CHECKING:
+    from .base import CaptchaParams
+
+
+__all__ = ("TaskJournal", "FileTaskJournal", "SQLiteTaskJournal")
+
+logger = logging.getLogger(__name__)
+
+
+class _JournalMarker:
+    """
+    Queue item processed by the writer thread after all the records enqueued before it are written
+
+    Args:
+        action: Function called in the writer thread, e.g. the journal compaction
+    """
+
+    __slots__ = ("action", "error", "_done")
+
+    def __init__(self, action: Optional[Callable[[], None]] = None):
+        self.action = action
+        self.error: Optional[BaseException] = None
+        self._done = threading.Event()
+
+    def process(self) -> None:
+        try:
+            if self.action is not None:
+                self.action()
+        except Exception as error:
+            self.error = error
+        finally:
+            self._done.set()
+
+    def wait(self) -> None:
+        self._done.wait()
+        if self.error is not None:
+            raise self.error
+
+
+class TaskJournal(abc.ABC):
+    """
+    Basic write-ahead journal of the created tasks.
+
+    Records are written in batches by the background thread, so the journal does not slow down
+    the task creation. Created tasks which results were not returned to the caller
+    (e.g. the process was restarted) can be recovered and polled again.
+
+    Args:
+        batch_size: Max number of records written at once
+    """
+
+    def __init__(self, batch_size: int = 100):
+        self.batch_size = batch_size
+        self._queue: "queue.Queue[Union[JournalRecordSer, _JournalMarker, None]]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # another process gets own writer thread
+        state = self.__dict__.copy()
+        for name in ("_queue", "_writer", "_lock", "_connection"):
+            state.pop(name, None)
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._queue = queue.Queue()
+        self._writer = None
+        self._lock = threading.Lock()
+
+    def record_created(
+        self, task_id: str, captcha_type: Optional[str], created_at: float, endpoint: Optional[str] = None
+    ) -> None:
+        """
+        Method enqueue the task creation record, it does not wait for the disk write
+        """
+        self._put(
+            JournalRecordSer(
+                event=JournalEventEnm.Created.value,
+                taskId=task_id,
+                captchaType=captcha_type,
+                createdAt=created_at,
+                endpoint=endpoint,
+            )
+        )
+
+    def record_done(self, task_id: str) -> None:
+        """
+        Method enqueue the task completion record, it does not wait for the disk write
+        """
+        self._put(JournalRecordSer(event=JournalEventEnm.Done.value, taskId=task_id))
+
+    def _put(self, record: JournalRecordSer) -> None:
+        self._start_writer()
+        self._queue.put_nowait(record)
+
+    def _start_writer(self) -> None:
+        with self._lock:
+            if self._writer is not None and self._writer.is_alive():
+                return
+            self._writer = threading.Thread(target=self._write_loop, name="python3-capsolver-journal", daemon=True)
+            self._writer.start()
+            atexit.register(self.close)
+
+    def _write_loop(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            records: List[JournalRecordSer] = []
+            for item in batch:
+                if isinstance(item, JournalRecordSer):
+                    records.append(item)
+                    continue
+                # records enqueued before the marker are written first
+                self._write_batch(records)
+                records = []
+                if item is None:
+                    # stop marker received, the rest items are not expected
+                    self._writer_stopped()
+                    return
+                item.process()
+            self._write_batch(records)
+
+    def _write_batch(self, records: List[JournalRecordSer]) -> None:
+        if not records:
+            return
+        try:
+            self._write(records)
+        except Exception as error:
+            log_error(logger, error, phase=TaskPhaseEnm.Journal)
+
+    def _call_in_writer(self, action: Optional[Callable[[], None]] = None) -> None:
+        """
+        Method block until the records enqueued before the call are written,
+        then ``action`` is called in the writer thread
+        """
+        marker = _JournalMarker(action=action)
+        self._start_writer()
+        self._queue.put_nowait(marker)
+        marker.wait()
+
+    def _writer_stopped(self) -> None:
+        """
+        Method called in the writer thread before it stops
+        """
+
+    @abc.abstractmethod
+    def _write(self, records: List[JournalRecordSer]) -> None:
+        """
+        Method write the records batch, called in the writer thread
+        """
+
+    @abc.abstractmethod
+    def _read(self) -> List[JournalRecordSer]:
+        """
+        Method read all the written records in the writing order
+        """
+
+    def flush(self) -> None:
+        """
+        Method block until the records enqueued before the call are written
+        """
+        if self._writer is not None and self._writer.is_alive():
+            self._call_in_writer()
+
+    def close(self) -> None:
+        """
+        Method write enqueued records and stop the background writer
+        """
+        with self._lock:
+            if self._writer is None or not self._writer.is_alive():
+                return
+            self._queue.put(None)
+            writer = self._writer
+        writer.join()
+        atexit.unregister(self.close)
+
+    def unfinished(self) -> List[JournalRecordSer]:
+        """
+        Method return creation records of the tasks without the completion record, in the creation order
+        """
+        self.flush()
+        return self._unfinished(self._read())
+
+    @staticmethod
+    def _unfinished(records: List[JournalRecordSer]) -> List[JournalRecordSer]:
+        created: Dict[str, JournalRecordSer] = {}
+        for record in records:
+            if record.event == JournalEventEnm.Created.value:
+                created[record.taskId] = record
+            else:
+                created.pop(record.taskId, None)
+        return list(created.values())
+
+    def recover(self, captcha_params: "CaptchaParams") -> List[TaskHandle]:
+        """
+        Method return handles for the unfinished tasks, so they can be polled with ``getTaskResult`` again
+
+        Args:
+            captcha_params: Captcha solving class instance with the same API key, used for the results requests.
+                            Set ``journal`` arg for it, so the recovered tasks will be marked as done.
+
+        Examples:
+            >>> from python3_capsolver.core.journal import FileTaskJournal
+            >>> from python3_capsolver.core.task_handle import TaskPoller
+            >>> from python3_capsolver.image_to_text import ImageToText
+            >>> journal = FileTaskJournal("/var/lib/worker/tasks.journal")
+            >>> solver = ImageToText(api_key="CAI-12345....", journal=journal)
+            >>> for handle in TaskPoller().as_completed(journal.recover(solver)):
+            ...     print(handle.task_id, handle.response.solution)
+
+        Returns:
+            List of the task handles
+        """
+        return [
+            TaskHandle(
+                captcha_params=captcha_params,
+                task_id=record.taskId,
+                created_at=record.createdAt,
+                endpoint=record.endpoint,
+            )
+            for record in self.unfinished()
+        ]
+
+
+class FileTaskJournal(TaskJournal):
+    """
+    Task journal stored in the append-only file, one JSON record per line
+
+    Args:
+        path: Journal file path, file is created if not exists
+        fsync: If ``True`` - every written batch is synced to the disk
+        batch_size: Max number of records written at once
+
+    Examples:
+        >>> from python3_capsolver.core.journal import FileTaskJournal
+        >>> from python3_capsolver.image_to_text import ImageToText
+        >>> ImageToText(api_key="CAI-12345....", journal=FileTaskJournal("tasks.journal")).captcha_handler(
+        ...                     task_payload={"body": "base64_image_body"}
+        ...                 )
+    """
+
+    def __init__(self, path: str, fsync: bool = False, batch_size: int = 100):
+        super().__init__(batch_size=batch_size)
+        self.path = path
+        self.fsync = fsync
+        self._encoder = msgspec.json.Encoder()
+        self._decoder = msgspec.json.Decoder(JournalRecordSer)
+
+    def _write(self, records: List[JournalRecordSer]) -> None:
+        with open(self.path, "ab") as journal_file:
+            journal_file.write(b"".join(self._encoder.encode(record) + b"\n" for record in records))
+            journal_file.flush()
+            if self.fsync:
+                os.fsync(journal_file.fileno())
+
+    def _read(self) -> List[JournalRecordSer]:
+        if not os.path.exists(self.path):
+            return []
+        records = []
+        with open(self.path, "rb") as journal_file:
+            for line in journal_file:
+                try:
+                    records.append(self._decoder.decode(line))
+                except msgspec.DecodeError:
+                    # the last line can be broken by the process crash
+                    logger.warning("Broken task journal line skipped: %r", line)
+        return records
+
+    def compact(self) -> None:
+        """
+        Method rewrite journal file with the unfinished tasks records only.
+        The file is rewritten by the writer thread, so the records enqueued during the compaction are not lost
+        """
+        self._call_in_writer(self._compact)
+
+    def _compact(self) -> None:
+        unfinished = self._unfinished(self._read())
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "wb") as journal_file:
+            journal_file.write(b"".join(self._encoder.encode(record) + b"\n" for record in unfinished))
+            journal_file.flush()
+            os.fsync(journal_file.fileno())
+        os.replace(tmp_path, self.path)
+
+
+class SQLiteTaskJournal(TaskJournal):
+    """
+    Task journal stored in the SQLite database, completed tasks are removed from it
+
+    Args:
+        path: Database file path
+        batch_size: Max number of records written at once
+
+    Examples:
+        >>> from python3_capsolver.core.journal import SQLiteTaskJournal
+        >>> from python3_capsolver.image_to_text import ImageToText
+        >>> ImageToText(api_key="CAI-12345....", journal=SQLiteTaskJournal("tasks.db")).captcha_handler(
+        ...                     task_payload={"body": "base64_image_body"}
+        ...                 )
+    """
+
+    def __init__(self, path: str, batch_size: int = 100):
+        super().__init__(batch_size=batch_size)
+        self.path = path
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS tasks ("
+                "task_id TEXT PRIMARY KEY, captcha_type TEXT, created_at REAL, seq INTEGER NOT NULL, endpoint TEXT)"
+            )
+        # writer thread own connection, sqlite connections can't be shared between threads
+        self._connection: Optional[sqlite3.Connection] = None
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        super().__setstate__(state)
+        self._connection = None
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _write(self, records: List[JournalRecordSer]) -> None:
+        if self._connection is None:
+            self._connection = self._connect()
+        with self._connection:
+            for record in records:
+                if record.event == JournalEventEnm.Created.value:
+                    self._connection.execute(
+                        "INSERT OR REPLACE INTO tasks (task_id, captcha_type, created_at, seq, endpoint) "
+                        "VALUES (?, ?, ?, (SELECT COALESCE(MAX(seq), 0) + 1 FROM tasks), ?)",
+                        (record.taskId, record.captchaType, record.createdAt, record.endpoint),
+                    )
+                else:
+                    self._connection.execute("DELETE FROM tasks WHERE task_id = ?", (record.taskId,))
+
+    def _read(self) -> List[JournalRecordSer]:
+        with closing(self._connect()) as connection:
+            rows = connection.execute(
+                "SELECT task_id, captcha_type, created_at, endpoint FROM tasks ORDER BY seq"
+            ).fetchall()
+        return [
+            JournalRecordSer(
+                event=JournalEventEnm.Created.value,
+                taskId=task_id,
+                captchaType=captcha_type,
+                createdAt=created_at,
+                endpoint=endpoint,
+            )
+            for task_id, captcha_type, created_at, endpoint in rows
+        ]
+
+    def _writer_stopped(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
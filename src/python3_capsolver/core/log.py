@@ -0,0 +1,138 @@
+import time
+import logging
+import threading
+from typing import Any, Dict, Tuple, Union, Hashable, Optional
+
+from .enum import TaskPhaseEnm
+
+__all__ = ("ErrorLogLimiter", "task_fields", "log_error", "set_error_log_limit")
+
+
+class ErrorLogLimiter:
+    """
+    Rate limit of the error records with tracebacks.
+
+    Not more than ``burst`` errors of the same kind are logged during ``interval`` seconds,
+    the rest ones are only counted and the number of the skipped errors is added to the next logged record.
+    So during the API incident the log gets the first tracebacks and the errors rate,
+    instead of the full traceback for every task.
+
+    Args:
+        burst: Max number of the logged errors of the same kind per interval, ``0`` disables the limit
+        interval: Interval length in seconds
+
+    Examples:
+        >>> from python3_capsolver.core.log import set_error_log_limit
+        >>> set_error_log_limit(burst=3, interval=10)
+
+    Notes:
+        Errors kind is the solving phase and the exception class, e.g. ``poll`` and ``ClientConnectorError``
+    """
+
+    def __init__(self, burst: int = 10, interval: float = 60):
+        if burst < 0:
+            raise ValueError("Invalid `burst` value, it must be at least 0")
+        self.burst = burst
+        self.interval = interval
+        # error kind -> [interval start, logged in the interval, skipped since the last logged record]
+        self._counters: Dict[Hashable, list] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, kind: Hashable) -> Optional[int]:
+        """
+        Method count the error and check if it must be logged
+
+        Returns:
+            Number of the skipped errors of the same kind if the error must be logged, else ``None``
+        """
+        if not self.burst:
+            return 0
+        now = time.monotonic()
+        with self._lock:
+            counter = self._counters.get(kind)
+            if counter is None or now - counter[0] >= self.interval:
+                skipped = counter[2] if counter is not None else 0
+                self._counters[kind] = [now, 1, 0]
+                return skipped
+            if counter[1] < self.burst:
+                counter[1] += 1
+                skipped, counter[2] = counter[2], 0
+                return skipped
+            counter[2] += 1
+            return None
+
+
+# process-wide limit used by the library loggers
+_error_limiter = ErrorLogLimiter()
+
+
+def set_error_log_limit(burst: int = 10, interval: float = 60) -> None:
+    """
+    Function change the process-wide rate limit of the logged errors, check ``ErrorLogLimiter`` docstring
+
+    Args:
+        burst: Max number of the logged errors of the same kind per interval, ``0`` logs all the errors
+        interval: Interval length in seconds
+    """
+    global _error_limiter
+    _error_limiter = ErrorLogLimiter(burst=burst, interval=interval)
+
+
+def task_fields(
+    phase: Union[TaskPhaseEnm, str],
+    task_id: Optional[str] = None,
+    captcha_type: Optional[str] = None,
+    duration: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    Function return structured fields of the log record, they are passed as ``extra``
+    and available as the record attributes, e.g. ``%(task_id)s`` in the formatter or JSON log handlers
+
+    Args:
+        phase: Solving phase, ``TaskPhaseEnm`` value
+        task_id: Task ID, ``None`` if the task is not created
+        captcha_type: Task type, e.g. ``ImageToTextTask``
+        duration: Seconds since the solving start
+    """
+    return {
+        "phase": TaskPhaseEnm(phase).value,
+        "task_id": task_id,
+        "captcha_type": captcha_type,
+        "duration": duration,
+    }
+
+
+def log_error(
+    logger: logging.Logger,
+    error: BaseException,
+    phase: Union[TaskPhaseEnm, str],
+    task_id: Optional[str] = None,
+    captcha_type: Optional[str] = None,
+    duration: Optional[float] = None,
+) -> None:
+    """
+    Function log the error with the traceback and structured fields, errors over the rate limit are skipped.
+    The record is not formatted if the logger does not accept errors
+
+    Args:
+        logger: Library module logger
+        error: Raised exception
+        phase: Solving phase, ``TaskPhaseEnm`` value
+        task_id: Task ID, ``None`` if the task is not created
+        captcha_type: Task type, e.g. ``ImageToTextTask``
+        duration: Seconds since the solving start
+    """
+    if not logger.isEnabledFor(logging.ERROR):
+        return
+    phase = TaskPhaseEnm(phase).value
+    skipped = _error_limiter.acquire(kind=(phase, type(error)))
+    if skipped is None:
+        return
+    extra = task_fields(phase=phase, task_id=task_id, captcha_type=captcha_type, duration=duration)
+    extra["skipped"] = skipped
+    if skipped:
+        message = "Phase %r failed, task ID: %s, error: %r, %s similar errors skipped"
+        args: Tuple = (phase, task_id, error, skipped)
+    else:
+        message, args = "Phase %r failed, task ID: %s, error: %r", (phase, task_id, error)
+    logger.error(message, *args, exc_info=error, extra=extra)
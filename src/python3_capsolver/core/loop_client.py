@@ -0,0 +1,206 @@
+import time
+import asyncio
+import threading
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, Optional, Coroutine
+from concurrent.futures import Future
+
+from .event_loop import new_event_loop
+from .context_instr import SIOContextManager
+
+if TYPE_CHECKING:
+    from .base import CaptchaParams
+
+
+__all__ = ("BackgroundLoop", "SyncLoopClient")
+
+
+class BackgroundLoop:
+    """
+    Asyncio event loop running forever in the separate daemon thread.
+
+    Coroutines are submitted from any thread and ``concurrent.futures.Future`` is returned,
+    so one loop thread serves all the synchronous callers.
+
+    Args:
+        name: Loop thread name
+        use_uvloop: Run the loop on ``uvloop`` if it is installed,
+                    process-wide ``enable_uvloop`` setting is used if not set
+
+    Examples:
+        >>> import asyncio
+        >>> from python3_capsolver.core.loop_client import BackgroundLoop
+        >>> loop = BackgroundLoop()
+        >>> loop.submit(asyncio.sleep(1, result="done")).result()
+        'done'
+        >>> loop.stop()
+    """
+
+    _shared: Optional["BackgroundLoop"] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, name: str = "python3-capsolver-loop", use_uvloop: Optional[bool] = None):
+        self.name = name
+        self.use_uvloop = use_uvloop
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls) -> "BackgroundLoop":
+        """
+        Method return process-wide loop instance, used by default in all the ``SyncLoopClient`` instances
+        """
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        self.start()
+        return self._loop
+
+    def start(self) -> None:
+        """
+        Method start the loop thread if it is not running yet
+        """
+        with self._lock:
+            if self.is_running:
+                return
+            self._loop = new_event_loop(self.use_uvloop)
+            ready = threading.Event()
+            self._thread = threading.Thread(target=self._run, args=(ready,), name=self.name, daemon=True)
+            self._thread.start()
+            ready.wait()
+
+    def _run(self, ready: threading.Event) -> None:
+        asyncio.set_event_loop(self._loop)
+        self._loop.call_soon(ready.set)
+        try:
+            self._loop.run_forever()
+            # cancel not finished coroutines, so they can release connections
+            pending = asyncio.all_tasks(self._loop)
+            for task in pending:
+                task.cancel()
+            if pending:
+                self._loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            self._loop.run_until_complete(self._loop.shutdown_asyncgens())
+        finally:
+            self._loop.close()
+
+    def submit(self, coroutine: Coroutine) -> Future:
+        """
+        Method schedule coroutine in the loop thread
+
+        Returns:
+            Future with the coroutine result, the future cancellation cancels the coroutine
+        """
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Method stop the loop, not finished coroutines are cancelled
+        """
+        with self._lock:
+            if not self.is_running:
+                return
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout)
+
+
+class SyncLoopClient(SIOContextManager):
+    """
+    Synchronous facade for the captcha solving class, which runs async solving in the background loop thread.
+
+    Waiting between the result requests does not hold a thread per captcha,
+    so a lot of concurrent synchronous solvings need only a handful of threads.
+    The client is thread-safe and can be shared between the worker threads.
+
+    Args:
+        captcha_params: Captcha solving class instance, like ``ReCaptcha``, ``ImageToText`` and etc.
+        background_loop: Loop used for the solving, process-wide shared loop is used if not set
+
+    Examples:
+        >>> from python3_capsolver.image_to_text import ImageToText
+        >>> from python3_capsolver.core.loop_client import SyncLoopClient
+        >>> client = SyncLoopClient(ImageToText(api_key="CAI-12345...."))
+        >>> future = client.submit(task_payload={"body": "base64_image_body"})
+        >>> future.result()
+        {
+           "errorId":0,
+           "errorCode":"None",
+           "errorDescription":"None",
+           "taskId":"db0a3153-621d-4f5e-8554-a1c032597ee7",
+           "status":"ready",
+           "solution":{
+              "confidence":0.9585,
+              "text":"gcphjd"
+           }
+        }
+
+        >>> from python3_capsolver.image_to_text import ImageToText
+        >>> from python3_capsolver.core.loop_client import SyncLoopClient
+        >>> with SyncLoopClient(ImageToText(api_key="CAI-12345....")) as client:
+        ...     results = list(client.map([{"body": "base64_image_body"}, {"body": "base64_image_body"}]))
+    """
+
+    def __init__(self, captcha_params: "CaptchaParams", background_loop: Optional[BackgroundLoop] = None):
+        self.captcha_params = captcha_params
+        self.background_loop = background_loop or BackgroundLoop.shared()
+
+    def submit(self, task_payload: Dict, **kwargs) -> Future:
+        """
+        Method schedule captcha solving and return without waiting
+
+        Args:
+            task_payload: Task parameters, check ``CaptchaParams.aio_captcha_handler`` docstring
+            kwargs: Additional ``aio_captcha_handler`` args, like ``timeout``
+
+        Returns:
+            Future with dict of the full server response
+        """
+        return self.background_loop.submit(self.captcha_params.aio_captcha_handler(task_payload, **kwargs))
+
+    def map(self, task_payloads: Iterable[Dict], timeout: Optional[float] = None, **kwargs) -> Iterator[Dict]:
+        """
+        Method schedule all the captcha solvings at once and yield results in the payloads order
+
+        Args:
+            task_payloads: Task parameters for each captcha
+            timeout: Max waiting time in seconds for all the results,
+                        ``concurrent.futures.TimeoutError`` is raised if it is reached
+            kwargs: Additional ``aio_captcha_handler`` args
+
+        Returns:
+            Iterator over dicts with full server responses
+        """
+        futures = [self.submit(task_payload, **kwargs) for task_payload in task_payloads]
+        return self._results_iterator(futures=futures, timeout=timeout)
+
+    @staticmethod
+    def _results_iterator(futures: list, timeout: Optional[float]) -> Iterator[Dict]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            for future in futures:
+                yield future.result(timeout=None if deadline is None else max(deadline - time.monotonic(), 0))
+        finally:
+            # results are not needed anymore - stop solving
+            for future in futures:
+                future.cancel()
+
+    def captcha_handler(self, task_payload: Dict, **kwargs) -> Dict[str, Any]:
+        """
+        Synchronous method for captcha solving, blocks until the result
+
+        Args:
+            task_payload: Task parameters, check ``CaptchaParams.aio_captcha_handler`` docstring
+            kwargs: Additional ``aio_captcha_handler`` args, like ``timeout``
+
+        Returns:
+            Dict with full server response
+        """
+        return self.submit(task_payload, **kwargs).result()
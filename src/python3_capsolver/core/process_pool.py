@@ -0,0 +1,164 @@
+import base64
+import asyncio
+from typing import Any, Tuple, Union, Optional
+from multiprocessing import shared_memory
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from .context_instr import AIOContextManager, SIOContextManager
+from .captcha_instrument import BUFFER_TYPES, Buffer
+
+__all__ = ("ProcessPoolPreprocessor",)
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """
+    Function open shared memory block created by the parent process
+    """
+    try:
+        # the block is unlinked by the parent, the worker must not track it
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # `track` arg is added in Python 3.13
+        return shared_memory.SharedMemory(name=name)
+
+
+def _encode_image(data: bytes) -> str:
+    return base64.b64encode(data).decode("utf-8")
+
+
+def _encode_shared_image(source_name: str, size: int, target_name: str) -> int:
+    """
+    Function encode image from the source shared memory block into the target one
+
+    Returns:
+        Encoded data size
+    """
+    source, target = _attach(source_name), _attach(target_name)
+    try:
+        with source.buf[:size] as data:
+            encoded = base64.b64encode(data)
+        target.buf[: len(encoded)] = encoded
+        return len(encoded)
+    finally:
+        source.close()
+        target.close()
+
+
+class ProcessPoolPreprocessor(SIOContextManager, AIOContextManager):
+    """
+    Process pool for the CPU-bound captcha preprocessing - image base64 encoding.
+
+    Work is done in the worker processes, so it does not block the event loop and does not wait for the GIL,
+    the parent process only sends the requests. Large images are passed to the workers via the shared memory,
+    the image bytes are not pickled and not sent over the pipe.
+
+    Pass it to the captcha solving class to encode large binary ``createTask`` task fields in the pool,
+    and to the ``FileInstrument`` methods to encode images in the pool.
+
+    Args:
+        max_workers: Number of the worker processes, CPU count by default
+        mp_context: ``multiprocessing`` context used for the workers start
+        shared_memory_threshold: Images of this size in bytes and larger are passed via the shared memory.
+                                    Binary task fields of this size and larger are encoded in the pool
+
+    Examples:
+        >>> import asyncio
+        >>> from python3_capsolver.image_to_text import ImageToText
+        >>> from python3_capsolver.core.captcha_instrument import FileInstrument
+        >>> from python3_capsolver.core.process_pool import ProcessPoolPreprocessor
+        >>> async def main(files):
+        ...     with ProcessPoolPreprocessor() as preprocessor:
+        ...         solver = ImageToText(api_key="CAI-12345....", preprocessor=preprocessor)
+        ...         bodies = await asyncio.gather(
+        ...             *[FileInstrument().aio_file_processing(captcha_file=file, preprocessor=preprocessor)
+        ...               for file in files]
+        ...         )
+        ...         return await asyncio.gather(
+        ...             *[solver.aio_captcha_handler(task_payload={"body": body}) for body in bodies]
+        ...         )
+        >>> asyncio.run(main(["captcha_1.png", "captcha_2.png"]))
+
+    Notes:
+        Captcha solving class instances are picklable, so they can be also passed to the own worker processes
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        mp_context: Optional[Any] = None,
+        shared_memory_threshold: int = 64 * 1024,
+    ):
+        self.shared_memory_threshold = shared_memory_threshold
+        self._executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=mp_context)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return super().__exit__(exc_type, exc_value, traceback)
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return await super().__aexit__(exc_type, exc_value, traceback)
+
+    def close(self) -> None:
+        """
+        Method stop the worker processes
+        """
+        self._executor.shutdown(wait=True)
+
+    def _submit_image(self, data: Buffer) -> Tuple[Future, Optional[Tuple[shared_memory.SharedMemory, ...]]]:
+        size = len(memoryview(data).cast("B"))
+        if size < self.shared_memory_threshold:
+            return self._executor.submit(_encode_image, bytes(data)), None
+
+        source = shared_memory.SharedMemory(create=True, size=size)
+        target = shared_memory.SharedMemory(create=True, size=4 * ((size + 2) // 3))
+        try:
+            source.buf[:size] = memoryview(data).cast("B")
+            future = self._executor.submit(_encode_shared_image, source.name, size, target.name)
+        except BaseException:
+            self._release((source, target))
+            raise
+        return future, (source, target)
+
+    @staticmethod
+    def _collect_image(result: Union[str, int], blocks: Optional[Tuple[shared_memory.SharedMemory, ...]]) -> str:
+        if blocks is None:
+            return result
+        with blocks[1].buf[:result] as encoded:
+            return str(encoded, "utf-8")
+
+    @staticmethod
+    def _release(blocks: Optional[Tuple[shared_memory.SharedMemory, ...]]) -> None:
+        for block in blocks or ():
+            block.close()
+            block.unlink()
+
+    def encode_image(self, data: Buffer) -> str:
+        """
+        Synchronous method encode image bytes to the base64 string in the worker process
+        """
+        future, blocks = self._submit_image(data)
+        try:
+            return self._collect_image(future.result(), blocks)
+        finally:
+            self._release(blocks)
+
+    async def aio_encode_image(self, data: Buffer) -> str:
+        """
+        Asynchronous method encode image bytes to the base64 string in the worker process
+        """
+        future, blocks = self._submit_image(data)
+        try:
+            return self._collect_image(await asyncio.wrap_future(future), blocks)
+        finally:
+            self._release(blocks)
+
+    def is_large_buffer(self, data: Any) -> bool:
+        """
+        Method check if the binary task field is large enough to be encoded in the pool,
+        such fields are passed to the workers via the shared memory
+        """
+        if not isinstance(data, BUFFER_TYPES):
+            return False
+        with memoryview(data) as view:
+            return view.nbytes >= self.shared_memory_threshold
@@ -0,0 +1,251 @@
+import time
+import asyncio
+import logging
+from typing import Any, Tuple, Callable, Iterable, Optional, Awaitable
+
+import aiohttp
+import requests
+from tenacity import (
+    Retrying,
+    AsyncRetrying,
+    RetryCallState,
+    retry_if_result,
+    stop_after_delay,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_random_exponential,
+)
+from urllib3.exceptions import NewConnectionError, ConnectTimeoutError
+
+from .enum import ErrorKindEnm
+from .const import RETRY_ERROR_CODES, RETRY_STATUS_CODES, REJECTED_STATUS_CODES
+from .exceptions import HTTPStatusError, error_kind, status_error_kind
+
+__all__ = ("RetryPolicy",)
+
+logger = logging.getLogger(__name__)
+
+
+class RetryPolicy:
+    """
+    Retry policy for the single API request or file download.
+
+    Failed call is repeated after the exponential backoff with full jitter - random delay
+    between ``0`` and ``initial_delay * 2 ** attempt`` limited by ``max_delay``,
+    so a lot of concurrent clients do not repeat requests at the same moment.
+    After the capacity errors (``ErrorKindEnm.RetryAfterDelay``, e.g. HTTP 429 or ``ERROR_RATE_LIMIT``)
+    ``capacity_delay`` is added to the backoff. Permanent errors are not repeated by default.
+    Policy keeps only the settings, retry state is created for every call after the first failed attempt,
+    so one instance can be shared by any number of threads and coroutines
+    and the successful calls do not allocate the retry state at all.
+
+    Args:
+        max_attempts: Max number of the call attempts, including the first one
+        initial_delay: Backoff base in seconds
+        max_delay: Max delay in seconds between the attempts
+        max_elapsed: Max time in seconds spent on the call with all the retries
+        capacity_delay: Extra delay in seconds after the capacity errors
+        retry_statuses: HTTP status codes after which the call is repeated
+        retry_error_codes: API ``errorCode`` values after which the call is repeated
+
+    Examples:
+        >>> from python3_capsolver.core.retry import RetryPolicy
+        >>> from python3_capsolver.image_to_text import ImageToText
+        >>> ImageToText(
+        ...     api_key="CAI-12345....",
+        ...     retry_policy=RetryPolicy(max_attempts=3, max_elapsed=10),
+        ... ).captcha_handler(task_payload={"body": "base64_image_body"})
+
+    Notes:
+        Requests which can create a new task (``createTask``, ``getToken`` and etc.) are repeated
+        only if the connection was not established or server rejected the request before the processing
+        (HTTP 429 or 503 from ``retry_statuses``), read timeouts, dropped connections and other 5xx statuses
+        are not retried for them, so the task will not be created twice.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 4,
+        initial_delay: float = 0.5,
+        max_delay: float = 10,
+        max_elapsed: float = 30,
+        capacity_delay: float = 3,
+        retry_statuses: Iterable[int] = RETRY_STATUS_CODES,
+        retry_error_codes: Iterable[str] = RETRY_ERROR_CODES,
+    ):
+        if max_attempts < 1:
+            raise ValueError("Invalid `max_attempts` value, it must be at least 1")
+        self.max_attempts = max_attempts
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.max_elapsed = max_elapsed
+        self.capacity_delay = capacity_delay
+        self.retry_statuses = frozenset(retry_statuses)
+        self.retry_error_codes = frozenset(retry_error_codes)
+
+    def is_retryable_error(self, error: BaseException, idempotent: bool = True) -> bool:
+        """
+        Method check if the call failed with the exception can be repeated
+
+        Args:
+            error: Raised exception
+            idempotent: If ``False`` - errors after which the request could be processed by the server are not retried
+        """
+        if isinstance(error, HTTPStatusError):
+            if not idempotent and error.status not in REJECTED_STATUS_CODES:
+                # the request could be processed before the failure
+                return False
+            return error.status in self.retry_statuses
+        if not idempotent:
+            return self._is_not_sent(error)
+        return isinstance(
+            error, (requests.ConnectionError, requests.Timeout, aiohttp.ClientError, asyncio.TimeoutError)
+        )
+
+    @staticmethod
+    def _is_not_sent(error: BaseException) -> bool:
+        """
+        Method check if the request failed before the connection was established, so it was not sent
+        """
+        if isinstance(error, (requests.ConnectTimeout, aiohttp.ClientConnectorError)):
+            return True
+        if not isinstance(error, requests.ConnectionError) or not error.args:
+            return False
+        # requests wraps urllib3 ``MaxRetryError``, its reason is the connection error
+        reason = getattr(error.args[0], "reason", error.args[0])
+        return isinstance(reason, (NewConnectionError, ConnectTimeoutError))
+
+    def is_retryable_result(self, result: Any) -> bool:
+        """
+        Method check if the API response contains retryable ``errorCode``
+        """
+        return isinstance(result, dict) and result.get("errorCode") in self.retry_error_codes
+
+    @staticmethod
+    def outcome_kind(retry_state: RetryCallState) -> ErrorKindEnm:
+        """
+        Method classify the failed attempt outcome
+        """
+        outcome = retry_state.outcome
+        if not outcome.failed:
+            return error_kind(outcome.result().get("errorCode"))
+        error = outcome.exception()
+        if isinstance(error, HTTPStatusError):
+            return status_error_kind(error.status)
+        return ErrorKindEnm.Transient
+
+    def _retrying_kwargs(self, idempotent: bool, deadline: Optional[float]) -> dict:
+        base_wait = wait_random_exponential(multiplier=self.initial_delay, max=self.max_delay)
+
+        def wait(retry_state: RetryCallState) -> float:
+            delay = base_wait(retry_state)
+            if self.outcome_kind(retry_state) == ErrorKindEnm.RetryAfterDelay:
+                delay += self.capacity_delay
+            if deadline is None:
+                return delay
+            return min(delay, max(deadline - time.monotonic(), 0))
+
+        stop = stop_after_attempt(self.max_attempts) | stop_after_delay(self.max_elapsed)
+        if deadline is not None:
+            stop = stop | (lambda retry_state: time.monotonic() >= deadline)
+
+        return dict(
+            stop=stop,
+            wait=wait,
+            retry=retry_if_exception(lambda error: self.is_retryable_error(error, idempotent=idempotent))
+            | retry_if_result(self.is_retryable_result),
+            before_sleep=self._log_retry,
+            # after the last attempt - return it result or raise it exception as is
+            retry_error_callback=lambda retry_state: retry_state.outcome.result(),
+        )
+
+    @staticmethod
+    def _log_retry(retry_state: RetryCallState) -> None:
+        outcome = retry_state.outcome
+        reason = outcome.exception() if outcome.failed else outcome.result().get("errorCode")
+        logger.warning(
+            "Request attempt %s failed with %r, retrying in %.2f sec",
+            retry_state.attempt_number,
+            reason,
+            retry_state.upcoming_sleep,
+        )
+
+    @staticmethod
+    def _replay(outcome: Tuple[Any, Optional[Exception]]) -> Any:
+        """
+        Method repeat the first attempt outcome, made before the retry state creation, for the retry state
+        """
+        result, error = outcome
+        if error is not None:
+            raise error
+        return result
+
+    def call(
+        self,
+        func: Callable[[], Any],
+        idempotent: bool = True,
+        deadline: Optional[float] = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> Any:
+        """
+        Synchronous method call the function and repeat it according to the policy
+
+        Args:
+            func: Function sending the request
+            idempotent: ``False`` if the request can create a new task
+            deadline: ``time.monotonic`` moment after which the call is not repeated
+            sleep: Function used for the waiting between the attempts
+
+        Returns:
+            The last attempt result, the last attempt exception is raised if it is failed
+        """
+        try:
+            result = func()
+        except Exception as error:
+            if not self.is_retryable_error(error, idempotent=idempotent):
+                raise
+            first_attempt = [(None, error)]
+        else:
+            if not self.is_retryable_result(result):
+                return result
+            first_attempt = [(result, None)]
+
+        def attempt() -> Any:
+            return self._replay(first_attempt.pop()) if first_attempt else func()
+
+        return Retrying(sleep=sleep, **self._retrying_kwargs(idempotent=idempotent, deadline=deadline))(attempt)
+
+    async def aio_call(
+        self,
+        func: Callable[[], Awaitable[Any]],
+        idempotent: bool = True,
+        deadline: Optional[float] = None,
+    ) -> Any:
+        """
+        Asynchronous method call the coroutine function and repeat it according to the policy
+
+        Args:
+            func: Coroutine function sending the request
+            idempotent: ``False`` if the request can create a new task
+            deadline: ``time.monotonic`` moment after which the call is not repeated
+
+        Returns:
+            The last attempt result, the last attempt exception is raised if it is failed
+        """
+
+        try:
+            # `func` can be a plain function returning awaitable, e.g. lambda
+            result = await func()
+        except Exception as error:
+            if not self.is_retryable_error(error, idempotent=idempotent):
+                raise
+            first_attempt = [(None, error)]
+        else:
+            if not self.is_retryable_result(result):
+                return result
+            first_attempt = [(result, None)]
+
+        async def attempt() -> Any:
+            return self._replay(first_attempt.pop()) if first_attempt else await func()
+
+        return await AsyncRetrying(**self._retrying_kwargs(idempotent=idempotent, deadline=deadline))(attempt)
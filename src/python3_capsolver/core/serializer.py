@@ -12,6 +12,7 @@ __all__ = (
     "RequestCreateTaskSer",
     "CaptchaResponseSer",
     "RequestGetTaskResultSer",
+    "JournalRecordSer",
 )
 
 
@@ -66,3 +67,16 @@ class CaptchaResponseSer(ResponseSer):
     taskId: Optional[str] = None
     status: Union[ResponseStatusEnm, str] = ResponseStatusEnm.Processing
     solution: Optional[Dict[str, Any]] = None
+
+
+"""
+Task journal ser
+"""
+
+
+class JournalRecordSer(MyBaseModel):
+    event: str
+    taskId: str
+    captchaType: Optional[str] = None
+    createdAt: Optional[float] = None
+    endpoint: Optional[str] = None
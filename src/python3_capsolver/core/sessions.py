@@ -0,0 +1,197 @@
+import asyncio
+import weakref
+import threading
+import contextlib
+from typing import Dict, Tuple, Optional
+
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+
+__all__ = ("ThreadLocalSessions", "LoopSessions")
+
+
+class ThreadLocalSessions:
+    """
+    Pool of the SYNC HTTP sessions, one ``requests.Session`` per thread.
+
+    ``requests.Session`` is not thread-safe, so every thread gets own session
+    and reuses it connections for all the next requests without any locking.
+    Sessions of the finished threads are closed when the new session is created,
+    so the short-lived threads (e.g. ``ThreadPoolExecutor`` workers) do not leak connections.
+
+    Pool is created by ``CaptchaParams`` and used by all the SYNC methods,
+    so one captcha solving class instance can be shared by any number of threads.
+
+    Args:
+        pool_maxsize: Max number of the kept connections per host in the single thread session
+        verify: SSL certificates verification
+
+    Examples:
+        >>> from concurrent.futures import ThreadPoolExecutor
+        >>> from python3_capsolver.image_to_text import ImageToText
+        >>> with ImageToText(api_key="CAI-12345....") as solver:
+        ...     with ThreadPoolExecutor(max_workers=200) as executor:
+        ...         results = list(
+        ...             executor.map(lambda body: solver.captcha_handler(task_payload={"body": body}), bodies)
+        ...         )
+    """
+
+    def __init__(self, pool_maxsize: int = 2, verify: bool = False):
+        self.pool_maxsize = pool_maxsize
+        self.verify = verify
+        self._local = threading.local()
+        # session ID -> (owner thread, session), used for the closing
+        self._sessions: Dict[int, Tuple[threading.Thread, requests.Session]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+    def get(self) -> requests.Session:
+        """
+        Method return session of the current thread, it is created on the first call
+        """
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._new_session()
+            with self._lock:
+                self._close_finished()
+                self._sessions[id(session)] = (threading.current_thread(), session)
+            self._local.session = session
+        return session
+
+    def _new_session(self) -> requests.Session:
+        session = requests.Session()
+        session.verify = self.verify
+        # failed requests are repeated by the captcha params retry policy
+        adapter = HTTPAdapter(pool_maxsize=self.pool_maxsize)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def _close_finished(self) -> None:
+        for key, (thread, session) in list(self._sessions.items()):
+            if not thread.is_alive():
+                session.close()
+                del self._sessions[key]
+
+    def close(self) -> None:
+        """
+        Method close sessions of all the threads, new sessions are created on the next requests
+        """
+        with self._lock:
+            sessions = [session for _, session in self._sessions.values()]
+            self._sessions.clear()
+            self._local = threading.local()
+        for session in sessions:
+            session.close()
+
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+def _discard_session(loop: asyncio.AbstractEventLoop, session: aiohttp.ClientSession) -> None:
+    """
+    Function close the session without waiting, its loop can be closed, stopped or run in any thread
+    """
+    if session.closed:
+        return
+    running_loop = _running_loop()
+    if loop.is_running() and loop is not running_loop:
+        with contextlib.suppress(RuntimeError):
+            asyncio.run_coroutine_threadsafe(session.close(), loop)
+            return
+    if not loop.is_closed() and running_loop is None:
+        # the stopped loop is run until the pooled connections are closed
+        loop.run_until_complete(session.close())
+        return
+    # the connections are closed at once, the closing is waited by the running loop, if the loop is closed
+    # the connections are already dropped and the coroutine is finished without waiting
+    coroutine = session.close()
+    try:
+        coroutine.send(None)
+    except StopIteration:
+        return
+    coroutine.close()
+
+
+def _discard_sessions(sessions: Dict[asyncio.AbstractEventLoop, aiohttp.ClientSession]) -> None:
+    for loop, session in list(sessions.items()):
+        _discard_session(loop, session)
+    sessions.clear()
+
+
+class LoopSessions:
+    """
+    Pool of the ASYNC HTTP sessions, one pooled ``aiohttp.ClientSession`` per event loop.
+
+    ``aiohttp.ClientSession`` is bound to the event loop it was created in, so every loop gets own session.
+    Session is created on the first request and its connections are reused by all the next
+    ``createTask`` and ``getTaskResult`` requests in this loop, so the pending tasks do not keep own sessions.
+    Sessions of the closed loops are dropped when the new session is created.
+
+    Pool is created by ``CaptchaParams`` and used by all the ASYNC methods if the session is not passed to them.
+
+    Args:
+        limit: Max number of the simultaneous connections of the single loop session
+
+    Examples:
+        >>> import asyncio
+        >>> from python3_capsolver.image_to_text import ImageToText
+        >>> async def main():
+        ...     async with ImageToText(api_key="CAI-12345....") as solver:
+        ...         return await asyncio.gather(
+        ...             *[solver.aio_captcha_handler(task_payload={"body": body}) for body in bodies]
+        ...         )
+        >>> asyncio.run(main())
+    """
+
+    def __init__(self, limit: int = 100):
+        self.limit = limit
+        self._sessions: Dict[asyncio.AbstractEventLoop, aiohttp.ClientSession] = {}
+        self._lock = threading.Lock()
+        # sessions left open are closed with the pool or at the interpreter exit
+        self._finalizer = weakref.finalize(self, _discard_sessions, self._sessions)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+    def get(self) -> aiohttp.ClientSession:
+        """
+        Method return session of the running event loop, it is created on the first call
+        """
+        loop = asyncio.get_running_loop()
+        session = self._sessions.get(loop)
+        if session is not None and not session.closed:
+            return session
+        with self._lock:
+            for other_loop, other_session in list(self._sessions.items()):
+                if other_loop.is_closed() or other_session.closed:
+                    _discard_session(other_loop, other_session)
+                    del self._sessions[other_loop]
+            session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.limit))
+            self._sessions[loop] = session
+        return session
+
+    async def aio_close(self) -> None:
+        """
+        Method close session of the running event loop, new session is created on the next request
+        """
+        with self._lock:
+            session = self._sessions.pop(asyncio.get_running_loop(), None)
+        if session is not None:
+            await session.close()
+
+    def close(self) -> None:
+        """
+        Method close sessions of all the event loops without waiting
+        """
+        with self._lock:
+            _discard_sessions(self._sessions)
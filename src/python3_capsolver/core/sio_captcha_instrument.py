@@ -1,124 +1,427 @@
 import time
 import logging
-from typing import Optional
+from typing import List, Tuple, Union, Optional
 from urllib import parse
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
 import requests
-from requests.adapters import HTTPAdapter
 
-from .enum import ResponseStatusEnm, EndpointPostfixEnm
-from .const import RETRIES, REQUEST_URL, VALID_STATUS_CODES
-from .utils import attempts_generator
-from .serializer import CaptchaResponseSer
-from .captcha_instrument import CaptchaInstrumentBase
+from .log import log_error
+from .enum import ErrorKindEnm, TaskPhaseEnm, ResponseStatusEnm, EndpointPostfixEnm
+from .const import REQUEST_URL, READ_TIMEOUT, CONNECT_TIMEOUT, VALID_STATUS_CODES
+from .retry import RetryPolicy
+from .hedging import HedgingPolicy
+from .endpoints import EndpointPool
+from .exceptions import (
+    HTTPStatusError,
+    CircuitOpenError,
+    CaptchaCancelledError,
+    CompressionRejectedError,
+    error_kind,
+)
+from .serializer import CaptchaResponseSer, RequestGetTaskResultSer
+from .cancellation import CancelToken
+from .circuit_breaker import CircuitBreaker
+from .captcha_instrument import MIN_REQUEST_TIMEOUT, IDEMPOTENT_ENDPOINTS, CaptchaInstrumentBase
 
 __all__ = ("SIOCaptchaInstrument",)
 
+logger = logging.getLogger(__name__)
+
 
 class SIOCaptchaInstrument(CaptchaInstrumentBase):
     """
     Instrument for working with sync captcha
+
+    Args:
+        captcha_params: Captcha solving class instance
+        timeout: Total captcha solving deadline in seconds, ``captcha_params.timeout`` is used if not set
+        connect_timeout: Single request connection timeout in seconds
+        read_timeout: Single request read timeout in seconds
+        cancel_token: Token for the solving cancellation from another thread
+        task_params: Task params snapshot for this solving, ``captcha_params.task_params`` are used if not set
     """
 
-    def __init__(self, captcha_params: "CaptchaParams"):
-        super().__init__()
+    __slots__ = (
+        "captcha_params",
+        "cancel_token",
+        "created_task_data",
+        "timeout",
+        "connect_timeout",
+        "read_timeout",
+    )
+
+    def __init__(
+        self,
+        captcha_params: "CaptchaParams",
+        timeout: Optional[float] = None,
+        connect_timeout: Optional[float] = None,
+        read_timeout: Optional[float] = None,
+        cancel_token: Optional[CancelToken] = None,
+        task_params: Optional[dict] = None,
+    ):
+        # task params snapshot, so the captcha params changes will not affect the running solving
+        super().__init__(task_params=dict(captcha_params.task_params) if task_params is None else task_params)
         self.captcha_params = captcha_params
+        self.cancel_token = cancel_token
         self.created_task_data = CaptchaResponseSer
+        self.timeout = captcha_params.timeout if timeout is None else timeout
+        self.connect_timeout = captcha_params.connect_timeout if connect_timeout is None else connect_timeout
+        self.read_timeout = captcha_params.read_timeout if read_timeout is None else read_timeout
+
+    @property
+    def task_payload(self) -> dict:
+        """
+        Full ``createTask`` payload, it is built only for the request and is not kept with the pending task
+        """
+        payload = self.captcha_params.create_task_payload.to_dict()
+        payload["task"] = self.task_params
+        return payload
 
-        # prepare session
-        self.session = requests.Session()
-        self.session.mount("http://", HTTPAdapter(max_retries=RETRIES))
-        self.session.mount("https://", HTTPAdapter(max_retries=RETRIES))
-        self.session.verify = False
+    @property
+    def session(self) -> requests.Session:
+        """
+        Session of the current thread, so the instrument methods can be called from any thread
+        """
+        return self.captcha_params.sessions.get()
+
+    def _request_timeout(self) -> Tuple[float, float]:
+        """
+        Method return ``(connect, read)`` timeouts for the next request, read timeout is clipped by the deadline
+        """
+        time_left = self._time_left()
+        if time_left is None:
+            return self.connect_timeout, self.read_timeout
+        # `requests` do not accept zero timeouts
+        time_left = max(time_left, MIN_REQUEST_TIMEOUT)
+        return min(self.connect_timeout, time_left), min(self.read_timeout, time_left)
 
     def processing_captcha(self) -> dict:
-        self.captcha_params.create_task_payload.task = self.captcha_params.task_params
+        self._start_deadline(self.timeout)
+        if self.captcha_params.hedging is None:
+            return self._solve().to_dict()
+        return self._hedged_solve(hedging=self.captcha_params.hedging).to_dict()
+
+    def _sleep(self, sleep_time: float) -> None:
+        """
+        Method wait between the requests, waiting is interrupted by the cancel token
+        """
+        if self.cancel_token is None:
+            time.sleep(sleep_time)
+        elif self.cancel_token.wait(sleep_time):
+            raise CaptchaCancelledError(task_id=self.task_id)
+
+    def _check_cancelled(self) -> None:
+        if self.cancel_token is not None and self.cancel_token.cancelled:
+            raise CaptchaCancelledError(task_id=self.task_id)
 
-        self.created_task_data = CaptchaResponseSer(**self.__create_task())
+    def _solve(self) -> CaptchaResponseSer:
+        """
+        Method create the task and wait for it result.
+        If the solving is cancelled - created task ID is passed to the ``on_task_abandoned`` hook
+        """
+        self._check_balance(self.captcha_params.balance_monitor)
+        try:
+            result = self.__solve()
+        except CaptchaCancelledError:
+            self._report_abandoned(self.captcha_params.on_task_abandoned)
+            if self.superseded:
+                self._journal_done(self.captcha_params.journal)
+            raise
+        self._journal_done(self.captcha_params.journal, result)
+        self._balance_solved(self.captcha_params.balance_monitor, result)
+        return result
+
+    def __solve(self) -> CaptchaResponseSer:
+        self._check_cancelled()
+        try:
+            self.create_task()
+        except requests.Timeout:
+            if self._deadline_exceeded():
+                return self._timeout_result()
+            raise
 
         # if task created and ready - return result
         if self.created_task_data.errorId == 0:
             if str(self.created_task_data.status).lower() == ResponseStatusEnm.Ready.value:
-                return self.created_task_data.to_dict()
-            return self.__get_result().to_dict()
+                return self.created_task_data
+            return self.get_result()
         else:
             self.created_task_data.status = ResponseStatusEnm.Failed
 
-        return self.created_task_data.to_dict()
+        return self.created_task_data
+
+    def _hedged_solve(self, hedging: HedgingPolicy) -> CaptchaResponseSer:
+        """
+        Method create the duplicate task if the first one is not solved after the hedging delay
+        and return the first successfully solved task result
+        """
+        hedging.register_task()
+        started = time.monotonic()
+        # each solving gets own token, so the slower one can be cancelled separately
+        parent_token = self.cancel_token or CancelToken()
+        self.cancel_token = parent_token.child()
+        instruments = [self]
+
+        executor = ThreadPoolExecutor(max_workers=2)
+        try:
+            pending = {executor.submit(self._solve)}
+            done, _ = wait(pending, timeout=self._next_sleep(hedging.hedge_delay()))
+            if not done and not self._deadline_exceeded() and hedging.acquire_hedge():
+                twin = self._twin()
+                twin.cancel_token = parent_token.child()
+                instruments.append(twin)
+                pending.add(executor.submit(twin._solve))
+
+            result, error = None, None
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.exception() is not None:
+                        error = error or future.exception()
+                    elif result is None or future.result().status == ResponseStatusEnm.Ready:
+                        result = future.result()
+                if result is not None and result.status == ResponseStatusEnm.Ready:
+                    hedging.record_latency(time.monotonic() - started)
+                    break
+            if result is None:
+                raise error
+            for instrument in instruments:
+                instrument.superseded = True
+            return result
+        finally:
+            # stop the slower task polling, it is finished in background
+            for instrument in instruments:
+                instrument.cancel_token.cancel()
+                instrument.cancel_token.detach()
+            executor.shutdown(wait=False)
+
+    def _twin(self) -> "SIOCaptchaInstrument":
+        """
+        Method return new instrument for the same captcha, with the same deadline
+        """
+        twin = SIOCaptchaInstrument(
+            captcha_params=self.captcha_params,
+            timeout=self.timeout,
+            connect_timeout=self.connect_timeout,
+            read_timeout=self.read_timeout,
+        )
+        twin.task_params = self.task_params
+        twin.started_at = self.started_at
+        twin.deadline = self.deadline
+        return twin
+
+    def create_task(self) -> CaptchaResponseSer:
+        """
+        Method send ``createTask`` request without waiting for the task result,
+        created task ID is saved in the instrument ``task_id`` attribute
+        """
+        payload = self.task_payload
+        preprocessor = self.captcha_params.preprocessor
+        pooled = self._pooled_fields(payload, preprocessor)
+        if pooled:
+            # large binary fields are encoded by the pool workers, they are passed via the shared memory
+            encoded = {key: preprocessor.encode_image(value) for key, value in pooled.items()}
+            payload = {**payload, "task": {**payload["task"], **encoded}}
+        payload = self._encode_buffers(payload)
+        self.created_task_data = CaptchaResponseSer(**self.__create_task(payload=payload))
+        self.task_id = self.created_task_data.taskId
+        self._journal_created(self.captcha_params.journal, captcha_type=self.task_params.get("type"))
+        if logger.isEnabledFor(logging.DEBUG):
+            self._log_debug(
+                logger, TaskPhaseEnm.Create, "Task %s created, status: %s", self.task_id, self.created_task_data.status
+            )
+        return self.created_task_data
 
-    def __create_task(self, url_postfix: str = EndpointPostfixEnm.CREATE_TASK.value) -> dict:
+    def __create_task(
+        self,
+        payload: Union[dict, bytes, bytearray],
+        url_postfix: str = EndpointPostfixEnm.CREATE_TASK.value,
+    ) -> dict:
         """
-        Function send SYNC request to service and wait for result
+        Function send SYNC request to service and wait for result.
+        Every failed attempt is repeated on the next API address, the task is pinned to the used one.
+        Body is compressed on the first use of the API address which accepts the compressed bodies
         """
+        endpoints = self.captcha_params.endpoints
+        compression = self.captcha_params.compression
+        next_url = endpoints.rotation()
+        # compressed body or `None` if it is not compressible, empty until the first compressed request
+        compressed_body: List[Optional[bytes]] = []
+
+        def post(request_url: str) -> dict:
+            self.endpoint = request_url
+            if compression is None or not compression.accepts(request_url):
+                return self._post(request_url=request_url, url_postfix=url_postfix, payload=payload)
+            if not compressed_body:
+                body = self._compressible_body(payload, compression)
+                compressed_body.append(None if body is None else compression.compress(body))
+            compressed = compressed_body[0]
+            if compressed is None:
+                return self._post(request_url=request_url, url_postfix=url_postfix, payload=payload)
+            try:
+                return self._post(request_url=request_url, url_postfix=url_postfix, payload=compressed, compressed=True)
+            except CompressionRejectedError:
+                result = self._post(request_url=request_url, url_postfix=url_postfix, payload=payload)
+                if not result.get("errorId"):
+                    # the same request is accepted uncompressed
+                    compression.reject(request_url)
+                return result
+
         try:
-            resp = self.session.post(
-                parse.urljoin(self.captcha_params.request_url, url_postfix),
-                json=self.captcha_params.create_task_payload.to_dict(),
+            return self.captcha_params.retry_policy.call(
+                lambda: endpoints.call(post, next_url=next_url),
+                idempotent=False,
+                deadline=self.deadline,
+                sleep=self._sleep,
             )
-            if resp.status_code in VALID_STATUS_CODES:
-                return resp.json()
-            else:
-                raise ValueError(resp.raise_for_status())
+        except CircuitOpenError:
+            # the API is known to be unavailable, traceback is not logged
+            raise
         except Exception as error:
-            logging.exception(error)
+            self._log_error(logger, error, phase=TaskPhaseEnm.Create)
             raise
 
-    def __get_result(self, url_postfix: str = EndpointPostfixEnm.GET_TASK_RESULT.value) -> CaptchaResponseSer:
+    def _post(
+        self,
+        request_url: str,
+        url_postfix: str,
+        payload: Union[dict, bytes, bytearray],
+        session: Optional[requests.Session] = None,
+        compressed: bool = False,
+    ) -> dict:
         """
-        Method send SYNC request to service and wait for result
+        Method send single SYNC request to the API address and return the response JSON
         """
-        # initial waiting
-        time.sleep(self.captcha_params.sleep_time)
+        resp = (session or self.session).post(
+            parse.urljoin(request_url, url_postfix),
+            timeout=self._request_timeout(),
+            **self._body_kwargs(payload, compressed=compressed),
+        )
+        if compressed and resp.status_code in self.captcha_params.compression.reject_statuses:
+            raise CompressionRejectedError(status=resp.status_code, reason=resp.reason)
+        if resp.status_code in VALID_STATUS_CODES:
+            return resp.json()
+        raise HTTPStatusError(status=resp.status_code, reason=resp.reason)
 
-        self.captcha_params.get_result_params.taskId = self.created_task_data.taskId
+    def get_result(self, initial_wait: Optional[float] = None) -> CaptchaResponseSer:
+        """
+        Method send SYNC requests to service and wait for the ``task_id`` task result until the deadline
+
+        Args:
+            initial_wait: Waiting time before the first request, ``sleep_time`` by default
+        """
+        initial_wait = self.captcha_params.sleep_time if initial_wait is None else initial_wait
+        self._sleep(self._next_sleep(initial_wait))
 
-        attempts = attempts_generator()
-        for _ in attempts:
+        while not self._deadline_exceeded():
+            self._check_cancelled()
             try:
-                resp = self.session.post(
-                    parse.urljoin(self.captcha_params.request_url, url_postfix),
-                    json=self.captcha_params.get_result_params.to_dict(),
-                )
-                if resp.status_code in VALID_STATUS_CODES:
-                    result_data = CaptchaResponseSer(**resp.json())
-                    if result_data.status in (
-                        ResponseStatusEnm.Ready,
-                        ResponseStatusEnm.Failed,
-                    ):
-                        # if captcha ready\failed or have unknown status - return exist data
-                        return result_data
-                else:
-                    raise ValueError(resp.raise_for_status())
+                result_data = self.fetch_result()
+                if logger.isEnabledFor(logging.DEBUG):
+                    self._log_debug(logger, TaskPhaseEnm.Poll, "Task %s status: %s", self.task_id, result_data.status)
+                if result_data.status in (
+                    ResponseStatusEnm.Ready,
+                    ResponseStatusEnm.Failed,
+                ):
+                    # if captcha ready\failed or have unknown status - return exist data
+                    return result_data
+            except requests.Timeout as error:
+                if self._deadline_exceeded():
+                    break
+                self._log_error(logger, error, phase=TaskPhaseEnm.Poll)
+                raise
+            except CircuitOpenError:
+                # the API is known to be unavailable, traceback is not logged
+                raise
             except Exception as error:
-                logging.exception(error)
+                self._log_error(logger, error, phase=TaskPhaseEnm.Poll)
                 raise
 
             # if captcha just created or in processing now - wait
-            time.sleep(self.captcha_params.sleep_time)
+            self._sleep(self._next_sleep(self.captcha_params.sleep_time))
+
+        # the deadline is reached and the captcha is still not ready
+        return self._timeout_result(task_id=self.task_id)
 
-        # default response if server is silent
-        self.result.errorId = 1
-        self.result.errorCode = self.CAPTCHA_UNSOLVABLE
-        self.result.errorDescription = self.CAPTCHA_UNSOLVABLE_DESCRIPTION
-        self.result.taskId = self.created_task_data.taskId
-        self.result.status = ResponseStatusEnm.Failed
-        return self.result
+    def fetch_result(
+        self,
+        session: Optional[requests.Session] = None,
+        url_postfix: str = EndpointPostfixEnm.GET_TASK_RESULT.value,
+    ) -> CaptchaResponseSer:
+        """
+        Method send ``getTaskResult`` request for the ``task_id`` task, failed request is repeated by the retry policy
+
+        Args:
+            session: Session used for the request, instrument session is used if not set
+        """
+        payload = RequestGetTaskResultSer(
+            clientKey=self.captcha_params.get_result_params.clientKey, taskId=self.task_id
+        ).to_dict()
+        endpoints = self.captcha_params.endpoints
+        # the task creation address is used first, the rest ones only if it fails
+        next_url = endpoints.rotation(pinned=self.endpoint)
+        result = CaptchaResponseSer(
+            **self.captcha_params.retry_policy.call(
+                lambda: endpoints.call(
+                    lambda request_url: self._post(
+                        request_url=request_url, url_postfix=url_postfix, payload=payload, session=session
+                    ),
+                    next_url=next_url,
+                ),
+                deadline=self.deadline,
+                sleep=self._sleep,
+            )
+        )
+        if result.errorId != 0 and error_kind(result.errorCode) == ErrorKindEnm.Permanent:
+            # polling will not fix the error, e.g. invalid task ID or unsolvable captcha
+            result.status = ResponseStatusEnm.Failed
+        return result
 
     @staticmethod
     def send_post_request(
         payload: Optional[dict] = None,
-        session: requests.Session = requests.Session(),
+        session: Optional[requests.Session] = None,
         url_postfix: EndpointPostfixEnm = EndpointPostfixEnm.GET_BALANCE,
+        timeout: Tuple[float, float] = (CONNECT_TIMEOUT, READ_TIMEOUT),
+        request_url: str = REQUEST_URL,
+        retry_policy: Optional[RetryPolicy] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        endpoints: Optional[EndpointPool] = None,
     ) -> dict:
         """
-        Function send SYNC request to service and wait for result
+        Function send SYNC request to service and wait for result.
+        If ``endpoints`` pool is passed - it is used instead of the ``request_url`` and ``circuit_breaker``.
+        If ``session`` is not passed - new session is used for this call only
         """
-        try:
-            resp = session.post(parse.urljoin(REQUEST_URL, url_postfix.value), json=payload)
+        if session is None:
+            with requests.Session() as own_session:
+                return SIOCaptchaInstrument.send_post_request(
+                    payload=payload,
+                    session=own_session,
+                    url_postfix=url_postfix,
+                    timeout=timeout,
+                    request_url=request_url,
+                    retry_policy=retry_policy,
+                    circuit_breaker=circuit_breaker,
+                    endpoints=endpoints,
+                )
+
+        def post(url: str) -> dict:
+            resp = session.post(parse.urljoin(url, url_postfix.value), json=payload, timeout=timeout)
             if resp.status_code == 200:
                 return resp.json()
-            else:
-                raise ValueError(resp.status_code)
+            raise HTTPStatusError(status=resp.status_code, reason=resp.reason)
+
+        endpoints = endpoints or EndpointPool([request_url], circuit_breaker=circuit_breaker)
+        next_url = endpoints.rotation()
+        try:
+            return (retry_policy or RetryPolicy()).call(
+                lambda: endpoints.call(post, next_url=next_url), idempotent=url_postfix in IDEMPOTENT_ENDPOINTS
+            )
+        except CircuitOpenError:
+            # the API is known to be unavailable, traceback is not logged
+            raise
         except Exception as error:
-            logging.exception(error)
+            log_error(logger, error, phase=TaskPhaseEnm.Request)
             raise
@@ -0,0 +1,367 @@
+import time
+import heapq
+import asyncio
+import logging
+from typing import TYPE_CHECKING, Any, Dict, List, Union, Iterable, Iterator, Optional, AsyncIterator
+
+import aiohttp
+import requests
+
+from .log import log_error
+from .enum import TaskPhaseEnm, ResponseStatusEnm
+from .serializer import CaptchaResponseSer
+from .aio_captcha_instrument import AIOCaptchaInstrument
+from .sio_captcha_instrument import SIOCaptchaInstrument
+
+if TYPE_CHECKING:
+    from .base import CaptchaParams
+
+
+__all__ = ("TaskHandle", "TaskPoller")
+
+logger = logging.getLogger(__name__)
+
+
+class TaskHandle:
+    """
+    Handle of the created captcha task, the task result can be received later or in another process.
+
+    Handle is returned by the ``CaptchaParams.create_task_handle`` and ``CaptchaParams.aio_create_task_handle``
+    methods or restored from the task ID with ``TaskHandle.from_task_id``.
+
+    Args:
+        captcha_params: Captcha solving class instance used for the task creation
+        task_id: Created task ID
+        created_at: Task creation UNIX time, ``None`` if it is unknown
+        response: The last received server response for the task
+        endpoint: API address which created the task, results are requested from it first
+
+    Examples:
+        >>> from python3_capsolver.image_to_text import ImageToText
+        >>> solver = ImageToText(api_key="CAI-12345....")
+        >>> handles = [solver.create_task_handle(task_payload={"body": body}) for body in bodies]
+        >>> [handle.result() for handle in handles]
+        [{'errorId': 0, 'taskId': 'db0a3153-xxxx', 'status': 'ready', 'solution': {...}}, ...]
+
+        >>> from python3_capsolver.image_to_text import ImageToText
+        >>> from python3_capsolver.core.task_handle import TaskHandle
+        >>> task_id = ImageToText(api_key="CAI-12345....").create_task_handle(task_payload={"body": body}).task_id
+        >>> # in another process
+        >>> TaskHandle.from_task_id(ImageToText(api_key="CAI-12345...."), task_id=task_id).result()
+        {'errorId': 0, 'taskId': 'db0a3153-xxxx', 'status': 'ready', 'solution': {...}}
+    """
+
+    __slots__ = ("captcha_params", "task_id", "created_at", "response", "endpoint")
+
+    def __init__(
+        self,
+        captcha_params: "CaptchaParams",
+        task_id: Optional[str],
+        created_at: Optional[float] = None,
+        response: Optional[CaptchaResponseSer] = None,
+        endpoint: Optional[str] = None,
+    ):
+        self.captcha_params = captcha_params
+        self.task_id = task_id
+        self.created_at = created_at
+        self.response = response or CaptchaResponseSer(taskId=task_id, status=ResponseStatusEnm.Idle)
+        self.endpoint = endpoint
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} task_id={self.task_id!r} status={self.status!r}>"
+
+    @classmethod
+    def from_task_id(
+        cls, captcha_params: "CaptchaParams", task_id: str, endpoint: Optional[str] = None
+    ) -> "TaskHandle":
+        """
+        Method restore handle from the saved task ID, e.g. after the process restart
+        """
+        return cls(captcha_params=captcha_params, task_id=task_id, endpoint=endpoint)
+
+    @classmethod
+    def create(cls, captcha_params: "CaptchaParams", task_params: Optional[dict] = None) -> "TaskHandle":
+        """
+        Method send SYNC ``createTask`` request with the current captcha params and return the task handle
+        """
+        instrument = SIOCaptchaInstrument(captcha_params=captcha_params, task_params=task_params)
+        instrument._check_balance(captcha_params.balance_monitor)
+        instrument._start_deadline(instrument.timeout)
+        created_task_data = instrument.create_task()
+        return cls._from_created(
+            captcha_params=captcha_params, created_task_data=created_task_data, endpoint=instrument.endpoint
+        )
+
+    @classmethod
+    async def aio_create(
+        cls,
+        captcha_params: "CaptchaParams",
+        task_params: Optional[dict] = None,
+        session: Optional[aiohttp.ClientSession] = None,
+    ) -> "TaskHandle":
+        """
+        Method send ASYNC ``createTask`` request with the current captcha params and return the task handle.
+        If ``session`` is not passed - captcha params session of the running event loop is used
+        """
+        instrument = AIOCaptchaInstrument(captcha_params=captcha_params, task_params=task_params)
+        instrument._check_balance(captcha_params.balance_monitor)
+        instrument._start_deadline(instrument.timeout)
+        created_task_data = await instrument.create_task(session=session)
+        return cls._from_created(
+            captcha_params=captcha_params, created_task_data=created_task_data, endpoint=instrument.endpoint
+        )
+
+    @classmethod
+    def _from_created(
+        cls, captcha_params: "CaptchaParams", created_task_data: CaptchaResponseSer, endpoint: Optional[str]
+    ) -> "TaskHandle":
+        if created_task_data.errorId != 0:
+            created_task_data.status = ResponseStatusEnm.Failed
+        # some tasks are solved at once, they are not polled
+        SIOCaptchaInstrument._balance_solved(captcha_params.balance_monitor, created_task_data)
+        return cls(
+            captcha_params=captcha_params,
+            task_id=created_task_data.taskId,
+            created_at=time.time(),
+            response=created_task_data,
+            endpoint=endpoint,
+        )
+
+    def _log_error(self, error: BaseException) -> None:
+        """
+        Method log the task result request error, check ``log_error`` docstring
+        """
+        duration = None if self.created_at is None else time.time() - self.created_at
+        log_error(logger, error, phase=TaskPhaseEnm.Poll, task_id=self.task_id, duration=duration)
+
+    @property
+    def status(self) -> Union[ResponseStatusEnm, str]:
+        """
+        The last known task status
+        """
+        return self.response.status
+
+    def done(self) -> bool:
+        """
+        Method check the last known task status without the server request
+
+        Returns:
+            ``True`` if the task is ready or failed
+        """
+        return self.status in (ResponseStatusEnm.Ready, ResponseStatusEnm.Failed)
+
+    def initial_wait(self) -> float:
+        """
+        Method return seconds left before the first result request makes sense
+        """
+        if self.created_at is None:
+            return 0
+        return max(self.created_at + self.captcha_params.sleep_time - time.time(), 0)
+
+    def _update(self, result: CaptchaResponseSer) -> Dict[str, Any]:
+        # client side deadline does not change the task state
+        if result.errorCode != SIOCaptchaInstrument.CAPTCHA_TIMEOUT:
+            self.response = result
+            if self.done() and self.captcha_params.journal is not None and self.task_id is not None:
+                self.captcha_params.journal.record_done(task_id=self.task_id)
+            # the handle is not polled after the task is done, so the solved task is counted once
+            SIOCaptchaInstrument._balance_solved(self.captcha_params.balance_monitor, result)
+        return result.to_dict()
+
+    def poll(self, session: Optional[requests.Session] = None) -> Dict[str, Any]:
+        """
+        Method send single SYNC ``getTaskResult`` request and update the task status.
+        If ``session`` is not passed - captcha params session of the current thread is used
+
+        Returns:
+            Dict with full server response
+        """
+        if self.done():
+            return self.response.to_dict()
+        instrument = SIOCaptchaInstrument(captcha_params=self.captcha_params)
+        instrument.task_id = self.task_id
+        instrument.endpoint = self.endpoint
+        return self._update(instrument.fetch_result(session=session))
+
+    async def aio_poll(self, session: Optional[aiohttp.ClientSession] = None) -> Dict[str, Any]:
+        """
+        Method send single ASYNC ``getTaskResult`` request and update the task status.
+        If ``session`` is not passed - captcha params session of the running event loop is used
+
+        Returns:
+            Dict with full server response
+        """
+        if self.done():
+            return self.response.to_dict()
+        instrument = AIOCaptchaInstrument(captcha_params=self.captcha_params)
+        instrument.task_id = self.task_id
+        instrument.endpoint = self.endpoint
+        session = session or self.captcha_params.aio_sessions.get()
+        return self._update(await instrument.fetch_result(session=session))
+
+    def result(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Synchronous method wait for the task result
+
+        Args:
+            timeout: Waiting deadline in seconds, captcha params ``timeout`` is used if not set
+
+        Returns:
+            Dict with full server response.
+            If the deadline is reached before the captcha is solved - ``errorCode`` is ``ERROR_CLIENT_TIMEOUT``
+        """
+        if self.done():
+            return self.response.to_dict()
+        instrument = SIOCaptchaInstrument(captcha_params=self.captcha_params, timeout=timeout)
+        instrument._start_deadline(instrument.timeout)
+        instrument.task_id = self.task_id
+        instrument.endpoint = self.endpoint
+        return self._update(instrument.get_result(initial_wait=self.initial_wait()))
+
+    async def aio_result(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Asynchronous method wait for the task result
+
+        Args:
+            timeout: Waiting deadline in seconds, captcha params ``timeout`` is used if not set
+
+        Returns:
+            Dict with full server response.
+            If the deadline is reached before the captcha is solved - ``errorCode`` is ``ERROR_CLIENT_TIMEOUT``
+        """
+        if self.done():
+            return self.response.to_dict()
+        instrument = AIOCaptchaInstrument(captcha_params=self.captcha_params, timeout=timeout)
+        instrument._start_deadline(instrument.timeout)
+        instrument.task_id = self.task_id
+        instrument.endpoint = self.endpoint
+        return self._update(await instrument.get_result(initial_wait=self.initial_wait()))
+
+
+class TaskPoller:
+    """
+    Central poller for the many created tasks.
+
+    All tasks are polled from one place over the pooled sessions of their captcha params,
+    each task is polled not more often than it captcha params ``sleep_time``.
+
+    Args:
+        concurrency: Max number of the simultaneous ASYNC ``getTaskResult`` requests
+
+    Examples:
+        >>> import asyncio
+        >>> from python3_capsolver.image_to_text import ImageToText
+        >>> from python3_capsolver.core.task_handle import TaskPoller
+        >>> async def main():
+        ...     solver = ImageToText(api_key="CAI-12345....")
+        ...     handles = await asyncio.gather(
+        ...         *[solver.aio_create_task_handle(task_payload={"body": body}) for body in bodies]
+        ...     )
+        ...     async for handle in TaskPoller().aio_as_completed(handles, timeout=180):
+        ...         print(handle.task_id, handle.response.solution)
+        >>> asyncio.run(main())
+    """
+
+    def __init__(self, concurrency: int = 50):
+        self.concurrency = concurrency
+
+    @staticmethod
+    def _schedule(handles: Iterable[TaskHandle]) -> List[tuple]:
+        """
+        Method prepare polling queue ordered by the next poll time
+        """
+        now = time.monotonic()
+        queue = [(now + handle.initial_wait(), index, handle) for index, handle in enumerate(handles)]
+        heapq.heapify(queue)
+        return queue
+
+    @staticmethod
+    def _pop_due(queue: List[tuple], limit: int) -> List[TaskHandle]:
+        now = time.monotonic()
+        due = []
+        while queue and queue[0][0] <= now and len(due) < limit:
+            due.append(heapq.heappop(queue))
+        return due
+
+    @staticmethod
+    def _sleep_time(queue: List[tuple], deadline: Optional[float]) -> float:
+        sleep_time = max(queue[0][0] - time.monotonic(), 0)
+        if deadline is not None:
+            sleep_time = min(sleep_time, max(deadline - time.monotonic(), 0))
+        return sleep_time
+
+    def as_completed(self, handles: Iterable[TaskHandle], timeout: Optional[float] = None) -> Iterator[TaskHandle]:
+        """
+        Synchronous method poll the tasks and yield handles as soon as the tasks are done
+
+        Args:
+            handles: Handles of the created tasks
+            timeout: Max waiting time in seconds, ``TimeoutError`` is raised if it is reached
+
+        Returns:
+            Iterator over the done handles, in the completion order
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        queue = self._schedule(handles)
+        while queue:
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError(f"{len(queue)} tasks are not done before the deadline")
+            for next_poll, index, handle in self._pop_due(queue, limit=len(queue)):
+                try:
+                    handle.poll()
+                except Exception as error:
+                    handle._log_error(error)
+                if handle.done():
+                    yield handle
+                else:
+                    heapq.heappush(queue, (time.monotonic() + handle.captcha_params.sleep_time, index, handle))
+            if queue:
+                time.sleep(self._sleep_time(queue, deadline))
+
+    async def aio_as_completed(
+        self, handles: Iterable[TaskHandle], timeout: Optional[float] = None
+    ) -> AsyncIterator[TaskHandle]:
+        """
+        Asynchronous method poll the tasks and yield handles as soon as the tasks are done
+
+        Args:
+            handles: Handles of the created tasks
+            timeout: Max waiting time in seconds, ``asyncio.TimeoutError`` is raised if it is reached
+
+        Returns:
+            Async iterator over the done handles, in the completion order
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        queue = self._schedule(handles)
+        while queue:
+            if deadline is not None and time.monotonic() >= deadline:
+                raise asyncio.TimeoutError(f"{len(queue)} tasks are not done before the deadline")
+            due = self._pop_due(queue, limit=self.concurrency)
+            results = await asyncio.gather(*[handle.aio_poll() for _, _, handle in due], return_exceptions=True)
+            for (next_poll, index, handle), result in zip(due, results):
+                if isinstance(result, Exception):
+                    handle._log_error(result)
+                if handle.done():
+                    yield handle
+                else:
+                    heapq.heappush(queue, (time.monotonic() + handle.captcha_params.sleep_time, index, handle))
+            if queue:
+                await asyncio.sleep(self._sleep_time(queue, deadline))
+
+    def wait(self, handles: Iterable[TaskHandle], timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Synchronous method wait for all the tasks and return results in the handles order
+        """
+        handles = list(handles)
+        for _ in self.as_completed(handles, timeout=timeout):
+            pass
+        return [handle.response.to_dict() for handle in handles]
+
+    async def aio_wait(self, handles: Iterable[TaskHandle], timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Asynchronous method wait for all the tasks and return results in the handles order
+        """
+        handles = list(handles)
+        async for _ in self.aio_as_completed(handles, timeout=timeout):
+            pass
+        return [handle.response.to_dict() for handle in handles]
@@ -18,6 +18,7 @@ class FriendlyCaptcha(CaptchaParams):
                      - sleep_time: int - captcha solution waintig time in sec
                      - request_url: str - API address for sending requests,
                                             else official will be used
+                     - timeout: float - total captcha solving deadline in sec
 
     Examples:
         >>> from python3_capsolver.core.enum import CaptchaTypeEnm
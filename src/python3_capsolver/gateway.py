@@ -0,0 +1,437 @@
+import os
+import sys
+import time
+import heapq
+import asyncio
+import argparse
+import itertools
+from typing import Any, Dict, List, Tuple, Union, Optional, Sequence
+
+import aiohttp
+from aiohttp import web
+
+from .core.base import CaptchaParams
+from .core.enum import CaptchaTypeEnm, ResponseStatusEnm
+from .core.const import REQUEST_URL, GATEWAY_HOST, GATEWAY_PORT, SOLVE_TIMEOUT, CONNECT_TIMEOUT
+from .core.sessions import LoopSessions, ThreadLocalSessions
+from .core.event_loop import new_event_loop
+from .core.exceptions import HTTPStatusError
+from .core.serializer import CaptchaResponseSer
+from .core.concurrency import AdaptiveConcurrencyLimiter
+from .core.task_handle import TaskHandle
+from .core.context_instr import AIOContextManager, SIOContextManager
+from .core.captcha_instrument import CaptchaInstrumentBase
+
+__all__ = ("SolverGateway", "GatewayClient", "main")
+
+
+class SolverGateway:
+    """
+    Local HTTP gateway which solves captchas for many processes over one pooled client.
+
+    Every ``POST /solve`` request is multiplexed onto the shared ``aiohttp`` session,
+    the in-flight solvings of all the callers are limited by one ``AdaptiveConcurrencyLimiter``
+    and all the created tasks are polled by one central poller.
+    Retry policy, circuit breaker, endpoints latency stats and other captcha params state are shared as well,
+    so the throughput of the whole node is controlled in one place.
+
+    HTTP API:
+        ``POST /solve`` - body ``{"task": {...}, "timeout": 120}``, ``timeout`` is optional.
+        Response is the full server response, like ``captcha_handler`` returns.
+
+        ``GET /stats`` - gateway counters and the current concurrency limit.
+
+    Args:
+        api_key: Capsolver API key
+        request_url: API address or list of the addresses, check ``CaptchaParams`` docstring
+        sleep_time: The waiting time between requests to get the result of the Captcha
+        timeout: Default solving deadline in seconds for the single solve request
+        poll_concurrency: Max number of the simultaneous ``getTaskResult`` requests
+        connection_limit: Max number of the open connections of the shared session
+        kwargs: Additional not required params for the ``CaptchaParams``, like ``retry_policy``.
+                If ``concurrency_limiter`` is not passed or ``None`` - the default one is used
+
+    Examples:
+        >>> from python3_capsolver.gateway import SolverGateway
+        >>> SolverGateway(api_key="CAI-12345....").run(port=8765)
+
+        .. code-block:: bash
+
+            $ python -m python3_capsolver.gateway --api-key CAI-12345.... --port 8765
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        request_url: Union[str, Sequence[str]] = REQUEST_URL,
+        sleep_time: float = 5,
+        timeout: Optional[float] = SOLVE_TIMEOUT,
+        poll_concurrency: int = 50,
+        connection_limit: int = 100,
+        **kwargs,
+    ):
+        # the gateway limits the solvings of all the callers, so the limiter is always set
+        kwargs["concurrency_limiter"] = kwargs.get("concurrency_limiter") or AdaptiveConcurrencyLimiter()
+        # task type is set by every solve request, so the params are created with the neutral type
+        self.captcha_params = CaptchaParams(
+            api_key=api_key,
+            captcha_type=CaptchaTypeEnm.Control,
+            sleep_time=sleep_time,
+            request_url=request_url,
+            timeout=timeout,
+            **kwargs,
+        )
+        self.poll_concurrency = poll_concurrency
+        self.connection_limit = connection_limit
+        self.solved = 0
+        self.failed = 0
+        self._instrument = CaptchaInstrumentBase()
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._poller: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        # polling queue ordered by the next poll time
+        self._polling: List[Tuple[float, int, TaskHandle, asyncio.Future]] = []
+        self._order = itertools.count()
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """
+        Gateway counters and the current concurrency limit
+        """
+        limiter = self.captcha_params.concurrency_limiter
+        return {
+            "solved": self.solved,
+            "failed": self.failed,
+            "in_flight": limiter.in_flight,
+            "limit": limiter.limit,
+            "polling": len(self._polling),
+        }
+
+    async def start(self) -> None:
+        """
+        Method open the shared session and start the central poller
+        """
+        if self._session is not None:
+            return
+        self._session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.connection_limit))
+        self._wakeup = asyncio.Event()
+        self._poller = asyncio.create_task(self._poll_loop())
+
+    async def close(self) -> None:
+        """
+        Method stop the central poller and close the shared session, waiting solve requests are cancelled
+        """
+        if self._session is None:
+            return
+        self._poller.cancel()
+        try:
+            await self._poller
+        except asyncio.CancelledError:
+            pass
+        for _, _, _, future in self._polling:
+            future.cancel()
+        self._polling.clear()
+        await self._session.close()
+        self._session = None
+
+    async def solve(self, task_params: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Method solve the task over the shared session, the task result is waited from the central poller
+
+        Args:
+            task_params: Full ``task`` payload, including the ``type`` key
+            timeout: Solving deadline in seconds, gateway ``timeout`` is used if not set
+
+        Returns:
+            Dict with full server response.
+            If the deadline is reached before the captcha is solved - ``errorCode`` is ``ERROR_CLIENT_TIMEOUT``
+        """
+        if self._session is None:
+            raise RuntimeError("Gateway is not started")
+        timeout = self.captcha_params.timeout if timeout is None else timeout
+        deadline = None if timeout is None else time.monotonic() + timeout
+        self._instrument._check_balance(self.captcha_params.balance_monitor)
+        limiter = self.captcha_params.concurrency_limiter
+        try:
+            acquired_at = await asyncio.wait_for(limiter.acquire(), timeout=self._time_left(deadline))
+        except asyncio.TimeoutError:
+            return self._finish(self._instrument._timeout_result())
+
+        handle, result, load_signal = None, None, False
+        try:
+            handle = await TaskHandle.aio_create(self.captcha_params, task_params=task_params, session=self._session)
+            if not handle.done():
+                await asyncio.wait_for(self._wait(handle), timeout=self._time_left(deadline))
+            result = handle.response
+        except asyncio.TimeoutError:
+            result = self._instrument._timeout_result(task_id=handle.task_id if handle is not None else None)
+        except asyncio.CancelledError:
+            # the client is disconnected, it does not tell anything about the API load
+            load_signal = None
+            self.failed += 1
+            if handle is not None:
+                self._report_abandoned(handle.task_id)
+            raise
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            if result is not None:
+                load_signal = self._instrument._load_signal(result)
+            limiter.release(acquired_at, success=load_signal)
+        return self._finish(result)
+
+    def _report_abandoned(self, task_id: Optional[str]) -> None:
+        """
+        Method pass ID of the created task to the ``on_task_abandoned`` hook, if the solve request is cancelled
+        """
+        instrument = CaptchaInstrumentBase()
+        instrument.task_id = task_id
+        instrument._report_abandoned(self.captcha_params.on_task_abandoned)
+
+    @staticmethod
+    def _time_left(deadline: Optional[float]) -> Optional[float]:
+        return None if deadline is None else max(deadline - time.monotonic(), 0)
+
+    def _finish(self, result: CaptchaResponseSer) -> Dict[str, Any]:
+        if result.errorId == 0 and result.status == ResponseStatusEnm.Ready:
+            self.solved += 1
+        else:
+            self.failed += 1
+        return result.to_dict()
+
+    async def _wait(self, handle: TaskHandle) -> None:
+        """
+        Method pass the task to the central poller and wait until it is done
+        """
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._polling, (time.monotonic() + handle.initial_wait(), next(self._order), handle, future))
+        self._wakeup.set()
+        await future
+
+    async def _poll_loop(self) -> None:
+        """
+        Central poller, due tasks of all the callers are polled together over the shared session
+        """
+        while True:
+            now = time.monotonic()
+            due = []
+            while self._polling and self._polling[0][0] <= now and len(due) < self.poll_concurrency:
+                item = heapq.heappop(self._polling)
+                # the caller is gone, e.g. after the deadline
+                if not item[3].done():
+                    due.append(item)
+            if due:
+                results = await asyncio.gather(
+                    *[handle.aio_poll(session=self._session) for _, _, handle, _ in due], return_exceptions=True
+                )
+                for (_, order, handle, future), result in zip(due, results):
+                    if isinstance(result, Exception):
+                        handle._log_error(result)
+                    if future.done():
+                        continue
+                    if handle.done():
+                        future.set_result(None)
+                    else:
+                        next_poll = time.monotonic() + handle.captcha_params.sleep_time
+                        heapq.heappush(self._polling, (next_poll, order, handle, future))
+                continue
+            self._wakeup.clear()
+            sleep_time = self._polling[0][0] - now if self._polling else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=sleep_time)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _handle_solve(self, request: web.Request) -> web.Response:
+        try:
+            body = await request.json()
+            task_params, timeout = body["task"], body.get("timeout")
+            if not isinstance(task_params, dict):
+                raise TypeError("`task` must be JSON object")
+        except (ValueError, KeyError, TypeError, AttributeError) as error:
+            return web.json_response({"error": f"Invalid solve request: {error!r}"}, status=400)
+        try:
+            return web.json_response(await self.solve(task_params, timeout=timeout))
+        except Exception as error:
+            return web.json_response({"error": f"{type(error).__name__}: {error}"}, status=502)
+
+    async def _handle_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self.stats)
+
+    async def _on_startup(self, app: web.Application) -> None:
+        await self.start()
+
+    async def _on_cleanup(self, app: web.Application) -> None:
+        await self.close()
+
+    def make_app(self) -> web.Application:
+        """
+        Method create ``aiohttp`` application, it can be served by any ``aiohttp`` runner
+        """
+        app = web.Application()
+        app.router.add_post("/solve", self._handle_solve)
+        app.router.add_get("/stats", self._handle_stats)
+        app.on_startup.append(self._on_startup)
+        app.on_cleanup.append(self._on_cleanup)
+        return app
+
+    def run(self, host: str = GATEWAY_HOST, port: int = GATEWAY_PORT, use_uvloop: Optional[bool] = None) -> None:
+        """
+        Method serve the gateway until the process is interrupted
+
+        Args:
+            host: Listened address
+            port: Listened port
+            use_uvloop: Serve on ``uvloop`` if it is installed, process-wide ``enable_uvloop`` setting is used if not set
+        """
+        web.run_app(self.make_app(), host=host, port=port, loop=new_event_loop(use_uvloop))
+
+
+class GatewayClient(SIOContextManager, AIOContextManager):
+    """
+    Thin client of the ``SolverGateway``, used instead of the captcha solving classes in the worker processes
+
+    Args:
+        gateway_url: Gateway address
+        captcha_type: Task type used if the payload has no ``type`` key
+        timeout: Solving deadline in seconds, gateway ``timeout`` is used if not set
+
+    Examples:
+        >>> from python3_capsolver.gateway import GatewayClient
+        >>> from python3_capsolver.core.enum import CaptchaTypeEnm
+        >>> with GatewayClient(captcha_type=CaptchaTypeEnm.ImageToTextTask) as client:
+        ...     client.captcha_handler(task_payload={"body": "/9j/4AAQSkZJRgABAQAAAQABAAD/2wCEAAoHCBUVxxxxx"})
+        {
+           "errorId":0,
+           "errorCode":"None",
+           "errorDescription":"None",
+           "taskId":"db0a3153-621d-4f5e-8554-a1c032597ee7",
+           "status":"ready",
+           "solution":{
+              "confidence":0.9585,
+              "text":"gcphjd"
+           }
+        }
+    """
+
+    def __init__(
+        self,
+        gateway_url: str = f"http://{GATEWAY_HOST}:{GATEWAY_PORT}",
+        captcha_type: Optional[CaptchaTypeEnm] = None,
+        timeout: Optional[float] = None,
+    ):
+        self.gateway_url = gateway_url.rstrip("/")
+        self.captcha_type = captcha_type
+        self.timeout = timeout
+        # SYNC sessions, one per thread
+        self.sessions = ThreadLocalSessions()
+        # ASYNC sessions, one per event loop
+        self.aio_sessions = LoopSessions()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return super().__exit__(exc_type, exc_value, traceback)
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.aio_close()
+        return await super().__aexit__(exc_type, exc_value, traceback)
+
+    def close(self) -> None:
+        """
+        Method close SYNC sessions of all the threads and ASYNC sessions of all the event loops
+        """
+        self.sessions.close()
+        self.aio_sessions.close()
+
+    async def aio_close(self) -> None:
+        """
+        Method close ASYNC session of the running event loop
+        """
+        await self.aio_sessions.aio_close()
+
+    def _solve_request(self, task_payload: Dict, timeout: Optional[float]) -> Tuple[Dict[str, Any], float]:
+        """
+        Method prepare solve request body and the response waiting time
+        """
+        task = {"type": self.captcha_type.value, **task_payload} if self.captcha_type else dict(task_payload)
+        timeout = self.timeout if timeout is None else timeout
+        body = {"task": task} if timeout is None else {"task": task, "timeout": timeout}
+        # the gateway answers after the solving, so the response is waited a bit longer
+        return body, (SOLVE_TIMEOUT if timeout is None else timeout) + CONNECT_TIMEOUT
+
+    def captcha_handler(self, task_payload: Dict, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Synchronous method for captcha solving over the gateway
+
+        Args:
+            task_payload: ``task`` payload, like ``captcha_handler`` of the captcha solving classes accepts
+            timeout: Solving deadline in seconds for this call
+
+        Returns:
+            Dict with full server response
+        """
+        body, read_timeout = self._solve_request(task_payload, timeout)
+        response = self.sessions.get().post(
+            f"{self.gateway_url}/solve", json=body, timeout=(CONNECT_TIMEOUT, read_timeout)
+        )
+        if response.status_code != 200:
+            raise HTTPStatusError(status=response.status_code, reason=response.text)
+        return response.json()
+
+    async def aio_captcha_handler(self, task_payload: Dict, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Asynchronous method for captcha solving over the gateway
+
+        Args:
+            task_payload: ``task`` payload, like ``captcha_handler`` of the captcha solving classes accepts
+            timeout: Solving deadline in seconds for this call
+
+        Returns:
+            Dict with full server response
+        """
+        body, read_timeout = self._solve_request(task_payload, timeout)
+        client_timeout = aiohttp.ClientTimeout(connect=CONNECT_TIMEOUT, sock_read=read_timeout)
+        session = self.aio_sessions.get()
+        async with session.post(f"{self.gateway_url}/solve", json=body, timeout=client_timeout) as response:
+            if response.status != 200:
+                raise HTTPStatusError(status=response.status, reason=await response.text())
+            return await response.json()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Gateway command line entry point
+
+    Examples:
+        .. code-block:: bash
+
+            $ export API_KEY="CAI-12345...."
+            $ python -m python3_capsolver.gateway --host 127.0.0.1 --port 8765
+    """
+    parser = argparse.ArgumentParser(prog="python -m python3_capsolver.gateway", description="Local solver gateway")
+    parser.add_argument("--host", default=GATEWAY_HOST, help="Listened address")
+    parser.add_argument("--port", type=int, default=GATEWAY_PORT, help="Listened port")
+    parser.add_argument(
+        "-k", "--api-key", default=os.getenv("API_KEY"), help="Capsolver API key, API_KEY env variable by default"
+    )
+    parser.add_argument(
+        "--request-url", action="append", help="API address, can be repeated for several regional gateways"
+    )
+    parser.add_argument("--sleep-time", type=float, default=5, help="Seconds between the task result requests")
+    parser.add_argument("--timeout", type=float, default=SOLVE_TIMEOUT, help="Default solving deadline in seconds")
+    parser.add_argument("--uvloop", action="store_true", help="Serve on uvloop if it is installed")
+    args = parser.parse_args(argv)
+    if not args.api_key:
+        parser.error("API key is not set, pass --api-key or set API_KEY env variable")
+    SolverGateway(
+        api_key=args.api_key,
+        request_url=args.request_url or REQUEST_URL,
+        sleep_time=args.sleep_time,
+        timeout=args.timeout,
+    ).run(host=args.host, port=args.port, use_uvloop=args.uvloop or None)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -18,6 +18,7 @@ class ImageToText(CaptchaParams):
                      - sleep_time: int - captcha solution waintig time in sec
                      - request_url: str - API address for sending requests,
                                             else official will be used
+                     - timeout: float - total captcha solving deadline in sec
 
     Examples:
         >>> from python3_capsolver.image_to_text import ImageToText
@@ -78,8 +79,29 @@ class ImageToText(CaptchaParams):
            }
         }
 
+        >>> from python3_capsolver.image_to_text import ImageToText
+        >>> with open("captcha_example.jpeg", "rb") as file:
+        ...     image = bytearray(file.read())
+        >>> ImageToText(api_key="CAI-12345....").captcha_handler(
+        ...                     task_payload={"body": memoryview(image), "module": "common"}
+        ...                     )
+        {
+           "errorId":0,
+           "errorCode":"None",
+           "errorDescription":"None",
+           "taskId":"db0a3153-621d-4f5e-8554-a1c032597ee7",
+           "status":"ready",
+           "solution":{
+              "confidence":0.9585,
+              "text":"gcphjd"
+           }
+        }
+
     Notes:
         https://docs.capsolver.com/guide/recognition/ImageToTextTask.html
+
+        Image ``body`` can be passed as the raw ``bytes``, ``bytearray``, ``memoryview`` or ``mmap.mmap``,
+        it is encoded to base64 right into the request body, without the intermediate copies.
     """
 
     def __init__(
@@ -1,11 +1,19 @@
 import os
+import gzip
+import json
 import time
+import uuid
 import base64
 import random
 import string
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 
 import pytest
 
+from python3_capsolver.image_to_text import ImageToText
+from python3_capsolver.core.circuit_breaker import CircuitBreaker
+
 
 @pytest.fixture(scope="function")
 def delay_func():
@@ -17,6 +25,167 @@ def delay_class():
     time.sleep(2)
 
 
+@pytest.fixture(scope="function", autouse=True)
+def shared_circuit_breakers():
+    """
+    Process-wide circuit breakers state is not moved between the tests
+    """
+    yield
+    with CircuitBreaker._shared_lock:
+        CircuitBreaker._shared.clear()
+
+
+class StubHTTPServer(ThreadingHTTPServer):
+    # concurrent clients must not wait for the connection retransmission after the listen queue overflow
+    request_queue_size = 128
+
+
+class StubCapsolverAPI:
+    """
+    Local stand-in for the Capsolver API, served from a background thread.
+
+    Tasks become ``ready`` after ``polls_to_ready`` ``getTaskResult`` requests
+    (values from ``polls_to_ready_queue`` are used first, one per created task),
+    every response is sent after ``response_delay`` seconds.
+    Next requests are failed with values from ``failures`` - HTTP status codes or API error codes.
+    Gzip request bodies are decompressed, their ``Content-Encoding`` is saved in ``encodings``,
+    or they are answered with ``gzip_rejection_status`` if it is set.
+    ``getBalance`` requests are answered with ``balance``, GET requests are answered with ``file_content``.
+    """
+
+    def __init__(self):
+        self.polls_to_ready = 1
+        self.polls_to_ready_queue = []
+        self.response_delay = 0.0
+        self.failures = []
+        self.file_content = b"stub-file"
+        self.solution = {"text": "stub"}
+        self.balance = 10.0
+        self.requests = []
+        self.encodings = []
+        self.gzip_rejection_status = None
+        self.tasks = {}
+        self._lock = threading.Lock()
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                encoding = self.headers.get("Content-Encoding")
+                stub.encodings.append(encoding)
+                if encoding == "gzip" and stub.gzip_rejection_status is not None:
+                    status, response = stub.gzip_rejection_status, {"errorId": 1, "errorCode": "ERROR_INVALID_JSON"}
+                else:
+                    body = gzip.decompress(body) if encoding == "gzip" else body
+                    status, response = stub.handle(self.path.strip("/"), json.loads(body or b"{}"))
+                time.sleep(stub.response_delay)
+                data = json.dumps(response).encode()
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            def do_GET(self):
+                status, data = stub.handle_get(self.path)
+                self.send_response(status)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.server = StubHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def handle(self, endpoint: str, payload: dict):
+        with self._lock:
+            self.requests.append((endpoint, payload))
+            if self.failures:
+                failure = self.failures.pop(0)
+                if isinstance(failure, int):
+                    return failure, {"errorId": 1, "errorCode": "ERROR_STUB_STATUS"}
+                return 200, {"errorId": 1, "errorCode": failure, "errorDescription": "Stub error"}
+            if endpoint == "createTask":
+                task_id = str(uuid.uuid4())
+                threshold = self.polls_to_ready_queue.pop(0) if self.polls_to_ready_queue else self.polls_to_ready
+                self.tasks[task_id] = [0, threshold]
+                return 200, {"errorId": 0, "taskId": task_id, "status": "idle"}
+            elif endpoint == "getTaskResult":
+                task_id = payload.get("taskId")
+                if task_id not in self.tasks:
+                    return 200, {
+                        "errorId": 1,
+                        "errorCode": "ERROR_TASKID_INVALID",
+                        "errorDescription": "Task ID does not exist or is invalid",
+                    }
+                self.tasks[task_id][0] += 1
+                if self.tasks[task_id][0] >= self.tasks[task_id][1]:
+                    return 200, {"errorId": 0, "taskId": task_id, "status": "ready", "solution": self.solution}
+                return 200, {"errorId": 0, "taskId": task_id, "status": "processing"}
+            elif endpoint == "getBalance":
+                return 200, {"errorId": 0, "balance": self.balance, "packages": []}
+            elif endpoint == "feedbackTask":
+                return 200, {"errorId": 0, "message": "okay"}
+            return 404, {"errorId": 1, "errorCode": "ERROR_NOT_FOUND"}
+
+    def handle_get(self, path: str):
+        with self._lock:
+            self.requests.append((path, None))
+            if self.failures:
+                return self.failures.pop(0), b""
+            return 200, self.file_content
+
+    def endpoint_calls(self, endpoint: str) -> int:
+        with self._lock:
+            return len([r for r in self.requests if r[0] == endpoint])
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture(scope="function")
+def stub_api():
+    api = StubCapsolverAPI()
+    api.start()
+    yield api
+    api.stop()
+
+
+@pytest.fixture(scope="function")
+def stub_solver(request):
+    """
+    Factory of the captcha solving instances sending requests to the local API stub.
+    Test class ``solver_params`` are used as the defaults, e.g. ``captcha_class`` or ``sleep_time``
+    """
+
+    def create(**kwargs):
+        params = {
+            "captcha_class": ImageToText,
+            "sleep_time": 0.1,
+            **getattr(request.cls, "solver_params", {}),
+            **kwargs,
+        }
+        if "request_url" not in params:
+            # the stub is started only if the instance is not sent to another address
+            params["request_url"] = request.getfixturevalue("stub_api").url
+        captcha_class = params.pop("captcha_class")
+        return captcha_class(api_key=BaseTest.get_random_string(36), **params)
+
+    return create
+
+
 @pytest.mark.usefixtures("delay_func")
 @pytest.mark.usefixtures("delay_class")
 class BaseTest:
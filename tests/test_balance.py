@@ -0,0 +1,173 @@
+import time
+import pickle
+
+import pytest
+
+from tests.conftest import BaseTest
+from python3_capsolver.control import Control
+from python3_capsolver.core.enum import ResponseStatusEnm
+from python3_capsolver.core.balance import BalanceMonitor
+from python3_capsolver.core.exceptions import LowBalanceError, PermanentAPIError
+from python3_capsolver.core.task_handle import TaskPoller
+
+
+class TestBalanceMonitor(BaseTest):
+    solver_params = {"sleep_time": 0.05}
+
+    def get_monitor(self, stub_api, **kwargs) -> BalanceMonitor:
+        return BalanceMonitor(Control(api_key=self.get_random_string(36), request_url=stub_api.url), **kwargs)
+
+    def test_cached(self, stub_api):
+        monitor = self.get_monitor(stub_api)
+        assert monitor.balance is None
+        assert monitor.get_balance() == 10.0
+        stub_api.balance = 5.0
+        assert monitor.get_balance() == 10.0
+        assert stub_api.endpoint_calls("getBalance") == 1
+
+    def test_expired(self, stub_api):
+        monitor = self.get_monitor(stub_api, ttl=0.1)
+        assert monitor.get_balance() == 10.0
+        stub_api.balance = 5.0
+        time.sleep(0.15)
+        assert monitor.get_balance() == 5.0
+        assert stub_api.endpoint_calls("getBalance") == 2
+
+    async def test_aio_cached(self, stub_api):
+        monitor = self.get_monitor(stub_api)
+        assert await monitor.aio_get_balance() == 10.0
+        assert await monitor.aio_get_balance() == 10.0
+        assert stub_api.endpoint_calls("getBalance") == 1
+
+    async def test_aio_refresh_session(self, stub_api):
+        monitor = self.get_monitor(stub_api)
+        async with monitor.control:
+            for _ in range(2):
+                assert await monitor.aio_refresh() == 10.0
+            # the refreshes reuse the control session of the event loop
+            assert len(monitor.control.aio_sessions) == 1
+        assert stub_api.endpoint_calls("getBalance") == 2
+
+    def test_background_refresh(self, stub_api):
+        monitor = self.get_monitor(stub_api, ttl=0.1)
+        monitor.start()
+        try:
+            time.sleep(0.35)
+            assert stub_api.endpoint_calls("getBalance") >= 3
+            assert monitor.balance == 10.0
+        finally:
+            monitor.close()
+        calls = stub_api.endpoint_calls("getBalance")
+        time.sleep(0.2)
+        assert stub_api.endpoint_calls("getBalance") == calls
+
+    def test_refresh_error(self, stub_api):
+        stub_api.failures = ["ERROR_KEY_DENIED_ACCESS"]
+        with pytest.raises(PermanentAPIError):
+            self.get_monitor(stub_api).refresh()
+
+    def test_solved_estimation(self, stub_api, stub_solver):
+        monitor = self.get_monitor(stub_api, task_cost=0.5)
+        monitor.refresh()
+        result = stub_solver(balance_monitor=monitor).captcha_handler(task_payload={"body": "image"})
+        assert result["status"] == ResponseStatusEnm.Ready.value
+        assert monitor.balance == 9.5
+        # fresh balance resets the estimation
+        monitor.refresh()
+        assert monitor.balance == 10.0
+
+    async def test_aio_solved_estimation(self, stub_api, stub_solver):
+        monitor = self.get_monitor(stub_api, task_cost=0.5)
+        await monitor.aio_refresh()
+        await stub_solver(balance_monitor=monitor).aio_captcha_handler(task_payload={"body": "image"})
+        assert monitor.balance == 9.5
+
+    def test_failed_not_estimated(self, stub_api, stub_solver):
+        monitor = self.get_monitor(stub_api, task_cost=0.5)
+        monitor.refresh()
+        stub_api.failures = ["ERROR_INVALID_TASK_DATA"]
+        stub_solver(balance_monitor=monitor).captcha_handler(task_payload={"body": "image"})
+        assert monitor.balance == 10.0
+
+    def test_low_balance_hook(self, stub_api):
+        alerts = []
+        monitor = self.get_monitor(stub_api, threshold=9.0, task_cost=0.6, on_low_balance=alerts.append)
+        monitor.refresh()
+        monitor.record_solved()
+        assert alerts == []
+        monitor.record_solved()
+        assert alerts == [pytest.approx(8.8)]
+        # the hook is called once until the balance is restored
+        monitor.record_solved()
+        assert len(alerts) == 1
+        monitor.refresh()
+        assert not monitor.is_low
+        monitor.record_solved(count=2)
+        assert len(alerts) == 2
+
+    def test_blocked(self, stub_api, stub_solver):
+        stub_api.balance = 0.5
+        monitor = self.get_monitor(stub_api, threshold=1.0, block_tasks=True)
+        monitor.refresh()
+        with pytest.raises(LowBalanceError):
+            stub_solver(balance_monitor=monitor).captcha_handler(task_payload={"body": "image"})
+        assert stub_api.endpoint_calls("createTask") == 0
+
+    async def test_aio_blocked(self, stub_api, stub_solver):
+        stub_api.balance = 0.5
+        monitor = self.get_monitor(stub_api, threshold=1.0, block_tasks=True)
+        await monitor.aio_refresh()
+        with pytest.raises(LowBalanceError):
+            await stub_solver(balance_monitor=monitor).aio_captcha_handler(task_payload={"body": "image"})
+
+    def test_handle_blocked(self, stub_api, stub_solver):
+        stub_api.balance = 0.5
+        monitor = self.get_monitor(stub_api, threshold=1.0, block_tasks=True)
+        monitor.refresh()
+        with pytest.raises(LowBalanceError):
+            stub_solver(balance_monitor=monitor).create_task_handle(task_payload={"body": "image"})
+        assert stub_api.endpoint_calls("createTask") == 0
+
+    async def test_aio_handle_blocked(self, stub_api, stub_solver):
+        stub_api.balance = 0.5
+        monitor = self.get_monitor(stub_api, threshold=1.0, block_tasks=True)
+        await monitor.aio_refresh()
+        with pytest.raises(LowBalanceError):
+            await stub_solver(balance_monitor=monitor).aio_create_task_handle(task_payload={"body": "image"})
+        assert stub_api.endpoint_calls("createTask") == 0
+
+    def test_handle_solved_estimation(self, stub_api, stub_solver):
+        monitor = self.get_monitor(stub_api, task_cost=0.5)
+        monitor.refresh()
+        handles = [
+            stub_solver(balance_monitor=monitor).create_task_handle(task_payload={"body": "image"}) for _ in range(2)
+        ]
+        assert [handle.result()["status"] for handle in handles] == [ResponseStatusEnm.Ready.value] * 2
+        # the done handle is not counted again
+        handles[0].poll()
+        assert monitor.balance == 9.0
+
+    async def test_aio_poller_solved_estimation(self, stub_api, stub_solver):
+        monitor = self.get_monitor(stub_api, task_cost=0.5)
+        await monitor.aio_refresh()
+        instance = stub_solver(balance_monitor=monitor)
+        handles = [await instance.aio_create_task_handle(task_payload={"body": "image"}) for _ in range(3)]
+        assert len([handle async for handle in TaskPoller().aio_as_completed(handles, timeout=10)]) == 3
+        assert monitor.balance == 8.5
+
+    def test_not_blocked(self, stub_api, stub_solver):
+        stub_api.balance = 0.5
+        monitor = self.get_monitor(stub_api, threshold=1.0)
+        monitor.refresh()
+        result = stub_solver(balance_monitor=monitor).captcha_handler(task_payload={"body": "image"})
+        assert result["status"] == ResponseStatusEnm.Ready.value
+
+    def test_pickle(self, stub_api):
+        monitor = self.get_monitor(stub_api, task_cost=0.5)
+        monitor.refresh()
+        monitor.record_solved()
+        assert pickle.loads(pickle.dumps(monitor)).balance == 9.5
+
+    def test_ttl_err(self, stub_api):
+        with pytest.raises(ValueError):
+            self.get_monitor(stub_api, ttl=0)
@@ -0,0 +1,119 @@
+import json
+import mmap
+import base64
+import threading
+
+import pytest
+
+from tests.conftest import BaseTest
+from python3_capsolver.core.enum import ResponseStatusEnm
+from python3_capsolver.core.process_pool import ProcessPoolPreprocessor
+from python3_capsolver.core.captcha_instrument import FileInstrument, CaptchaInstrumentBase
+
+IMAGE = bytes(range(256)) * 10 + b"tail"
+
+
+@pytest.fixture(scope="function", params=("bytes", "bytearray", "memoryview", "mmap"))
+def image(request, tmp_path):
+    if request.param == "mmap":
+        path = tmp_path / "image"
+        path.write_bytes(IMAGE)
+        with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
+    else:
+        yield {"bytes": bytes, "bytearray": bytearray, "memoryview": memoryview}[request.param](IMAGE)
+
+
+class TestEncodeBuffers(BaseTest):
+    def test_encode(self, image):
+        payload = {"clientKey": "key", "task": {"type": "ImageToTextTask", "body": image, "module": "common"}}
+        body = CaptchaInstrumentBase._encode_buffers(payload)
+        assert isinstance(body, bytearray)
+        assert json.loads(body) == {
+            "clientKey": "key",
+            "task": {"type": "ImageToTextTask", "body": base64.b64encode(IMAGE).decode("utf-8"), "module": "common"},
+        }
+
+    def test_no_buffers(self):
+        payload = {"clientKey": "key", "task": {"body": "aW1hZ2U="}}
+        assert CaptchaInstrumentBase._encode_buffers(payload) is payload
+
+    def test_views_released(self, tmp_path):
+        path = tmp_path / "image"
+        path.write_bytes(IMAGE)
+        with open(path, "r+b") as file:
+            mapped = mmap.mmap(file.fileno(), 0)
+            CaptchaInstrumentBase._encode_buffers({"task": {"body": mapped}})
+            # no exported views are left, so the map can be closed
+            mapped.close()
+
+    def test_file_processing(self, image):
+        assert FileInstrument().file_processing(captcha_base64=image) == base64.b64encode(IMAGE).decode("utf-8")
+
+    async def test_aio_file_processing(self, image):
+        result = await FileInstrument().aio_file_processing(captcha_base64=image)
+        assert result == base64.b64encode(IMAGE).decode("utf-8")
+
+    def test_pooled_buffer(self, image):
+        with ProcessPoolPreprocessor(max_workers=1, shared_memory_threshold=len(IMAGE)) as preprocessor:
+            assert preprocessor.is_large_buffer(image)
+            assert preprocessor.encode_image(image) == base64.b64encode(IMAGE).decode("utf-8")
+
+
+class TestBufferSolving(BaseTest):
+    solver_params = {"sleep_time": 0.05}
+
+    def test_captcha_handler(self, stub_api, image, stub_solver):
+        result = stub_solver().captcha_handler(task_payload={"body": image})
+        assert result["status"] == ResponseStatusEnm.Ready.value
+        assert stub_api.requests[0][1]["task"]["body"] == base64.b64encode(IMAGE).decode("utf-8")
+
+    async def test_aio_captcha_handler(self, stub_api, image, stub_solver):
+        result = await stub_solver().aio_captcha_handler(task_payload={"body": image})
+        assert result["status"] == ResponseStatusEnm.Ready.value
+        assert stub_api.requests[0][1]["task"]["body"] == base64.b64encode(IMAGE).decode("utf-8")
+
+
+class TestMappedFiles(BaseTest):
+    @pytest.fixture(scope="function")
+    def large_file(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("python3_capsolver.core.captcha_instrument.MMAP_THRESHOLD", 1024)
+        # several chunks and the last incomplete one
+        monkeypatch.setattr("python3_capsolver.core.captcha_instrument.ENCODE_CHUNK_SIZE", 3 * mmap.PAGESIZE)
+        path = tmp_path / "image"
+        path.write_bytes(IMAGE * 20)
+        return str(path)
+
+    def test_small_file_read(self):
+        with FileInstrument._local_file_captcha(self.image_captcha_path_example) as content:
+            assert isinstance(content, bytes)
+
+    def test_large_file_mapped(self, large_file):
+        with FileInstrument._local_file_captcha(large_file) as content:
+            assert isinstance(content, mmap.mmap)
+        assert content.closed
+
+    def test_file_processing(self, large_file):
+        result = FileInstrument().file_processing(captcha_file=large_file)
+        assert result == base64.b64encode(IMAGE * 20).decode("utf-8")
+
+    async def test_aio_file_processing(self, large_file):
+        result = await FileInstrument().aio_file_processing(captcha_file=large_file)
+        assert result == base64.b64encode(IMAGE * 20).decode("utf-8")
+
+    async def test_aio_encoded_in_thread(self, large_file, monkeypatch):
+        threads = []
+        encode_mapped = FileInstrument._encode_mapped
+
+        def encode(content):
+            threads.append(threading.current_thread())
+            return encode_mapped(content)
+
+        monkeypatch.setattr(FileInstrument, "_encode_mapped", staticmethod(encode))
+        await FileInstrument().aio_file_processing(captcha_file=large_file)
+        assert threads and threads[0] is not threading.main_thread()
+
+    def test_preprocessor(self, large_file):
+        with ProcessPoolPreprocessor(max_workers=1, shared_memory_threshold=1024) as preprocessor:
+            result = FileInstrument().file_processing(captcha_file=large_file, preprocessor=preprocessor)
+        assert result == base64.b64encode(IMAGE * 20).decode("utf-8")
@@ -0,0 +1,102 @@
+import time
+import asyncio
+import threading
+
+import pytest
+
+from tests.conftest import BaseTest
+from python3_capsolver.image_to_text import ImageToText
+from python3_capsolver.core.exceptions import CaptchaCancelledError
+from python3_capsolver.core.cancellation import CancelToken
+
+
+class TestCancelToken(BaseTest):
+    def test_cancel(self):
+        calls = []
+        token = CancelToken()
+        token.add_callback(lambda: calls.append(1))
+        token.cancel()
+        token.cancel()
+        assert token.cancelled
+        assert token.wait(0)
+        assert calls == [1]
+
+    def test_callback_after_cancel(self):
+        calls = []
+        token = CancelToken()
+        token.cancel()
+        token.add_callback(lambda: calls.append(1))
+        assert calls == [1]
+
+    def test_child(self):
+        parent = CancelToken()
+        first, second = parent.child(), parent.child()
+        first.cancel()
+        assert not parent.cancelled
+        second.detach()
+        parent.cancel()
+        assert not second.cancelled
+
+
+class TestSolvingCancellation(BaseTest):
+    solver_params = {"sleep_time": 1}
+
+    def test_cancel_token(self, stub_api, stub_solver):
+        stub_api.polls_to_ready = 1000
+        abandoned = []
+        token = CancelToken()
+        threading.Timer(0.3, token.cancel).start()
+
+        started = time.monotonic()
+        with pytest.raises(CaptchaCancelledError) as error:
+            stub_solver(on_task_abandoned=abandoned.append).captcha_handler(
+                task_payload={"body": "image"}, cancel_token=token
+            )
+        assert time.monotonic() - started < 1
+        assert abandoned == [error.value.task_id]
+        assert list(stub_api.tasks) == abandoned
+
+    def test_cancelled_before_creation(self, stub_api, stub_solver):
+        abandoned = []
+        token = CancelToken()
+        token.cancel()
+        with pytest.raises(CaptchaCancelledError):
+            stub_solver(on_task_abandoned=abandoned.append).captcha_handler(
+                task_payload={"body": "image"}, cancel_token=token
+            )
+        assert abandoned == []
+        assert stub_api.endpoint_calls("createTask") == 0
+
+    async def test_aio_cancel(self, stub_api, stub_solver):
+        stub_api.polls_to_ready = 1000
+        abandoned = []
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(
+                stub_solver(on_task_abandoned=abandoned.append).aio_captcha_handler(task_payload={"body": "image"}),
+                timeout=0.3,
+            )
+        assert list(stub_api.tasks) == abandoned
+
+    async def test_aio_cancel_in_request(self, stub_api, stub_solver):
+        stub_api.response_delay = 1
+        abandoned = []
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(
+                stub_solver(on_task_abandoned=abandoned.append).aio_captcha_handler(task_payload={"body": "image"}),
+                timeout=0.3,
+            )
+        # task was not created from the client point of view
+        assert abandoned == []
+
+    def test_hook_err(self, stub_api):
+        stub_api.polls_to_ready = 1000
+        token = CancelToken()
+        threading.Timer(0.3, token.cancel).start()
+        instance = ImageToText(
+            api_key=self.get_random_string(36),
+            sleep_time=1,
+            request_url=stub_api.url,
+            on_task_abandoned=lambda task_id: 1 / 0,
+        )
+        with pytest.raises(CaptchaCancelledError):
+            instance.captcha_handler(task_payload={"body": "image"}, cancel_token=token)
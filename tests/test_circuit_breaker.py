@@ -0,0 +1,127 @@
+import time
+import asyncio
+
+import pytest
+
+from tests.conftest import BaseTest
+from python3_capsolver.control import Control
+from python3_capsolver.core.enum import CircuitStateEnm
+from python3_capsolver.core.retry import RetryPolicy
+from python3_capsolver.core.exceptions import HTTPStatusError, CircuitOpenError
+from python3_capsolver.core.circuit_breaker import CircuitBreaker
+
+
+def failed():
+    raise HTTPStatusError(status=503)
+
+
+class TestCircuitBreaker(BaseTest):
+    def get_breaker(self, **kwargs) -> CircuitBreaker:
+        settings = dict(failure_rate=0.5, window=10, min_requests=4, open_duration=0.2, half_open_requests=2)
+        settings.update(kwargs)
+        return CircuitBreaker(**settings)
+
+    def test_open(self):
+        breaker = self.get_breaker()
+        for _ in range(2):
+            breaker.call(lambda: {"errorId": 0})
+        for _ in range(2):
+            with pytest.raises(HTTPStatusError):
+                breaker.call(failed)
+        assert breaker.state == CircuitStateEnm.Open
+        with pytest.raises(CircuitOpenError) as error:
+            breaker.call(lambda: {"errorId": 0})
+        assert 0 < error.value.retry_after <= 0.2
+
+    def test_min_requests(self):
+        breaker = self.get_breaker()
+        for _ in range(3):
+            with pytest.raises(HTTPStatusError):
+                breaker.call(failed)
+        assert breaker.state == CircuitStateEnm.Closed
+
+    def test_half_open_close(self):
+        breaker = self.get_breaker()
+        for _ in range(4):
+            breaker.record(success=False)
+        time.sleep(0.25)
+        assert breaker.state == CircuitStateEnm.HalfOpen
+        breaker.acquire()
+        breaker.acquire()
+        # only limited number of probes is allowed
+        with pytest.raises(CircuitOpenError):
+            breaker.acquire()
+        breaker.record(success=True)
+        breaker.record(success=True)
+        assert breaker.state == CircuitStateEnm.Closed
+
+    def test_half_open_reopen(self):
+        breaker = self.get_breaker()
+        for _ in range(4):
+            breaker.record(success=False)
+        time.sleep(0.25)
+        with pytest.raises(HTTPStatusError):
+            breaker.call(failed)
+        assert breaker.state == CircuitStateEnm.Open
+
+    async def test_cancelled_probe_released(self):
+        breaker = self.get_breaker(half_open_requests=1)
+        for _ in range(4):
+            breaker.record(success=False)
+        await asyncio.sleep(0.25)
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(breaker.aio_call(lambda: asyncio.sleep(1)), timeout=0.05)
+        assert await breaker.aio_call(lambda: asyncio.sleep(0, result={"errorId": 0})) == {"errorId": 0}
+        assert breaker.state == CircuitStateEnm.Closed
+
+    @pytest.mark.parametrize(
+        "result, error, duration, failure",
+        (
+            ({"errorId": 0}, None, 0, False),
+            ({"errorId": 1, "errorCode": "ERROR_KEY_DENIED_ACCESS"}, None, 0, False),
+            ({"errorId": 1, "errorCode": "ERROR_SERVICE_UNAVALIABLE"}, None, 0, True),
+            (None, HTTPStatusError(status=401), 0, False),
+            (None, HTTPStatusError(status=429), 0, True),
+            (None, asyncio.TimeoutError(), 0, True),
+            ({"errorId": 0}, None, 100, True),
+        ),
+    )
+    def test_is_failure(self, result, error, duration, failure):
+        assert self.get_breaker(slow_request_duration=10).is_failure(result, error, duration) is failure
+
+    def test_shared(self):
+        assert CircuitBreaker.shared("http://first") is CircuitBreaker.shared("http://first")
+        assert CircuitBreaker.shared("http://first") is not CircuitBreaker.shared("http://second")
+
+    def test_failure_rate_err(self):
+        with pytest.raises(ValueError):
+            CircuitBreaker(failure_rate=0)
+
+
+class TestCircuitBreakerRequests(BaseTest):
+    solver_params = {"retry_policy": RetryPolicy(max_attempts=1)}
+
+    def test_shared_by_url(self, stub_api, stub_solver):
+        stub_api.failures = [503] * 20
+        for _ in range(20):
+            with pytest.raises(HTTPStatusError):
+                stub_solver().captcha_handler(task_payload={"body": "image"})
+        assert stub_solver().endpoints.breaker(stub_api.url).state == CircuitStateEnm.Open
+
+        # requests are not sent while the breaker is open
+        with pytest.raises(CircuitOpenError):
+            stub_solver().captcha_handler(task_payload={"body": "image"})
+        with pytest.raises(CircuitOpenError):
+            Control(api_key=self.get_random_string(36), request_url=stub_api.url).get_balance()
+        assert stub_api.endpoint_calls("createTask") == 20
+        assert stub_api.endpoint_calls("getBalance") == 0
+
+    async def test_aio_open(self, stub_api, stub_solver):
+        stub_api.failures = [503] * 2
+        instance = stub_solver(circuit_breaker=CircuitBreaker(min_requests=2, open_duration=60))
+        for _ in range(2):
+            with pytest.raises(HTTPStatusError):
+                await instance.aio_captcha_handler(task_payload={"body": "image"})
+        with pytest.raises(CircuitOpenError):
+            await instance.aio_captcha_handler(task_payload={"body": "image"})
+        assert stub_api.endpoint_calls("createTask") == 2
@@ -0,0 +1,144 @@
+import io
+import os
+import sys
+import json
+import asyncio
+import subprocess
+
+import pytest
+
+from tests.conftest import BaseTest
+from python3_capsolver.cli import main, solve_stream
+from python3_capsolver.core.base import CaptchaParams
+from python3_capsolver.core.enum import CaptchaTypeEnm
+
+
+class CountingInput(io.StringIO):
+    """
+    Input which counts the read lines
+    """
+
+    def __init__(self, value: str):
+        super().__init__(value)
+        self.lines_read = 0
+
+    def readline(self, *args) -> str:
+        line = super().readline(*args)
+        if line:
+            self.lines_read += 1
+        return line
+
+
+class TestSolveStream(BaseTest):
+    solver_params = {"captcha_class": CaptchaParams, "captcha_type": CaptchaTypeEnm.Control, "sleep_time": 0.05}
+
+    async def test_stream(self, stub_api, stub_solver):
+        output, progress = io.StringIO(), io.StringIO()
+        input_file = io.StringIO("".join(json.dumps({"body": f"image-{index}"}) + "\n" for index in range(5)))
+        stats = await solve_stream(
+            stub_solver(),
+            input_file,
+            output,
+            concurrency=2,
+            captcha_type="ImageToTextTask",
+            progress_file=progress,
+        )
+        records = [json.loads(line) for line in output.getvalue().splitlines()]
+        assert sorted(record["index"] for record in records) == list(range(5))
+        assert all(record["result"]["status"] == "ready" for record in records)
+        assert stats.solved == 5 and stats.failed == 0
+        assert "solved: 5, failed: 0" in progress.getvalue()
+        tasks = [payload["task"] for endpoint, payload in stub_api.requests if endpoint == "createTask"]
+        assert {task["type"] for task in tasks} == {"ImageToTextTask"}
+        assert sorted(task["body"] for task in tasks) == [f"image-{index}" for index in range(5)]
+
+    async def test_completion_order(self, stub_api, stub_solver):
+        # the first task is polled longer than the second one
+        stub_api.polls_to_ready_queue = [5, 1]
+        output = io.StringIO()
+        await solve_stream(stub_solver(), io.StringIO('{"type": "ImageToTextTask"}\n' * 2), output, concurrency=2)
+        assert [json.loads(line)["index"] for line in output.getvalue().splitlines()] == [1, 0]
+
+    async def test_invalid_lines(self, stub_solver):
+        output = io.StringIO()
+        stats = await solve_stream(
+            stub_solver(), io.StringIO('not json\n\n[1, 2]\n{"type": "ImageToTextTask"}\n'), output
+        )
+        records = {record["index"]: record for record in map(json.loads, output.getvalue().splitlines())}
+        # empty lines are skipped, but counted in the index
+        assert set(records) == {0, 2, 3}
+        assert "Invalid task payload" in records[0]["error"]
+        assert "Invalid task payload" in records[2]["error"]
+        assert records[3]["result"]["status"] == "ready"
+        assert stats.failed == 2
+
+    async def test_api_error(self, stub_api, stub_solver):
+        stub_api.failures = ["ERROR_INVALID_TASK_DATA"]
+        output = io.StringIO()
+        stats = await solve_stream(stub_solver(), io.StringIO('{"type": "ImageToTextTask"}\n'), output)
+        assert json.loads(output.getvalue())["result"]["errorCode"] == "ERROR_INVALID_TASK_DATA"
+        assert stats.failed == 1
+
+    async def test_bounded_read_ahead(self, stub_api, stub_solver):
+        stub_api.response_delay = 0.2
+        input_file = CountingInput('{"type": "ImageToTextTask"}\n' * 50)
+        task = asyncio.create_task(solve_stream(stub_solver(), input_file, io.StringIO(), concurrency=2))
+        await asyncio.sleep(0.3)
+        # lines in flight, queued and the blocked one
+        assert input_file.lines_read <= 2 * 2 + 1
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    async def test_concurrency_err(self, stub_solver):
+        with pytest.raises(ValueError):
+            await solve_stream(stub_solver(), io.StringIO(), io.StringIO(), concurrency=0)
+
+
+class TestMain(BaseTest):
+    def test_files(self, stub_api, tmp_path, capsys):
+        input_path, output_path = tmp_path / "tasks.jsonl", tmp_path / "results.jsonl"
+        input_path.write_text('{"body": "image"}\n{"body": "image"}\n')
+        exit_code = main(
+            [
+                str(input_path),
+                "-o",
+                str(output_path),
+                "-k",
+                self.get_random_string(36),
+                "-t",
+                "ImageToTextTask",
+                "--request-url",
+                stub_api.url,
+                "--sleep-time",
+                "0.05",
+            ]
+        )
+        assert exit_code == 0
+        assert len(output_path.read_text().splitlines()) == 2
+        assert "solved: 2, failed: 0" in capsys.readouterr().err
+
+    def test_failed_exit_code(self, stub_api, tmp_path):
+        input_path = tmp_path / "tasks.jsonl"
+        input_path.write_text("not json\n")
+        args = [str(input_path), "-k", "key", "-q", "--request-url", stub_api.url]
+        assert main(args) == 1
+
+    def test_no_api_key(self, monkeypatch):
+        monkeypatch.delenv("API_KEY", raising=False)
+        with pytest.raises(SystemExit):
+            main(["-"])
+
+    def test_module_entry_point(self, stub_api):
+        process = subprocess.run(
+            [sys.executable, "-m", "python3_capsolver", "--request-url", stub_api.url, "--sleep-time", "0.05"],
+            input='{"type": "ImageToTextTask", "body": "image"}\n',
+            capture_output=True,
+            text=True,
+            timeout=60,
+            env={**os.environ, "API_KEY": self.get_random_string(36)},
+        )
+        assert process.returncode == 0, process.stderr
+        assert json.loads(process.stdout)["result"]["status"] == "ready"
+        assert "tasks/sec" in process.stderr
+        assert "Unclosed client session" not in process.stderr
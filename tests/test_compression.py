@@ -0,0 +1,113 @@
+import gzip
+import pickle
+
+import pytest
+
+from tests.conftest import BaseTest
+from python3_capsolver.core.enum import ResponseStatusEnm
+from python3_capsolver.core.compression import RequestCompression
+
+BODY = "iVBORw0KGgoAAAANSUhEUgAA" * 100
+
+
+class TestRequestCompression(BaseTest):
+    def test_should_compress(self):
+        compression = RequestCompression(threshold=10)
+        assert compression.should_compress(b"x" * 10)
+        assert not compression.should_compress(b"x" * 9)
+
+    def test_compress(self):
+        body = BODY.encode()
+        compressed = RequestCompression(level=9).compress(body)
+        assert len(compressed) < len(body)
+        assert gzip.decompress(compressed) == body
+
+    @pytest.mark.parametrize("offload_threshold", (0, 1024 * 1024))
+    async def test_aio_compress(self, offload_threshold):
+        compression = RequestCompression(offload_threshold=offload_threshold)
+        assert await compression.aio_compress(BODY.encode()) == compression.compress(BODY.encode())
+
+    def test_reject(self):
+        compression = RequestCompression()
+        compression.reject("http://first")
+        assert not compression.accepts("http://first")
+        assert compression.accepts("http://second")
+
+    def test_pickle(self):
+        compression = RequestCompression()
+        compression.reject("http://first")
+        restored = pickle.loads(pickle.dumps(compression))
+        assert not restored.accepts("http://first")
+
+    @pytest.mark.parametrize("level", (0, 10))
+    def test_level_err(self, level):
+        with pytest.raises(ValueError):
+            RequestCompression(level=level)
+
+
+class TestCompressedRequests(BaseTest):
+    solver_params = {"sleep_time": 0.05}
+
+    def test_compressed(self, stub_api, stub_solver):
+        result = stub_solver(compression=RequestCompression(threshold=1024)).captcha_handler(
+            task_payload={"body": BODY}
+        )
+        assert result["status"] == ResponseStatusEnm.Ready.value
+        # stand-in decompressed the body
+        assert stub_api.requests[0][0] == "createTask"
+        assert stub_api.requests[0][1]["task"]["body"] == BODY
+        assert stub_api.encodings[0] == "gzip"
+        # small polling requests are not compressed
+        assert stub_api.encodings[1] is None
+
+    async def test_aio_compressed(self, stub_api, stub_solver):
+        instance = stub_solver(compression=RequestCompression(threshold=1024, offload_threshold=0))
+        result = await instance.aio_captcha_handler(task_payload={"body": memoryview(BODY.encode())})
+        assert result["status"] == ResponseStatusEnm.Ready.value
+        assert stub_api.encodings[0] == "gzip"
+
+    def test_small_not_compressed(self, stub_api, stub_solver):
+        stub_solver(compression=RequestCompression()).captcha_handler(task_payload={"body": "small"})
+        assert stub_api.encodings[0] is None
+
+    @pytest.mark.parametrize("status, reject_statuses", ((415, (415,)), (400, (400, 415))))
+    def test_rejected(self, stub_api, status, reject_statuses, stub_solver):
+        stub_api.gzip_rejection_status = status
+        compression = RequestCompression(threshold=1024, reject_statuses=reject_statuses)
+        instance = stub_solver(compression=compression)
+        assert instance.captcha_handler(task_payload={"body": BODY})["status"] == ResponseStatusEnm.Ready.value
+        assert stub_api.encodings[:2] == ["gzip", None]
+        assert not compression.accepts(stub_api.url)
+
+        # the address is known to reject compression, the body is sent uncompressed at once and is not compressed
+        stub_api.encodings.clear()
+        compression.compress = None
+        assert instance.captcha_handler(task_payload={"body": BODY})["status"] == ResponseStatusEnm.Ready.value
+        assert "gzip" not in stub_api.encodings
+
+    async def test_aio_rejected(self, stub_api, stub_solver):
+        stub_api.gzip_rejection_status = 415
+        compression = RequestCompression(threshold=1024)
+        result = await stub_solver(compression=compression).aio_captcha_handler(task_payload={"body": BODY})
+        assert result["status"] == ResponseStatusEnm.Ready.value
+        assert not compression.accepts(stub_api.url)
+
+        compression.aio_compress = None
+        result = await stub_solver(compression=compression).aio_captcha_handler(task_payload={"body": BODY})
+        assert result["status"] == ResponseStatusEnm.Ready.value
+
+    def test_api_error_not_rejection(self, stub_api, stub_solver):
+        # API error of the compressed request is returned, the task is not sent again uncompressed
+        stub_api.failures = [400]
+        compression = RequestCompression(threshold=1024)
+        result = stub_solver(compression=compression).captcha_handler(task_payload={"body": BODY})
+        assert result["errorId"] == 1
+        assert stub_api.endpoint_calls("createTask") == 1
+        assert compression.accepts(stub_api.url)
+
+    async def test_aio_api_error_not_rejection(self, stub_api, stub_solver):
+        stub_api.failures = [400]
+        compression = RequestCompression(threshold=1024)
+        result = await stub_solver(compression=compression).aio_captcha_handler(task_payload={"body": BODY})
+        assert result["errorId"] == 1
+        assert stub_api.endpoint_calls("createTask") == 1
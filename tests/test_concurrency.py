@@ -0,0 +1,139 @@
+import time
+import asyncio
+
+import pytest
+
+from tests.conftest import BaseTest
+from python3_capsolver.core.enum import ResponseStatusEnm
+from python3_capsolver.core.concurrency import AdaptiveConcurrencyLimiter
+
+
+class TestAdaptiveConcurrencyLimiter(BaseTest):
+    async def test_additive_increase(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=2)
+        for _ in range(2):
+            limiter.release(await limiter.acquire(), success=True)
+        assert limiter.limit == 2
+        for _ in range(2):
+            limiter.release(await limiter.acquire(), success=True)
+        assert limiter.limit == 3
+        assert limiter.in_flight == 0
+
+    async def test_multiplicative_decrease(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=16)
+        limiter.release(await limiter.acquire(), success=False)
+        assert limiter.limit == 8
+        limiter.release(await limiter.acquire(), success=None)
+        assert limiter.limit == 8
+
+    async def test_single_decrease_per_overload(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=16)
+        acquired = [await limiter.acquire() for _ in range(4)]
+        # solvings started before the first decrease do not decrease the limit again
+        for acquired_at in acquired:
+            limiter.release(acquired_at, success=False)
+        assert limiter.limit == 8
+
+    async def test_bounds(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=2, min_limit=2, max_limit=3)
+        limiter.release(await limiter.acquire(), success=False)
+        assert limiter.limit == 2
+        for _ in range(20):
+            limiter.release(await limiter.acquire(), success=True)
+        assert limiter.limit == 3
+
+    async def test_slow_create_task(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=10, latency_tolerance=2)
+        for _ in range(10):
+            limiter.release(await limiter.acquire(), success=True, create_latency=0.1)
+        limit = limiter.limit
+        for _ in range(5):
+            limiter.release(await limiter.acquire(), success=True, create_latency=1)
+        assert limiter.limit < limit
+
+    async def test_waiters(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=1)
+        acquired_at = await limiter.acquire()
+        waiter = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0.01)
+        assert not waiter.done()
+        limiter.release(acquired_at, success=None)
+        await asyncio.wait_for(waiter, timeout=1)
+        assert limiter.in_flight == 1
+
+    async def test_cancelled_waiter(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=1)
+        acquired_at = await limiter.acquire()
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(limiter.acquire(), timeout=0.05)
+        limiter.release(acquired_at, success=None)
+        assert limiter.in_flight == 0
+        await asyncio.wait_for(limiter.acquire(), timeout=1)
+
+    async def test_on_limit_change(self):
+        limits = []
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=4, on_limit_change=limits.append)
+        limiter.release(await limiter.acquire(), success=False)
+        assert limits == [2]
+
+    @pytest.mark.parametrize(
+        "kwargs",
+        (
+            dict(initial_limit=0, min_limit=0),
+            dict(initial_limit=5, min_limit=10),
+            dict(initial_limit=50, max_limit=10),
+            dict(decrease_factor=1),
+        ),
+    )
+    def test_args_err(self, kwargs):
+        with pytest.raises(ValueError):
+            AdaptiveConcurrencyLimiter(**kwargs)
+
+
+class TestLimitedSolving(BaseTest):
+    solver_params = {"sleep_time": 0.05}
+
+    async def test_in_flight_cap(self, stub_api, stub_solver):
+        stub_api.response_delay = 0.05
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=3, max_limit=3)
+        instance = stub_solver(concurrency_limiter=limiter)
+        in_flight = []
+
+        async def watch():
+            while True:
+                in_flight.append(limiter.in_flight)
+                await asyncio.sleep(0.005)
+
+        watcher = asyncio.ensure_future(watch())
+        results = await asyncio.gather(
+            *[instance.aio_captcha_handler(task_payload={"body": "image"}) for _ in range(10)]
+        )
+        watcher.cancel()
+        assert all(result["status"] == ResponseStatusEnm.Ready.value for result in results)
+        assert max(in_flight) == 3
+        assert limiter.in_flight == 0
+
+    async def test_error_decrease(self, stub_api, stub_solver):
+        stub_api.failures = ["ERROR_SERVICE_UNAVALIABLE"] * 10
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=8)
+        await stub_solver(concurrency_limiter=limiter).aio_captcha_handler(task_payload={"body": "image"})
+        assert limiter.limit == 4
+
+    async def test_permanent_error_ignored(self, stub_api, stub_solver):
+        stub_api.failures = ["ERROR_KEY_DENIED_ACCESS"]
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=8)
+        await stub_solver(concurrency_limiter=limiter).aio_captcha_handler(task_payload={"body": "image"})
+        assert limiter.limit == 8
+        assert limiter.in_flight == 0
+
+    async def test_slot_timeout(self, stub_api, stub_solver):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=1)
+        acquired_at = await limiter.acquire()
+        started = time.monotonic()
+        result = await stub_solver(concurrency_limiter=limiter, timeout=0.1).aio_captcha_handler(
+            task_payload={"body": "image"}
+        )
+        assert result["errorCode"] == "ERROR_CLIENT_TIMEOUT"
+        assert time.monotonic() - started < 1
+        assert stub_api.endpoint_calls("createTask") == 0
+        limiter.release(acquired_at, success=None)
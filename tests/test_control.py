@@ -1,8 +1,13 @@
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
 import pytest
-from unittest.mock import patch, MagicMock, AsyncMock
 
 from tests.conftest import BaseTest
 from python3_capsolver.control import Control
+from python3_capsolver.core.retry import RetryPolicy
+from python3_capsolver.core.exceptions import HTTPStatusError
+from python3_capsolver.core.concurrency import AdaptiveConcurrencyLimiter
 
 
 class TestControl(BaseTest):
@@ -62,17 +67,13 @@ class TestControlMock(BaseTest):
     async def test_aio_create_task(self, mock_post):
         mock_resp = MagicMock()
         mock_resp.status = 200
-        mock_resp.json = AsyncMock(
-            return_value={"errorId": 0, "taskId": "test-task-id"}
-        )
+        mock_resp.json = AsyncMock(return_value={"errorId": 0, "taskId": "test-task-id"})
         # Mock async context manager
         mock_resp.__aenter__.return_value = mock_resp
         mock_post.return_value = mock_resp
 
         control = Control(api_key="test-key")
-        result = await control.aio_create_task(
-            {"type": "ImageToTextTask", "body": "base64..."}
-        )
+        result = await control.aio_create_task({"type": "ImageToTextTask", "body": "base64..."})
 
         assert result["taskId"] == "test-task-id"
         assert result["errorId"] == 0
@@ -122,9 +123,7 @@ class TestControlMock(BaseTest):
         mock_post.return_value = mock_response
 
         control = Control(api_key="test-key")
-        result = control.get_token(
-            {"type": "ReCaptchaV3TaskProxyLess", "websiteURL": "..."}
-        )
+        result = control.get_token({"type": "ReCaptchaV3TaskProxyLess", "websiteURL": "..."})
 
         assert result["taskId"] == "token-task-id"
 
@@ -132,16 +131,12 @@ class TestControlMock(BaseTest):
     async def test_aio_get_token(self, mock_post):
         mock_resp = MagicMock()
         mock_resp.status = 200
-        mock_resp.json = AsyncMock(
-            return_value={"errorId": 0, "taskId": "token-task-id"}
-        )
+        mock_resp.json = AsyncMock(return_value={"errorId": 0, "taskId": "token-task-id"})
         mock_resp.__aenter__.return_value = mock_resp
         mock_post.return_value = mock_resp
 
         control = Control(api_key="test-key")
-        result = await control.aio_get_token(
-            {"type": "ReCaptchaV3TaskProxyLess", "websiteURL": "..."}
-        )
+        result = await control.aio_get_token({"type": "ReCaptchaV3TaskProxyLess", "websiteURL": "..."})
 
         assert result["taskId"] == "token-task-id"
 
@@ -153,9 +148,7 @@ class TestControlMock(BaseTest):
         mock_post.return_value = mock_response
 
         control = Control(api_key="test-key")
-        result = control.feedback_task(
-            task_id="test-id", result_payload={"invalid": True}
-        )
+        result = control.feedback_task(task_id="test-id", result_payload={"invalid": True})
 
         assert result["message"] == "okay"
 
@@ -168,8 +161,102 @@ class TestControlMock(BaseTest):
         mock_post.return_value = mock_resp
 
         control = Control(api_key="test-key")
-        result = await control.aio_feedback_task(
-            task_id="test-id", result_payload={"invalid": True}
-        )
+        result = await control.aio_feedback_task(task_id="test-id", result_payload={"invalid": True})
 
         assert result["message"] == "okay"
+
+
+class TestTaskResultsBulk(BaseTest):
+    solver_params = {"captcha_class": Control}
+
+    @staticmethod
+    def add_tasks(stub_api, count: int) -> list:
+        task_ids = [f"task-{index}" for index in range(count)]
+        for task_id in task_ids:
+            stub_api.tasks[task_id] = [0, 1]
+        return task_ids
+
+    def test_get_task_results(self, stub_api, stub_solver):
+        task_ids = self.add_tasks(stub_api, 50)
+        results = dict(stub_solver().get_task_results(task_id for task_id in task_ids + ["unknown"]))
+        assert sorted(results) == sorted(task_ids + ["unknown"])
+        assert all(results[task_id]["status"] == "ready" for task_id in task_ids)
+        assert results["unknown"]["errorCode"] == "ERROR_TASKID_INVALID"
+
+    def test_concurrency(self, stub_api, stub_solver):
+        stub_api.response_delay = 0.1
+        task_ids = self.add_tasks(stub_api, 20)
+        started = time.monotonic()
+        assert len(list(stub_solver().get_task_results(task_ids, concurrency=10))) == 20
+        # 2 rounds of the concurrent requests instead of 20 sequential ones
+        assert time.monotonic() - started < 1
+
+    def test_early_stop(self, stub_api, stub_solver):
+        task_ids = self.add_tasks(stub_api, 100)
+        results = stub_solver().get_task_results(task_ids, concurrency=5)
+        next(results)
+        results.close()
+        # only the queued requests are sent
+        assert stub_api.endpoint_calls("getTaskResult") <= 10
+
+    @pytest.mark.parametrize("return_exceptions", (True, False))
+    def test_failed_request(self, stub_api, return_exceptions, stub_solver):
+        stub_api.failures = [500]
+        instance = stub_solver(retry_policy=RetryPolicy(max_attempts=1))
+        results = instance.get_task_results(self.add_tasks(stub_api, 1), return_exceptions=return_exceptions)
+        if return_exceptions:
+            assert isinstance(next(results)[1], HTTPStatusError)
+        else:
+            with pytest.raises(HTTPStatusError):
+                next(results)
+
+    def test_concurrency_err(self, stub_solver):
+        with pytest.raises(ValueError):
+            next(stub_solver().get_task_results(["task"], concurrency=0))
+
+    async def test_aio_get_task_results(self, stub_api, stub_solver):
+        stub_api.response_delay = 0.1
+        task_ids = self.add_tasks(stub_api, 20)
+        started = time.monotonic()
+        results = {
+            task_id: result async for task_id, result in stub_solver().aio_get_task_results(task_ids, concurrency=10)
+        }
+        assert time.monotonic() - started < 1
+        assert sorted(results) == sorted(task_ids)
+        assert all(result["status"] == "ready" for result in results.values())
+
+    async def test_aio_session_reused(self, stub_api, stub_solver):
+        task_ids = self.add_tasks(stub_api, 3)
+        async with stub_solver() as instance:
+            await instance.aio_get_balance()
+            await instance.aio_get_task_result(task_ids[0])
+            assert len([result async for result in instance.aio_get_task_results(task_ids)]) == 3
+            session = instance.aio_sessions.get()
+            assert len(instance.aio_sessions) == 1
+        assert session.closed
+
+    async def test_aio_early_stop(self, stub_api, stub_solver):
+        task_ids = self.add_tasks(stub_api, 100)
+        results = stub_solver().aio_get_task_results(task_ids, concurrency=5)
+        await results.__anext__()
+        await results.aclose()
+        assert stub_api.endpoint_calls("getTaskResult") <= 5
+
+    async def test_aio_failed_request(self, stub_api, stub_solver):
+        stub_api.failures = [500]
+        instance = stub_solver(retry_policy=RetryPolicy(max_attempts=1))
+        results = [
+            result
+            async for _, result in instance.aio_get_task_results(self.add_tasks(stub_api, 1), return_exceptions=True)
+        ]
+        assert isinstance(results[0], HTTPStatusError)
+
+    async def test_aio_rate_limiter(self, stub_api, stub_solver):
+        stub_api.failures = ["ERROR_RATE_LIMIT"]
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=4)
+        instance = stub_solver(retry_policy=RetryPolicy(max_attempts=1), concurrency_limiter=limiter)
+        results = [result async for _, result in instance.aio_get_task_results(self.add_tasks(stub_api, 2))]
+        assert len(results) == 2
+        # the rate limit error decreased the limit, all the slots are returned
+        assert limiter.limit < 4
+        assert limiter.in_flight == 0
@@ -1,11 +1,9 @@
 import pytest
-from tenacity import AsyncRetrying
-from urllib3.util.retry import Retry
 
 from tests.conftest import BaseTest
 from python3_capsolver.core.base import CaptchaParams
 from python3_capsolver.core.enum import MyEnum, CaptchaTypeEnm
-from python3_capsolver.core.const import RETRIES, REQUEST_URL, ASYNC_RETRIES
+from python3_capsolver.core.const import REQUEST_URL
 from python3_capsolver.core.utils import attempts_generator
 
 
@@ -14,12 +12,6 @@ class TestCore(BaseTest):
     Success tests
     """
 
-    def test_retries(self):
-        assert isinstance(RETRIES, Retry)
-
-    def test_async_retries(self):
-        assert isinstance(ASYNC_RETRIES, AsyncRetrying)
-
     def test_create_base(self):
         CaptchaParams(
             api_key=self.get_random_string(36),
@@ -0,0 +1,183 @@
+import functools
+
+import pytest
+
+from tests.conftest import BaseTest, StubCapsolverAPI
+from python3_capsolver.control import Control
+from python3_capsolver.core.enum import CircuitStateEnm, ResponseStatusEnm
+from python3_capsolver.core.retry import RetryPolicy
+from python3_capsolver.core.journal import SQLiteTaskJournal
+from python3_capsolver.core.endpoints import EndpointPool
+from python3_capsolver.core.exceptions import HTTPStatusError, CircuitOpenError
+from python3_capsolver.core.circuit_breaker import CircuitBreaker
+
+
+@pytest.fixture(scope="function")
+def gateways():
+    """
+    Two gateways to the same API, so the task created on one gateway is known to another one
+    """
+    first, second = StubCapsolverAPI(), StubCapsolverAPI()
+    second.tasks = first.tasks
+    first.start()
+    second.start()
+    yield first, second
+    first.stop()
+    second.stop()
+
+
+@pytest.fixture(scope="function")
+def gateway_solver(gateways, stub_solver):
+    """
+    Factory of the captcha solving instances sending requests to both gateways
+    """
+    return functools.partial(stub_solver, request_url=[gateway.url for gateway in gateways])
+
+
+def fast_policy() -> RetryPolicy:
+    return RetryPolicy(initial_delay=0.01, max_delay=0.05, capacity_delay=0.01)
+
+
+class TestEndpointPool(BaseTest):
+    urls = ["http://first", "http://second", "http://third"]
+
+    def test_unknown_first(self):
+        pool = EndpointPool(self.urls)
+        pool.record("http://first", duration=0.1, failure=False)
+        assert pool.ordered()[-1] == "http://first"
+
+    def test_latency_order(self):
+        pool = EndpointPool(self.urls)
+        for url, duration in zip(self.urls, (0.3, 0.1, 0.2)):
+            pool.record(url, duration=duration, failure=False)
+        assert pool.ordered() == ["http://second", "http://third", "http://first"]
+
+    def test_error_rate_order(self):
+        pool = EndpointPool(self.urls)
+        for url in self.urls:
+            pool.record(url, duration=0.1, failure=url == "http://first")
+        pool.record("http://second", duration=0.5, failure=False)
+        assert pool.ordered()[-1] == "http://first"
+
+    def test_pinned(self):
+        pool = EndpointPool(self.urls)
+        for url, duration in zip(self.urls, (0.1, 0.2, 0.3)):
+            pool.record(url, duration=duration, failure=False)
+        assert pool.ordered(pinned="http://third")[0] == "http://third"
+
+    def test_stale_probed(self, monkeypatch):
+        pool = EndpointPool(self.urls, stale_after=10)
+        for url in self.urls:
+            pool.record(url, duration=0.1 if url != "http://first" else 5, failure=False)
+        assert pool.ordered()[-1] == "http://first"
+        for url in self.urls[1:]:
+            pool.record(url, duration=0.1, failure=False)
+        monkeypatch.setattr(
+            "python3_capsolver.core.endpoints.time.monotonic", lambda: pool._stats["http://first"].updated_at + 11
+        )
+        assert pool.ordered()[0] == "http://first"
+
+    def test_open_breaker_skipped(self):
+        urls = ["http://open-first", "http://open-second"]
+        pool = EndpointPool(urls)
+        CircuitBreaker.shared("http://open-first")._open()
+        assert pool.ordered() == ["http://open-second", "http://open-first"]
+        # the request is sent to the next address at once
+        assert pool.call(lambda url: url, next_url=iter(urls).__next__) == "http://open-second"
+
+    def test_all_open(self):
+        pool = EndpointPool(["http://first"], circuit_breaker=CircuitBreaker(open_duration=60))
+        pool.breaker("http://first")._open()
+        with pytest.raises(CircuitOpenError):
+            pool.call(lambda url: url)
+
+    def test_breaker_per_address(self):
+        breaker = CircuitBreaker(min_requests=2, open_duration=60)
+        pool = EndpointPool(["http://first", "http://second"], circuit_breaker=breaker)
+        assert pool.breaker("http://first") is breaker
+        second = pool.breaker("http://second")
+        assert second is not breaker
+        assert (second.request_url, second.min_requests, second.open_duration) == ("http://second", 2, 60)
+        breaker._open()
+        assert second.state == CircuitStateEnm.Closed
+        assert pool.ordered() == ["http://second", "http://first"]
+
+    def test_rotation(self):
+        next_url = EndpointPool(self.urls).rotation(pinned="http://second")
+        assert [next_url() for _ in range(4)] == ["http://second", "http://first", "http://third", "http://second"]
+
+    def test_from_request_url(self):
+        assert EndpointPool.from_request_url("http://first").urls == ["http://first"]
+        assert EndpointPool.from_request_url(["http://first", "http://first"]).urls == ["http://first"]
+
+    @pytest.mark.parametrize("kwargs", (dict(urls=[]), dict(urls=["http://first"], smoothing=0)))
+    def test_args_err(self, kwargs):
+        with pytest.raises(ValueError):
+            EndpointPool(**kwargs)
+
+
+class TestFailover(BaseTest):
+    solver_params = {"sleep_time": 0.05, "retry_policy": fast_policy()}
+
+    def test_create_failover(self, gateways, gateway_solver):
+        first, second = gateways
+        first.failures = [503] * 10
+        result = gateway_solver().captcha_handler(task_payload={"body": "image"})
+        assert result["status"] == ResponseStatusEnm.Ready.value
+        assert first.endpoint_calls("createTask") == 1
+        assert second.endpoint_calls("getTaskResult") >= 1
+        assert first.endpoint_calls("getTaskResult") == 0
+
+    async def test_aio_create_failover(self, gateways, gateway_solver):
+        first, second = gateways
+        first.failures = [503] * 10
+        result = await gateway_solver().aio_captcha_handler(task_payload={"body": "image"})
+        assert result["status"] == ResponseStatusEnm.Ready.value
+        assert first.endpoint_calls("getTaskResult") == 0
+
+    def test_polls_pinned(self, gateways, gateway_solver):
+        first, second = gateways
+        instance = gateway_solver()
+        handle = instance.create_task_handle(task_payload={"body": "image"})
+        creator = first if handle.endpoint == first.url else second
+        other = second if creator is first else first
+        # another gateway becomes faster, but the task results are requested from the creator
+        instance.endpoints.record(other.url, duration=0.001, failure=False)
+        instance.endpoints.record(creator.url, duration=10, failure=False)
+        assert handle.poll()["status"] == ResponseStatusEnm.Ready.value
+        assert creator.endpoint_calls("getTaskResult") == 1
+        assert other.endpoint_calls("getTaskResult") == 0
+
+    async def test_poll_failover(self, gateways, gateway_solver):
+        first, second = gateways
+        handle = await gateway_solver().aio_create_task_handle(task_payload={"body": "image"})
+        creator = first if handle.endpoint == first.url else second
+        creator.failures = [503] * 10
+        # the task is not lost after the creator gateway failure
+        assert (await handle.aio_result(timeout=5))["status"] == ResponseStatusEnm.Ready.value
+
+    def test_journal_endpoint(self, tmp_path, gateway_solver):
+        journal = SQLiteTaskJournal(str(tmp_path / "tasks.db"))
+        instance = gateway_solver(journal=journal)
+        handle = instance.create_task_handle(task_payload={"body": "image"})
+        assert [recovered.endpoint for recovered in journal.recover(instance)] == [handle.endpoint]
+        journal.close()
+
+    def test_balance_failover(self, gateways):
+        first, second = gateways
+        first.failures = [502] * 10
+        control = Control(
+            api_key=self.get_random_string(36),
+            request_url=[first.url, second.url],
+            retry_policy=fast_policy(),
+        )
+        assert control.get_balance()["balance"] == 10.0
+
+    def test_single_url(self, gateways):
+        first, _ = gateways
+        first.failures = [503] * 10
+        control = Control(
+            api_key=self.get_random_string(36), request_url=first.url, retry_policy=RetryPolicy(max_attempts=2)
+        )
+        with pytest.raises(HTTPStatusError):
+            control.get_balance()
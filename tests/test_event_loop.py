@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+from tests.conftest import BaseTest
+from python3_capsolver.core import event_loop
+from python3_capsolver.core.enum import ResponseStatusEnm
+from python3_capsolver.image_to_text import ImageToText
+from python3_capsolver.core.loop_client import BackgroundLoop, SyncLoopClient
+
+
+@pytest.fixture
+def uvloop():
+    uvloop = pytest.importorskip("uvloop")
+    yield uvloop
+    event_loop.enable_uvloop(False)
+
+
+class TestEventLoop(BaseTest):
+    def test_standard_by_default(self):
+        loop = event_loop.new_event_loop()
+        try:
+            assert type(loop) is type(asyncio.new_event_loop())
+        finally:
+            loop.close()
+
+    def test_new_uvloop(self, uvloop):
+        loop = event_loop.new_event_loop(use_uvloop=True)
+        try:
+            assert isinstance(loop, uvloop.Loop)
+        finally:
+            loop.close()
+
+    def test_fallback(self, monkeypatch):
+        monkeypatch.setattr(event_loop, "uvloop", None)
+        assert not event_loop.enable_uvloop()
+        try:
+            assert event_loop.run(asyncio.sleep(0, result="done")) == "done"
+        finally:
+            event_loop.enable_uvloop(False)
+
+    def test_run_solving(self, uvloop, stub_api):
+        async def solve():
+            assert isinstance(asyncio.get_running_loop(), uvloop.Loop)
+            solver = ImageToText(api_key=self.get_random_string(36), sleep_time=0.05, request_url=stub_api.url)
+            return await solver.aio_captcha_handler(task_payload={"body": "image"})
+
+        assert event_loop.run(solve(), use_uvloop=True)["status"] == ResponseStatusEnm.Ready.value
+
+    def test_background_loop(self, uvloop, stub_api):
+        assert event_loop.enable_uvloop()
+        background_loop = BackgroundLoop(name="test-uvloop")
+        try:
+            assert isinstance(background_loop.loop, uvloop.Loop)
+            solver = ImageToText(api_key=self.get_random_string(36), sleep_time=0.05, request_url=stub_api.url)
+            with SyncLoopClient(solver, background_loop=background_loop) as client:
+                result = client.submit(task_payload={"body": "image"}).result(timeout=30)
+            assert result["status"] == ResponseStatusEnm.Ready.value
+        finally:
+            background_loop.stop()
+
+    def test_explicit_choice_overrides(self, uvloop):
+        event_loop.enable_uvloop()
+        background_loop = BackgroundLoop(name="test-uvloop", use_uvloop=False)
+        try:
+            assert not isinstance(background_loop.loop, uvloop.Loop)
+        finally:
+            background_loop.stop()
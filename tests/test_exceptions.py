@@ -0,0 +1,85 @@
+import pytest
+
+from tests.conftest import BaseTest
+from python3_capsolver.core.enum import ErrorKindEnm, ResponseStatusEnm
+from python3_capsolver.core.exceptions import (
+    CapsolverAPIError,
+    PermanentAPIError,
+    TransientAPIError,
+    RetryAfterDelayAPIError,
+    error_kind,
+    raise_for_error,
+    status_error_kind,
+)
+
+
+class TestErrorKind(BaseTest):
+    @pytest.mark.parametrize(
+        "error_code, kind",
+        (
+            ("ERROR_KEY_DENIED_ACCESS", ErrorKindEnm.Permanent),
+            ("ERROR_ZERO_BALANCE", ErrorKindEnm.Permanent),
+            ("ERROR_INVALID_TASK_DATA", ErrorKindEnm.Permanent),
+            ("ERROR_SOME_NEW_CODE", ErrorKindEnm.Permanent),
+            ("ERROR_RATE_LIMIT", ErrorKindEnm.RetryAfterDelay),
+            ("ERROR_SERVICE_UNAVALIABLE", ErrorKindEnm.Transient),
+            # client side solving deadline is not the API error
+            ("ERROR_CLIENT_TIMEOUT", ErrorKindEnm.Permanent),
+        ),
+    )
+    def test_error_kind(self, error_code, kind):
+        assert error_kind(error_code) == kind
+
+    @pytest.mark.parametrize(
+        "status, kind",
+        ((400, ErrorKindEnm.Permanent), (429, ErrorKindEnm.RetryAfterDelay), (503, ErrorKindEnm.Transient)),
+    )
+    def test_status_error_kind(self, status, kind):
+        assert status_error_kind(status) == kind
+
+    def test_raise_for_error_ok(self):
+        response = {"errorId": 0, "balance": 1}
+        assert raise_for_error(response) is response
+
+    @pytest.mark.parametrize(
+        "error_code, error_class",
+        (
+            ("ERROR_ZERO_BALANCE", PermanentAPIError),
+            ("ERROR_RATE_LIMIT", RetryAfterDelayAPIError),
+            ("ERROR_SERVICE_UNAVALIABLE", TransientAPIError),
+        ),
+    )
+    def test_raise_for_error(self, error_code, error_class):
+        response = {"errorId": 1, "errorCode": error_code, "errorDescription": "Error"}
+        with pytest.raises(error_class) as error:
+            raise_for_error(response)
+        assert isinstance(error.value, CapsolverAPIError)
+        assert error.value.error_code == error_code
+        assert error.value.response == response
+
+
+class TestFailFastPolling(BaseTest):
+    solver_params = {"timeout": 30}
+
+    def test_permanent_poll_error(self, stub_api, stub_solver):
+        stub_api.polls_to_ready = 1000
+        instance = stub_solver()
+        handle = instance.create_task_handle(task_payload={"body": "image"})
+        stub_api.failures = ["ERROR_CAPTCHA_UNSOLVABLE"]
+        result = handle.result()
+        assert result["status"] == ResponseStatusEnm.Failed.value
+        assert result["errorCode"] == "ERROR_CAPTCHA_UNSOLVABLE"
+        assert stub_api.endpoint_calls("getTaskResult") == 1
+
+    async def test_aio_permanent_poll_error(self, stub_api, stub_solver):
+        stub_api.polls_to_ready = 1000
+        handle = await stub_solver().aio_create_task_handle(task_payload={"body": "image"})
+        stub_api.failures = ["ERROR_TASKID_INVALID"]
+        assert (await handle.aio_result())["status"] == ResponseStatusEnm.Failed.value
+        assert handle.done()
+
+    def test_permanent_create_error(self, stub_api, stub_solver):
+        stub_api.failures = ["ERROR_ZERO_BALANCE"]
+        result = stub_solver().captcha_handler(task_payload={"body": "image"})
+        assert result["status"] == ResponseStatusEnm.Failed.value
+        assert stub_api.endpoint_calls("createTask") == 1
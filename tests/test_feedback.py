@@ -0,0 +1,98 @@
+import time
+import pickle
+import threading
+
+import pytest
+
+from tests.conftest import BaseTest
+from python3_capsolver.control import Control
+from python3_capsolver.core.retry import RetryPolicy
+from python3_capsolver.core.feedback import FeedbackQueue
+
+
+class TestFeedbackQueue(BaseTest):
+    solver_params = {"captcha_class": Control}
+
+    def test_feedback_endpoint(self, stub_api, stub_solver):
+        result = stub_solver().feedback_task(task_id="task-id", result_payload={"invalid": True})
+        assert result["message"] == "okay"
+        endpoint, payload = stub_api.requests[0]
+        assert endpoint == "feedbackTask"
+        assert payload["taskId"] == "task-id"
+        assert payload["result"] == {"invalid": True}
+
+    async def test_aio_feedback_endpoint(self, stub_api, stub_solver):
+        result = await stub_solver().aio_feedback_task(task_id="task-id", result_payload={"code": 1001})
+        assert result["message"] == "okay"
+        assert stub_api.requests[0][0] == "feedbackTask"
+        assert stub_api.requests[0][1]["result"] == {"code": 1001}
+
+    def test_submit_not_blocking(self, stub_api, stub_solver):
+        stub_api.response_delay = 0.5
+        with stub_solver() as control:
+            start = time.monotonic()
+            for index in range(5):
+                assert control.submit_feedback(task_id=f"task-{index}", result_payload={"invalid": True})
+            assert time.monotonic() - start < 0.5
+        # context manager exit waits for the enqueued feedback
+        assert stub_api.endpoint_calls("feedbackTask") == 5
+        assert control.feedback_queue.sent == 5
+
+    async def test_aio_context_flush(self, stub_api, stub_solver):
+        async with stub_solver() as control:
+            control.submit_feedback(task_id="task-id", result_payload={"invalid": True})
+        assert stub_api.endpoint_calls("feedbackTask") == 1
+
+    def test_bounded_concurrency(self, stub_api, stub_solver):
+        stub_api.response_delay = 0.2
+        feedback = FeedbackQueue(stub_solver(), concurrency=2)
+        for index in range(4):
+            feedback.submit(task_id=f"task-{index}", result_payload={"invalid": True})
+        start = time.monotonic()
+        feedback.flush()
+        # 4 requests by 2 threads
+        assert time.monotonic() - start >= 0.35
+        assert feedback.pending == 0
+        feedback.close()
+        assert not any(thread.name == "python3-capsolver-feedback" for thread in threading.enumerate())
+
+    def test_retried(self, stub_api, stub_solver):
+        stub_api.failures = [503]
+        feedback = FeedbackQueue(stub_solver(retry_policy=RetryPolicy(initial_delay=0.01)))
+        feedback.submit(task_id="task-id", result_payload={"invalid": True})
+        feedback.close()
+        assert stub_api.endpoint_calls("feedbackTask") == 2
+        assert feedback.sent == 1
+
+    def test_failed(self, stub_api, stub_solver):
+        stub_api.failures = ["ERROR_INVALID_TASK_DATA"]
+        errors = []
+        feedback = FeedbackQueue(stub_solver(), on_error=lambda task_id, error: errors.append((task_id, error)))
+        feedback.submit(task_id="task-id", result_payload={"invalid": True})
+        feedback.close()
+        assert feedback.failed == 1
+        assert errors[0][0] == "task-id"
+        assert isinstance(errors[0][1], Exception)
+
+    def test_dropped(self, stub_api, stub_solver):
+        stub_api.response_delay = 0.3
+        feedback = FeedbackQueue(stub_solver(), concurrency=1, max_size=1)
+        results = [feedback.submit(task_id=f"task-{index}", result_payload={}) for index in range(5)]
+        assert results[0]
+        assert not all(results)
+        feedback.close()
+        assert feedback.dropped == results.count(False)
+        assert stub_api.endpoint_calls("feedbackTask") == results.count(True)
+
+    def test_pickle(self, stub_solver):
+        control = stub_solver()
+        control.submit_feedback(task_id="task-id", result_payload={})
+        restored = pickle.loads(pickle.dumps(control.feedback_queue))
+        assert restored.pending == 0
+        restored_control = pickle.loads(pickle.dumps(control))
+        assert restored_control._feedback_queue is None
+        control.close()
+
+    def test_concurrency_err(self, stub_solver):
+        with pytest.raises(ValueError):
+            FeedbackQueue(stub_solver(), concurrency=0)
@@ -0,0 +1,146 @@
+import asyncio
+
+import pytest
+import requests
+from aiohttp import web
+
+from tests.conftest import BaseTest
+from python3_capsolver.control import Control
+from python3_capsolver.gateway import GatewayClient, SolverGateway
+from python3_capsolver.core.enum import CaptchaTypeEnm, ResponseStatusEnm
+from python3_capsolver.core.balance import BalanceMonitor
+from python3_capsolver.core.exceptions import HTTPStatusError, LowBalanceError
+from python3_capsolver.core.concurrency import AdaptiveConcurrencyLimiter
+from python3_capsolver.core.loop_client import BackgroundLoop
+
+
+@pytest.fixture
+def gateway(stub_api):
+    """
+    Gateway served from the background loop, so both SYNC and ASYNC clients can be tested
+    """
+    loop = BackgroundLoop(name="test-gateway")
+    instance = SolverGateway(api_key=BaseTest.get_random_string(36), request_url=stub_api.url, sleep_time=0.05)
+    runner = web.AppRunner(instance.make_app())
+
+    async def start() -> int:
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        return runner.addresses[0][1]
+
+    instance.url = f"http://127.0.0.1:{loop.submit(start()).result()}"
+    yield instance
+    loop.submit(runner.cleanup()).result()
+    loop.stop()
+
+
+class TestSolverGateway(BaseTest):
+    def test_captcha_handler(self, gateway, stub_api):
+        with GatewayClient(gateway.url, captcha_type=CaptchaTypeEnm.ImageToTextTask) as client:
+            result = client.captcha_handler(task_payload={"body": "image"})
+        assert result["status"] == ResponseStatusEnm.Ready.value
+        assert result["solution"] == stub_api.solution
+        assert stub_api.requests[0][1]["task"] == {"type": "ImageToTextTask", "body": "image"}
+
+    async def test_aio_captcha_handler(self, gateway, stub_api):
+        async with GatewayClient(gateway.url) as client:
+            for _ in range(2):
+                result = await client.aio_captcha_handler(task_payload={"type": "ImageToTextTask", "body": "image"})
+                assert result["status"] == ResponseStatusEnm.Ready.value
+            session = client.aio_sessions.get()
+            assert len(client.aio_sessions) == 1
+        assert session.closed
+
+    async def test_multiplexed(self, gateway, stub_api):
+        stub_api.polls_to_ready = 2
+        client = GatewayClient(gateway.url, captcha_type=CaptchaTypeEnm.ImageToTextTask)
+        results = await asyncio.gather(
+            *[client.aio_captcha_handler(task_payload={"body": f"image-{index}"}) for index in range(20)]
+        )
+        assert all(result["status"] == ResponseStatusEnm.Ready.value for result in results)
+        assert len({result["taskId"] for result in results}) == 20
+        # every task is polled by the central poller until it is ready
+        assert stub_api.endpoint_calls("getTaskResult") == 40
+        stats = requests.get(f"{gateway.url}/stats").json()
+        assert stats["solved"] == 20
+        assert stats["in_flight"] == 0
+        assert stats["polling"] == 0
+
+    def test_timeout(self, gateway, stub_api):
+        stub_api.polls_to_ready = 1000
+        with GatewayClient(gateway.url, captcha_type=CaptchaTypeEnm.ImageToTextTask, timeout=0.3) as client:
+            result = client.captcha_handler(task_payload={"body": "image"})
+        assert result["errorCode"] == "ERROR_CLIENT_TIMEOUT"
+        assert result["taskId"] is not None
+        assert gateway.stats["failed"] == 1
+
+    def test_api_error(self, gateway, stub_api):
+        stub_api.failures = ["ERROR_INVALID_TASK_DATA"]
+        with GatewayClient(gateway.url, captcha_type=CaptchaTypeEnm.ImageToTextTask) as client:
+            result = client.captcha_handler(task_payload={"body": "image"})
+        assert result["errorCode"] == "ERROR_INVALID_TASK_DATA"
+        assert gateway.stats["failed"] == 1
+
+    def test_balance_solved(self, gateway, stub_api):
+        monitor = BalanceMonitor(Control(api_key=self.get_random_string(36), request_url=stub_api.url), task_cost=0.5)
+        monitor.refresh()
+        gateway.captcha_params.balance_monitor = monitor
+        with GatewayClient(gateway.url, captcha_type=CaptchaTypeEnm.ImageToTextTask) as client:
+            client.captcha_handler(task_payload={"body": "image"})
+        # the solved task is recorded once by the task handle
+        assert monitor.balance == 9.5
+
+    @pytest.mark.parametrize("body", ("not json", '{"timeout": 1}', '{"task": [1]}', "[1]"))
+    def test_invalid_request(self, gateway, body):
+        response = requests.post(f"{gateway.url}/solve", data=body)
+        assert response.status_code == 400
+        assert "Invalid solve request" in response.json()["error"]
+
+    def test_client_status_error(self, gateway, stub_api):
+        stub_api.balance = 0.5
+        monitor = BalanceMonitor(
+            Control(api_key=self.get_random_string(36), request_url=stub_api.url), threshold=1.0, block_tasks=True
+        )
+        monitor.refresh()
+        gateway.captcha_params.balance_monitor = monitor
+        with GatewayClient(gateway.url, captcha_type=CaptchaTypeEnm.ImageToTextTask) as client:
+            with pytest.raises(HTTPStatusError) as error:
+                client.captcha_handler(task_payload={"body": "image"})
+        assert error.value.status == 502
+        assert LowBalanceError.__name__ in error.value.reason
+        assert stub_api.endpoint_calls("createTask") == 0
+
+    async def test_cancelled(self, stub_api):
+        stub_api.polls_to_ready = 1000
+        abandoned = []
+        instance = SolverGateway(
+            api_key=self.get_random_string(36),
+            request_url=stub_api.url,
+            sleep_time=0.05,
+            on_task_abandoned=abandoned.append,
+        )
+        limit = instance.stats["limit"]
+        await instance.start()
+        try:
+            solving = asyncio.create_task(instance.solve({"type": "ImageToTextTask", "body": "image"}))
+            await asyncio.sleep(0.3)
+            solving.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await solving
+        finally:
+            await instance.close()
+        assert abandoned == list(stub_api.tasks)
+        assert len(abandoned) == 1
+        # the client disconnect is not the API overload signal
+        assert instance.stats["limit"] == limit
+        assert instance.stats["in_flight"] == 0
+        assert instance.stats["failed"] == 1
+
+    async def test_limiter_none(self, stub_api):
+        instance = SolverGateway(api_key=self.get_random_string(36), request_url=stub_api.url, concurrency_limiter=None)
+        assert isinstance(instance.captcha_params.concurrency_limiter, AdaptiveConcurrencyLimiter)
+
+    async def test_not_started(self, stub_api):
+        with pytest.raises(RuntimeError):
+            await SolverGateway(api_key=self.get_random_string(36), request_url=stub_api.url).solve({})
@@ -0,0 +1,70 @@
+import pytest
+
+from tests.conftest import BaseTest
+from python3_capsolver.core.enum import CaptchaTypeEnm, ResponseStatusEnm
+from python3_capsolver.recaptcha import ReCaptcha
+from python3_capsolver.core.hedging import HedgingPolicy
+
+
+class TestHedgingPolicy(BaseTest):
+    def test_initial_delay(self):
+        policy = HedgingPolicy(initial_delay=7, min_samples=3)
+        policy.record_latency(1)
+        assert policy.hedge_delay() == 7
+
+    def test_percentile_delay(self):
+        policy = HedgingPolicy(percentile=90, min_delay=0, min_samples=10)
+        for latency in range(1, 11):
+            policy.record_latency(latency)
+        assert policy.hedge_delay() == 10
+
+    def test_min_delay(self):
+        policy = HedgingPolicy(min_delay=2, min_samples=1)
+        policy.record_latency(0.1)
+        assert policy.hedge_delay() == 2
+
+    def test_extra_spend_cap(self):
+        policy = HedgingPolicy(max_extra_ratio=0.5)
+        for _ in range(4):
+            policy.register_task()
+        assert [policy.acquire_hedge() for _ in range(3)] == [True, True, False]
+        assert policy.hedged_count == 2
+
+    @pytest.mark.parametrize("percentile", (0, 101))
+    def test_percentile_err(self, percentile):
+        with pytest.raises(ValueError):
+            HedgingPolicy(percentile=percentile)
+
+
+class TestHedgedSolving(BaseTest):
+    solver_params = {"captcha_class": ReCaptcha, "captcha_type": CaptchaTypeEnm.ReCaptchaV2Task, "timeout": 10}
+
+    def test_hedged_task_wins(self, stub_api, stub_solver):
+        stub_api.polls_to_ready_queue = [1000, 1]
+        policy = HedgingPolicy(initial_delay=0.3, min_delay=0, max_extra_ratio=1)
+        result = stub_solver(hedging=policy).captcha_handler(task_payload={"websiteURL": "https://demo.com"})
+        assert result["status"] == ResponseStatusEnm.Ready.value
+        assert stub_api.endpoint_calls("createTask") == 2
+        assert policy.hedged_count == 1
+
+    async def test_aio_hedged_task_wins(self, stub_api, stub_solver):
+        stub_api.polls_to_ready_queue = [1000, 1]
+        policy = HedgingPolicy(initial_delay=0.3, min_delay=0, max_extra_ratio=1)
+        result = await stub_solver(hedging=policy).aio_captcha_handler(task_payload={"websiteURL": "https://demo.com"})
+        assert result["status"] == ResponseStatusEnm.Ready.value
+        assert stub_api.endpoint_calls("createTask") == 2
+        assert policy.hedged_count == 1
+
+    async def test_aio_no_hedge_for_fast_task(self, stub_api, stub_solver):
+        policy = HedgingPolicy(initial_delay=5, max_extra_ratio=1)
+        result = await stub_solver(hedging=policy).aio_captcha_handler(task_payload={"websiteURL": "https://demo.com"})
+        assert result["status"] == ResponseStatusEnm.Ready.value
+        assert stub_api.endpoint_calls("createTask") == 1
+        assert policy.hedged_count == 0
+
+    def test_extra_spend_cap_reached(self, stub_api, stub_solver):
+        stub_api.polls_to_ready = 3
+        policy = HedgingPolicy(initial_delay=0.1, min_delay=0, max_extra_ratio=0)
+        result = stub_solver(hedging=policy).captcha_handler(task_payload={"websiteURL": "https://demo.com"})
+        assert result["status"] == ResponseStatusEnm.Ready.value
+        assert stub_api.endpoint_calls("createTask") == 1
@@ -0,0 +1,85 @@
+import io
+import base64
+
+import pytest
+
+from tests.conftest import BaseTest
+from python3_capsolver.core.captcha_instrument import FileInstrument
+
+Image = pytest.importorskip("PIL.Image")
+
+from python3_capsolver.core.image_optimizer import ImageOptimizer  # noqa: E402
+
+
+def open_image(content: bytes) -> "Image.Image":
+    return Image.open(io.BytesIO(content))
+
+
+def decode_image(body: str) -> "Image.Image":
+    return open_image(base64.b64decode(body))
+
+
+class TestImageOptimizer(BaseTest):
+    def test_downsample(self):
+        image = open_image(ImageOptimizer(max_size=(100, 100)).optimize(self.read_image()))
+        assert max(image.size) == 100
+        # aspect ratio is kept
+        assert image.size == (100, 59)
+
+    def test_small_not_upsampled(self):
+        image = open_image(ImageOptimizer(max_size=(1000, 1000), image_format="PNG").optimize(self.read_image()))
+        assert image.size == (293, 172)
+
+    def test_crop(self):
+        image = open_image(ImageOptimizer(crop=(10, 20, 110, 70)).optimize(self.read_image()))
+        assert image.size == (100, 50)
+
+    def test_grayscale(self):
+        image = open_image(ImageOptimizer(grayscale=True).optimize(self.read_image()))
+        assert image.mode == "L"
+        assert image.format == "JPEG"
+
+    def test_reencode(self):
+        content = self.read_image()
+        optimized = ImageOptimizer(image_format="jpeg", quality=30).optimize(content)
+        assert open_image(optimized).format == "JPEG"
+        assert len(optimized) < len(content)
+
+    def test_not_smaller_kept(self):
+        content = self.read_image()
+        # lossless PNG of the photo is larger than JPEG, the source is kept
+        assert ImageOptimizer(image_format="PNG").optimize(content) is content
+
+    def test_quality_err(self):
+        with pytest.raises(ValueError):
+            ImageOptimizer(quality=0)
+
+
+class TestFileInstrumentOptimization(BaseTest):
+    optimizers = {"common": ImageOptimizer(max_size=(100, 100), grayscale=True)}
+
+    def test_file_processing(self):
+        body = FileInstrument().file_processing(
+            captcha_file=self.image_captcha_path_example, optimizer=self.optimizers, module="common"
+        )
+        image = decode_image(body)
+        assert image.size == (100, 59)
+        assert image.mode == "L"
+
+    def test_other_module(self):
+        body = FileInstrument().file_processing(
+            captcha_file=self.image_captcha_path_example, optimizer=self.optimizers, module="number"
+        )
+        assert body == self.read_image_as_str()
+
+    def test_single_optimizer(self):
+        body = FileInstrument().file_processing(
+            captcha_base64=self.read_image(), optimizer=ImageOptimizer(crop=(0, 0, 50, 50))
+        )
+        assert decode_image(body).size == (50, 50)
+
+    async def test_aio_file_processing(self):
+        body = await FileInstrument().aio_file_processing(
+            captcha_file=self.image_captcha_path_example, optimizer=self.optimizers, module="common"
+        )
+        assert decode_image(body).size == (100, 59)
@@ -1,8 +1,16 @@
+import time
+import asyncio
+
 import pytest
+import requests
 
 from tests.conftest import BaseTest
-from python3_capsolver.core.enum import SaveFormatsEnm
-from python3_capsolver.core.captcha_instrument import FileInstrument
+from python3_capsolver.core.enum import SaveFormatsEnm, ResponseStatusEnm
+from python3_capsolver.image_to_text import ImageToText
+from python3_capsolver.core.task_handle import TaskHandle
+from python3_capsolver.core.captcha_instrument import FileInstrument, CaptchaInstrumentBase
+from python3_capsolver.core.aio_captcha_instrument import AIOCaptchaInstrument
+from python3_capsolver.core.sio_captcha_instrument import SIOCaptchaInstrument
 
 
 class TestFileInstrument(BaseTest):
@@ -55,3 +63,88 @@ class TestFileInstrument(BaseTest):
     async def test_aio_file_processing_err(self):
         with pytest.raises(ValueError):
             await FileInstrument().aio_file_processing()
+
+
+class TestTaskState(BaseTest):
+    """
+    Per-task state is kept in the slotted objects, shared settings are kept by the captcha params
+    """
+
+    @pytest.mark.parametrize("instrument_class", (SIOCaptchaInstrument, AIOCaptchaInstrument))
+    def test_instrument_slots(self, instrument_class):
+        captcha_params = ImageToText(api_key=self.get_random_string(36))
+        instrument = instrument_class(captcha_params=captcha_params, task_params={"body": "image"})
+        assert not hasattr(instrument, "__dict__")
+        assert instrument.task_payload == {
+            **captcha_params.create_task_payload.to_dict(),
+            "task": {"body": "image"},
+        }
+
+    def test_handle_slots(self):
+        handle = TaskHandle(captcha_params=ImageToText(api_key=self.get_random_string(36)), task_id="task-id")
+        assert not hasattr(handle, "__dict__")
+
+    def test_timeout_result_not_shared(self):
+        result = CaptchaInstrumentBase._timeout_result(task_id="task-id")
+        assert result.taskId == "task-id"
+        assert CaptchaInstrumentBase._timeout_result() is not result
+
+
+class TestSolvingDeadline(BaseTest):
+    """
+    Deadline and request timeouts tests against the local API stub
+    """
+
+    def test_solved_before_deadline(self, stub_api, stub_solver):
+        result = stub_solver().captcha_handler(task_payload={"body": "image"}, timeout=5)
+        assert result["status"] == ResponseStatusEnm.Ready.value
+        assert result["solution"] == stub_api.solution
+
+    async def test_aio_solved_before_deadline(self, stub_api, stub_solver):
+        result = await stub_solver().aio_captcha_handler(task_payload={"body": "image"}, timeout=5)
+        assert result["status"] == ResponseStatusEnm.Ready.value
+        assert result["solution"] == stub_api.solution
+
+    def test_polling_deadline(self, stub_api, stub_solver):
+        stub_api.polls_to_ready = 1000
+        started = time.monotonic()
+        result = stub_solver().captcha_handler(task_payload={"body": "image"}, timeout=1)
+        assert 1 <= time.monotonic() - started < 2
+        assert result["errorId"] == 1
+        assert result["errorCode"] == CaptchaInstrumentBase.CAPTCHA_TIMEOUT
+        assert result["status"] == ResponseStatusEnm.Failed.value
+        assert result["taskId"] is not None
+
+    async def test_aio_polling_deadline(self, stub_api, stub_solver):
+        stub_api.polls_to_ready = 1000
+        started = time.monotonic()
+        result = await stub_solver(timeout=1).aio_captcha_handler(task_payload={"body": "image"})
+        assert 1 <= time.monotonic() - started < 2
+        assert result["errorId"] == 1
+        assert result["errorCode"] == CaptchaInstrumentBase.CAPTCHA_TIMEOUT
+        assert result["status"] == ResponseStatusEnm.Failed.value
+
+    def test_hung_request_deadline(self, stub_api, stub_solver):
+        stub_api.response_delay = 3
+        started = time.monotonic()
+        result = stub_solver().captcha_handler(task_payload={"body": "image"}, timeout=1)
+        assert time.monotonic() - started < 2
+        assert result["errorCode"] == CaptchaInstrumentBase.CAPTCHA_TIMEOUT
+        assert result["taskId"] is None
+
+    async def test_aio_hung_request_deadline(self, stub_api, stub_solver):
+        stub_api.response_delay = 3
+        started = time.monotonic()
+        result = await stub_solver().aio_captcha_handler(task_payload={"body": "image"}, timeout=1)
+        assert time.monotonic() - started < 2
+        assert result["errorCode"] == CaptchaInstrumentBase.CAPTCHA_TIMEOUT
+
+    def test_read_timeout_err(self, stub_api, stub_solver):
+        stub_api.response_delay = 2
+        with pytest.raises(requests.Timeout):
+            stub_solver().captcha_handler(task_payload={"body": "image"}, timeout=10, read_timeout=0.5)
+
+    async def test_aio_read_timeout_err(self, stub_api, stub_solver):
+        stub_api.response_delay = 2
+        with pytest.raises(asyncio.TimeoutError):
+            await stub_solver(read_timeout=0.5).aio_captcha_handler(task_payload={"body": "image"}, timeout=10)
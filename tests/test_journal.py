@@ -0,0 +1,141 @@
+import time
+import asyncio
+import threading
+
+import pytest
+
+from tests.conftest import BaseTest
+from python3_capsolver.core.enum import ResponseStatusEnm
+from python3_capsolver.core.journal import TaskJournal, FileTaskJournal, SQLiteTaskJournal
+from python3_capsolver.core.exceptions import CaptchaCancelledError
+from python3_capsolver.core.task_handle import TaskPoller
+from python3_capsolver.core.cancellation import CancelToken
+
+
+@pytest.fixture(params=("file", "sqlite"))
+def journal(request, tmp_path) -> TaskJournal:
+    if request.param == "file":
+        journal = FileTaskJournal(str(tmp_path / "tasks.journal"))
+    else:
+        journal = SQLiteTaskJournal(str(tmp_path / "tasks.db"))
+    yield journal
+    journal.close()
+
+
+class TestTaskJournal(BaseTest):
+    def test_unfinished(self, journal):
+        journal.record_created(task_id="first", captcha_type="ImageToTextTask", created_at=1.0)
+        journal.record_created(task_id="second", captcha_type="ImageToTextTask", created_at=2.0)
+        journal.record_done(task_id="first")
+        unfinished = journal.unfinished()
+        assert [record.taskId for record in unfinished] == ["second"]
+        assert unfinished[0].captchaType == "ImageToTextTask"
+        assert unfinished[0].createdAt == 2.0
+
+    def test_reopen(self, journal):
+        journal.record_created(task_id="first", captcha_type="ImageToTextTask", created_at=1.0)
+        journal.close()
+        journal = journal.__class__(journal.path)
+        assert [record.taskId for record in journal.unfinished()] == ["first"]
+
+    def test_empty(self, journal):
+        assert journal.unfinished() == []
+
+    def test_file_broken_line(self, tmp_path):
+        path = tmp_path / "tasks.journal"
+        journal = FileTaskJournal(str(path))
+        journal.record_created(task_id="first", captcha_type=None, created_at=1.0)
+        journal.flush()
+        with open(path, "ab") as journal_file:
+            journal_file.write(b'{"event":"created","taskId":"sec')
+        assert [record.taskId for record in journal.unfinished()] == ["first"]
+        journal.close()
+
+    def test_file_compact(self, tmp_path):
+        path = tmp_path / "tasks.journal"
+        journal = FileTaskJournal(str(path))
+        for index in range(10):
+            journal.record_created(task_id=str(index), captcha_type=None, created_at=1.0)
+            if index:
+                journal.record_done(task_id=str(index))
+        journal.compact()
+        assert len(path.read_bytes().splitlines()) == 1
+        assert [record.taskId for record in journal.unfinished()] == ["0"]
+        journal.close()
+
+    def test_file_compact_concurrent_write(self, tmp_path):
+        journal = FileTaskJournal(str(tmp_path / "tasks.journal"))
+        journal.record_created(task_id="first", captcha_type=None, created_at=1.0)
+        read = journal._read
+
+        def read_and_record():
+            records = read()
+            # another thread creates the task while the journal is compacted
+            threading.Thread(
+                target=journal.record_created, kwargs=dict(task_id="second", captcha_type=None, created_at=2.0)
+            ).start()
+            return records
+
+        journal._read = read_and_record
+        journal.compact()
+        journal._read = read
+        time.sleep(0.1)
+        assert [record.taskId for record in journal.unfinished()] == ["first", "second"]
+        journal.close()
+
+    def test_abstract(self):
+        with pytest.raises(TypeError):
+            TaskJournal()
+
+
+class TestJournaledSolving(BaseTest):
+    def test_solved_task_done(self, journal, stub_solver):
+        result = stub_solver(journal=journal).captcha_handler(task_payload={"body": "image"})
+        assert result["status"] == ResponseStatusEnm.Ready.value
+        assert journal.unfinished() == []
+
+    async def test_aio_solved_task_done(self, journal, stub_solver):
+        result = await stub_solver(journal=journal).aio_captcha_handler(task_payload={"body": "image"})
+        assert result["status"] == ResponseStatusEnm.Ready.value
+        assert journal.unfinished() == []
+
+    def test_client_timeout_not_done(self, stub_api, journal, stub_solver):
+        stub_api.polls_to_ready = 1000
+        result = stub_solver(journal=journal, timeout=0.3).captcha_handler(task_payload={"body": "image"})
+        assert result["errorCode"] == "ERROR_CLIENT_TIMEOUT"
+        # the task is still solved by the API, so it can be recovered
+        assert [record.taskId for record in journal.unfinished()] == [result["taskId"]]
+
+    async def test_aio_client_timeout_not_done(self, stub_api, journal, stub_solver):
+        stub_api.polls_to_ready = 1000
+        result = await stub_solver(journal=journal, timeout=0.3).aio_captcha_handler(task_payload={"body": "image"})
+        assert result["errorCode"] == "ERROR_CLIENT_TIMEOUT"
+        assert [record.taskId for record in journal.unfinished()] == [result["taskId"]]
+
+    def test_cancelled_task_recover(self, stub_api, journal, stub_solver):
+        stub_api.polls_to_ready = 1000
+        token = CancelToken()
+        threading.Timer(0.3, token.cancel).start()
+        instance = stub_solver(journal=journal)
+        with pytest.raises(CaptchaCancelledError):
+            instance.captcha_handler(task_payload={"body": "image"}, cancel_token=token)
+        unfinished = journal.unfinished()
+        assert [record.taskId for record in unfinished] == list(stub_api.tasks)
+        assert unfinished[0].captchaType == "ImageToTextTask"
+
+        # polling is re-attached after the "restart"
+        stub_api.polls_to_ready = 1
+        stub_api.tasks[unfinished[0].taskId][1] = 0
+        handles = journal.recover(stub_solver(journal=journal))
+        assert [handle.status for handle in TaskPoller().as_completed(handles, timeout=5)] == [
+            ResponseStatusEnm.Ready.value
+        ]
+        assert journal.unfinished() == []
+
+    async def test_aio_cancelled_task_recover(self, stub_api, journal, stub_solver):
+        stub_api.polls_to_ready = 1000
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(
+                stub_solver(journal=journal).aio_captcha_handler(task_payload={"body": "image"}), timeout=0.3
+            )
+        assert len(journal.recover(stub_solver(journal=journal))) == 1
@@ -0,0 +1,111 @@
+import logging
+
+import pytest
+
+from tests.conftest import BaseTest
+from python3_capsolver.core import log
+from python3_capsolver.core.enum import TaskPhaseEnm, ResponseStatusEnm
+from python3_capsolver.core.exceptions import HTTPStatusError
+from python3_capsolver.core.captcha_instrument import CaptchaInstrumentBase
+
+LOGGER_NAME = "python3_capsolver"
+
+
+@pytest.fixture
+def error_limit():
+    yield log.set_error_log_limit
+    log.set_error_log_limit()
+
+
+class TestErrorLogLimiter(BaseTest):
+    def test_burst(self, monkeypatch):
+        now = [100.0]
+        monkeypatch.setattr("python3_capsolver.core.log.time.monotonic", lambda: now[0])
+        limiter = log.ErrorLogLimiter(burst=2, interval=10)
+        assert [limiter.acquire("poll") for _ in range(4)] == [0, 0, None, None]
+        # other errors kind is counted separately
+        assert limiter.acquire("create") == 0
+        now[0] += 10
+        assert limiter.acquire("poll") == 2
+
+    def test_no_limit(self):
+        limiter = log.ErrorLogLimiter(burst=0)
+        assert all(limiter.acquire("poll") == 0 for _ in range(100))
+
+    def test_burst_err(self):
+        with pytest.raises(ValueError):
+            log.ErrorLogLimiter(burst=-1)
+
+
+class TestLogError(BaseTest):
+    def test_fields(self, caplog, error_limit):
+        logger = logging.getLogger(f"{LOGGER_NAME}.test")
+        log.log_error(logger, ValueError("boom"), phase=TaskPhaseEnm.Poll, task_id="task-id", duration=1.5)
+        (record,) = caplog.records
+        assert record.levelno == logging.ERROR
+        assert record.phase == "poll"
+        assert record.task_id == "task-id"
+        assert record.captcha_type is None
+        assert record.duration == 1.5
+        assert record.skipped == 0
+        assert record.exc_info[1].args == ("boom",)
+
+    def test_rate_limited(self, caplog, error_limit):
+        error_limit(burst=2, interval=60)
+        logger = logging.getLogger(f"{LOGGER_NAME}.test")
+        for _ in range(5):
+            log.log_error(logger, ValueError("boom"), phase=TaskPhaseEnm.Poll)
+        assert len(caplog.records) == 2
+
+    def test_disabled_not_counted(self, caplog, error_limit):
+        error_limit(burst=1, interval=60)
+        logger = logging.getLogger(f"{LOGGER_NAME}.test")
+        logger.disabled = True
+        try:
+            log.log_error(logger, ValueError("boom"), phase=TaskPhaseEnm.Poll)
+        finally:
+            logger.disabled = False
+        log.log_error(logger, ValueError("boom"), phase=TaskPhaseEnm.Poll)
+        assert len(caplog.records) == 1
+
+
+class TestSolvingLogs(BaseTest):
+    solver_params = {"sleep_time": 0.05}
+
+    def test_debug_fields(self, caplog, stub_api, stub_solver):
+        caplog.set_level(logging.DEBUG, logger=LOGGER_NAME)
+        stub_api.polls_to_ready = 2
+        result = stub_solver().captcha_handler(task_payload={"body": "image"})
+        records = [record for record in caplog.records if hasattr(record, "phase")]
+        assert [record.phase for record in records] == ["create", "poll", "poll"]
+        assert all(record.task_id == result["taskId"] for record in records)
+        assert all(record.captcha_type == "ImageToTextTask" for record in records)
+        assert records[-1].duration >= records[0].duration
+
+    async def test_aio_debug_fields(self, caplog, stub_api, stub_solver):
+        caplog.set_level(logging.DEBUG, logger=LOGGER_NAME)
+        stub_api.polls_to_ready = 2
+        result = await stub_solver().aio_captcha_handler(task_payload={"body": "image"})
+        records = [record for record in caplog.records if hasattr(record, "phase")]
+        assert [record.phase for record in records] == ["create", "poll", "poll"]
+        assert records[-1].getMessage() == f"Task {result['taskId']} status: ready"
+
+    def test_debug_disabled(self, monkeypatch, stub_solver):
+        def fail(*args, **kwargs):
+            raise AssertionError("Debug record is built while debug logging is disabled")
+
+        monkeypatch.setattr(CaptchaInstrumentBase, "_log_debug", fail)
+        result = stub_solver().captcha_handler(task_payload={"body": "image"})
+        assert result["status"] == ResponseStatusEnm.Ready.value
+
+    def test_error_logged(self, caplog, stub_api, error_limit, stub_solver):
+        error_limit(burst=1, interval=60)
+        stub_api.failures = [403, 403]
+        instance = stub_solver()
+        for _ in range(2):
+            with pytest.raises(HTTPStatusError):
+                instance.captcha_handler(task_payload={"body": "image"})
+        (record,) = [record for record in caplog.records if record.levelno == logging.ERROR]
+        assert record.name == f"{LOGGER_NAME}.core.sio_captcha_instrument"
+        assert record.phase == "create"
+        assert record.captcha_type == "ImageToTextTask"
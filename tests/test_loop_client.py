@@ -0,0 +1,80 @@
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pytest
+
+from tests.conftest import BaseTest
+from python3_capsolver.core.enum import ResponseStatusEnm
+from python3_capsolver.image_to_text import ImageToText
+from python3_capsolver.core.loop_client import BackgroundLoop, SyncLoopClient
+
+
+class TestBackgroundLoop(BaseTest):
+    def test_submit(self):
+        loop = BackgroundLoop()
+        try:
+            assert loop.submit(asyncio.sleep(0, result="done")).result(timeout=1) == "done"
+            assert loop.is_running
+        finally:
+            loop.stop(timeout=1)
+        assert not loop.is_running
+
+    def test_stop_cancels_pending(self):
+        loop = BackgroundLoop()
+        future = loop.submit(asyncio.sleep(100))
+        loop.stop(timeout=1)
+        assert future.cancelled()
+
+    def test_shared(self):
+        assert BackgroundLoop.shared() is BackgroundLoop.shared()
+
+
+class TestSyncLoopClient(BaseTest):
+    @pytest.fixture
+    def client(self, stub_api):
+        loop = BackgroundLoop()
+        captcha_params = ImageToText(api_key=self.get_random_string(36), sleep_time=0.2, request_url=stub_api.url)
+        yield SyncLoopClient(captcha_params=captcha_params, background_loop=loop)
+        loop.stop(timeout=1)
+
+    def test_captcha_handler(self, client):
+        result = client.captcha_handler(task_payload={"body": "image"})
+        assert result["status"] == ResponseStatusEnm.Ready.value
+
+    def test_submit(self, client):
+        future = client.submit(task_payload={"body": "image"}, timeout=5)
+        assert isinstance(future, Future)
+        assert future.result()["status"] == ResponseStatusEnm.Ready.value
+
+    def test_map(self, client, stub_api):
+        results = list(client.map([{"body": f"image-{i}"} for i in range(20)], timeout=5))
+        assert len(results) == 20
+        assert all(result["status"] == ResponseStatusEnm.Ready.value for result in results)
+        assert stub_api.endpoint_calls("createTask") == 20
+
+    def test_many_threads(self, client):
+        with ThreadPoolExecutor(max_workers=50) as executor:
+            futures = list(executor.map(lambda _: client.submit(task_payload={"body": "image"}), range(200)))
+            results = list(executor.map(lambda future: future.result(timeout=10), futures))
+        assert all(result["status"] == ResponseStatusEnm.Ready.value for result in results)
+
+    def test_cancel(self, stub_api):
+        stub_api.polls_to_ready = 1000
+        abandoned = []
+        loop = BackgroundLoop()
+        captcha_params = ImageToText(
+            api_key=self.get_random_string(36),
+            sleep_time=0.2,
+            request_url=stub_api.url,
+            on_task_abandoned=abandoned.append,
+        )
+        try:
+            future = SyncLoopClient(captcha_params=captcha_params, background_loop=loop).submit({"body": "image"})
+            while not stub_api.tasks:
+                threading.Event().wait(0.05)
+            future.cancel()
+            loop.submit(asyncio.sleep(0.1)).result()
+            assert abandoned == list(stub_api.tasks)
+        finally:
+            loop.stop(timeout=1)
@@ -0,0 +1,99 @@
+import base64
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from tests.conftest import BaseTest
+from python3_capsolver.core.enum import ResponseStatusEnm
+from python3_capsolver.core.hedging import HedgingPolicy
+from python3_capsolver.core.journal import SQLiteTaskJournal
+from python3_capsolver.image_to_text import ImageToText
+from python3_capsolver.core.concurrency import AdaptiveConcurrencyLimiter
+from python3_capsolver.core.process_pool import ProcessPoolPreprocessor
+from python3_capsolver.core.circuit_breaker import CircuitBreaker
+from python3_capsolver.core.captcha_instrument import FileInstrument
+
+
+@pytest.fixture(scope="module")
+def preprocessor():
+    with ProcessPoolPreprocessor(max_workers=2, shared_memory_threshold=1024) as pool:
+        yield pool
+
+
+def solve(solver: ImageToText, body: str) -> dict:
+    return solver.captcha_handler(task_payload={"body": body})
+
+
+class TestProcessPoolPreprocessor(BaseTest):
+    @pytest.mark.parametrize("data", (b"small", bytes(range(256)) * 100))
+    def test_encode_image(self, preprocessor, data):
+        assert preprocessor.encode_image(data) == base64.b64encode(data).decode("utf-8")
+
+    @pytest.mark.parametrize("data", (bytearray(b"x" * 5000), memoryview(b"y" * 5001)))
+    async def test_aio_encode_image(self, preprocessor, data):
+        assert await preprocessor.aio_encode_image(data) == base64.b64encode(data).decode("utf-8")
+
+    def test_is_large_buffer(self, preprocessor):
+        assert preprocessor.is_large_buffer(b"x" * 1024)
+        assert not preprocessor.is_large_buffer(b"x")
+        # strings are encoded to JSON in the current process, they are not sent to the workers
+        assert not preprocessor.is_large_buffer("x" * 1024)
+
+    def test_file_processing(self, preprocessor):
+        result = FileInstrument().file_processing(
+            captcha_file=self.image_captcha_path_example, preprocessor=preprocessor
+        )
+        assert result == self.read_image_as_str()
+
+    async def test_aio_file_processing(self, preprocessor):
+        result = await FileInstrument().aio_file_processing(captcha_base64=self.read_image(), preprocessor=preprocessor)
+        assert result == self.read_image_as_str()
+
+
+class TestProcessPoolSolving(BaseTest):
+    solver_params = {"sleep_time": 0.05}
+
+    def test_large_buffer(self, stub_api, preprocessor, stub_solver, monkeypatch):
+        pooled = []
+        encode_image = preprocessor.encode_image
+        monkeypatch.setattr(preprocessor, "encode_image", lambda data: pooled.append(data) or encode_image(data))
+        body = bytes(range(256)) * 8
+        result = stub_solver(preprocessor=preprocessor).captcha_handler(
+            task_payload={"body": body, "question": "x" * 2048}
+        )
+        assert result["status"] == ResponseStatusEnm.Ready.value
+        assert stub_api.requests[0][1]["task"]["body"] == base64.b64encode(body).decode("utf-8")
+        assert pooled == [body]
+
+    async def test_aio_large_buffer(self, stub_api, preprocessor, stub_solver):
+        body = memoryview(bytes(range(256)) * 8)
+        instance = stub_solver(preprocessor=preprocessor)
+        result = await instance.aio_captcha_handler(task_payload={"body": body, "small": b"small"})
+        assert result["status"] == ResponseStatusEnm.Ready.value
+        assert stub_api.requests[0][1]["task"]["body"] == base64.b64encode(body).decode("utf-8")
+        assert stub_api.requests[0][1]["task"]["small"] == base64.b64encode(b"small").decode("utf-8")
+
+    def test_pickle(self, tmp_path, preprocessor, stub_solver):
+        journal = SQLiteTaskJournal(str(tmp_path / "tasks.db"))
+        instance = stub_solver(
+            hedging=HedgingPolicy(),
+            circuit_breaker=CircuitBreaker(),
+            concurrency_limiter=AdaptiveConcurrencyLimiter(),
+            journal=journal,
+            preprocessor=preprocessor,
+        )
+        instance.sessions.get()
+        restored = pickle.loads(pickle.dumps(instance))
+        assert restored.preprocessor is None
+        assert restored.endpoints.urls == instance.endpoints.urls
+        assert restored.captcha_handler(task_payload={"body": "image"})["status"] == ResponseStatusEnm.Ready.value
+        restored.journal.close()
+        journal.close()
+
+    def test_solving_in_worker(self, stub_api, stub_solver):
+        instance = stub_solver()
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            results = list(executor.map(solve, [instance] * 4, ["image"] * 4))
+        assert all(result["status"] == ResponseStatusEnm.Ready.value for result in results)
+        assert stub_api.endpoint_calls("createTask") == 4
@@ -0,0 +1,176 @@
+import base64
+import contextlib
+
+import pytest
+import requests
+from urllib3.exceptions import MaxRetryError, ProtocolError, NewConnectionError, ConnectTimeoutError
+
+from tests.conftest import BaseTest
+from python3_capsolver.control import Control
+from python3_capsolver.core.enum import ResponseStatusEnm
+from python3_capsolver.core.retry import RetryPolicy
+from python3_capsolver.core.exceptions import HTTPStatusError
+from python3_capsolver.core.captcha_instrument import FileInstrument
+
+
+def fast_policy(**kwargs) -> RetryPolicy:
+    return RetryPolicy(initial_delay=0.01, max_delay=0.05, capacity_delay=0.01, **kwargs)
+
+
+class TestRetryPolicy(BaseTest):
+    @pytest.mark.parametrize(
+        "error, idempotent, retryable",
+        (
+            (HTTPStatusError(status=503), True, True),
+            (HTTPStatusError(status=401), True, False),
+            (requests.ConnectionError(MaxRetryError(None, "/", NewConnectionError(None, "refused"))), False, True),
+            (requests.ConnectionError(MaxRetryError(None, "/", ConnectTimeoutError())), False, True),
+            (requests.ConnectTimeout(), False, True),
+            (requests.ConnectionError(ProtocolError("Connection aborted.")), False, False),
+            (requests.ConnectionError(), False, False),
+            (HTTPStatusError(status=429), False, True),
+            (HTTPStatusError(status=502), True, True),
+            (HTTPStatusError(status=502), False, False),
+            (requests.ReadTimeout(), True, True),
+            (requests.ReadTimeout(), False, False),
+            (ValueError(), True, False),
+        ),
+    )
+    def test_retryable_error(self, error, idempotent, retryable):
+        assert RetryPolicy().is_retryable_error(error, idempotent=idempotent) is retryable
+
+    def test_retryable_result(self):
+        assert RetryPolicy().is_retryable_result({"errorId": 1, "errorCode": "ERROR_RATE_LIMIT"})
+        assert not RetryPolicy().is_retryable_result({"errorId": 1, "errorCode": "ERROR_KEY_DENIED_ACCESS"})
+
+    def test_last_result_returned(self):
+        calls = []
+        result = fast_policy(max_attempts=3).call(lambda: calls.append(1) or {"errorCode": "ERROR_RATE_LIMIT"})
+        assert result == {"errorCode": "ERROR_RATE_LIMIT"}
+        assert len(calls) == 3
+
+    def test_last_error_raised(self):
+        def func():
+            raise HTTPStatusError(status=502)
+
+        with pytest.raises(HTTPStatusError):
+            fast_policy(max_attempts=2).call(func)
+
+    def test_full_jitter(self):
+        delays = []
+        policy = RetryPolicy(max_attempts=6, initial_delay=1, max_delay=4, max_elapsed=100)
+        policy.call(lambda: {"errorCode": "ERROR_SERVICE_UNAVALIABLE"}, sleep=delays.append)
+        assert len(delays) == 5
+        assert all(0 <= delay <= min(4, 2**attempt) for attempt, delay in enumerate(delays))
+
+    @pytest.mark.parametrize("response", ({"errorCode": "ERROR_RATE_LIMIT"}, HTTPStatusError(status=429)))
+    def test_capacity_delay(self, response):
+        def func():
+            if isinstance(response, Exception):
+                raise response
+            return response
+
+        delays = []
+        policy = RetryPolicy(max_attempts=3, initial_delay=1, max_delay=1, capacity_delay=5, max_elapsed=100)
+        with contextlib.suppress(HTTPStatusError):
+            policy.call(func, sleep=delays.append)
+        assert len(delays) == 2
+        assert all(5 <= delay <= 6 for delay in delays)
+
+    def test_permanent_not_retried(self):
+        calls = []
+        result = fast_policy().call(lambda: calls.append(1) or {"errorId": 1, "errorCode": "ERROR_ZERO_BALANCE"})
+        assert result["errorCode"] == "ERROR_ZERO_BALANCE"
+        assert len(calls) == 1
+
+    def test_deadline(self, monkeypatch):
+        calls = []
+        monkeypatch.setattr("python3_capsolver.core.retry.time.monotonic", lambda: 100)
+        fast_policy().call(lambda: calls.append(1) or {"errorCode": "ERROR_RATE_LIMIT"}, deadline=100)
+        assert len(calls) == 1
+
+    async def test_aio_call(self):
+        calls = []
+
+        async def func():
+            calls.append(1)
+            if len(calls) < 3:
+                raise HTTPStatusError(status=500)
+            return {"errorId": 0}
+
+        assert await fast_policy().aio_call(func) == {"errorId": 0}
+
+    def test_retry_state_not_created(self, monkeypatch):
+        monkeypatch.setattr("python3_capsolver.core.retry.Retrying", None)
+        assert fast_policy().call(lambda: {"errorId": 0}) == {"errorId": 0}
+
+    async def test_aio_retry_state_not_created(self, monkeypatch):
+        monkeypatch.setattr("python3_capsolver.core.retry.AsyncRetrying", None)
+
+        async def func():
+            return {"errorId": 0}
+
+        assert await fast_policy().aio_call(func) == {"errorId": 0}
+
+    def test_max_attempts_err(self):
+        with pytest.raises(ValueError):
+            RetryPolicy(max_attempts=0)
+
+
+class TestRetriedRequests(BaseTest):
+    solver_params = {"retry_policy": fast_policy()}
+
+    def test_solving(self, stub_api, stub_solver):
+        stub_api.failures = [503, "ERROR_SERVICE_UNAVALIABLE", 429]
+        result = stub_solver().captcha_handler(task_payload={"body": "image"})
+        assert result["status"] == ResponseStatusEnm.Ready.value
+        assert stub_api.endpoint_calls("createTask") == 4
+        assert len(stub_api.tasks) == 1
+
+    @pytest.mark.parametrize("status", (500, 502, 504))
+    def test_processed_status_not_retried(self, stub_api, stub_solver, status):
+        stub_api.failures = [status]
+        with pytest.raises(HTTPStatusError):
+            stub_solver().captcha_handler(task_payload={"body": "image"})
+        assert stub_api.endpoint_calls("createTask") == 1
+
+    async def test_aio_solving(self, stub_api, stub_solver):
+        stub_api.failures = [503, "ERROR_RATE_LIMIT"]
+        result = await stub_solver().aio_captcha_handler(task_payload={"body": "image"})
+        assert result["status"] == ResponseStatusEnm.Ready.value
+
+    def test_poll_retried(self, stub_api, stub_solver):
+        instance = stub_solver()
+        handle = instance.create_task_handle(task_payload={"body": "image"})
+        stub_api.failures = [500]
+        assert handle.poll()["status"] == ResponseStatusEnm.Ready.value
+        assert stub_api.endpoint_calls("getTaskResult") == 2
+
+    def test_balance(self, stub_api):
+        stub_api.failures = [502, 429]
+        control = Control(api_key=self.get_random_string(36), request_url=stub_api.url, retry_policy=fast_policy())
+        assert control.get_balance()["balance"] == 10.0
+
+    async def test_aio_balance(self, stub_api):
+        stub_api.failures = [502]
+        control = Control(api_key=self.get_random_string(36), request_url=stub_api.url, retry_policy=fast_policy())
+        assert (await control.aio_get_balance())["balance"] == 10.0
+
+    def test_balance_not_retried(self, stub_api):
+        stub_api.failures = [401]
+        control = Control(api_key=self.get_random_string(36), request_url=stub_api.url, retry_policy=fast_policy())
+        with pytest.raises(ValueError):
+            control.get_balance()
+        assert stub_api.endpoint_calls("getBalance") == 1
+
+    def test_download(self, stub_api):
+        stub_api.failures = [503]
+        result = FileInstrument().file_processing(captcha_link=f"{stub_api.url}/file", retry_policy=fast_policy())
+        assert result == base64.b64encode(stub_api.file_content).decode("utf-8")
+
+    async def test_aio_download(self, stub_api):
+        stub_api.failures = [503, 504]
+        result = await FileInstrument().aio_file_processing(
+            captcha_link=f"{stub_api.url}/file", retry_policy=fast_policy()
+        )
+        assert result == base64.b64encode(stub_api.file_content).decode("utf-8")
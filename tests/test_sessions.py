@@ -0,0 +1,122 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import aiohttp
+
+from tests.conftest import BaseTest
+from python3_capsolver.control import Control
+from python3_capsolver.core.enum import ResponseStatusEnm
+from python3_capsolver.core.sessions import LoopSessions, ThreadLocalSessions
+from python3_capsolver.image_to_text import ImageToText
+from python3_capsolver.core.loop_client import BackgroundLoop
+
+
+class TestThreadLocalSessions(BaseTest):
+    def test_same_thread(self):
+        sessions = ThreadLocalSessions()
+        assert sessions.get() is sessions.get()
+        assert len(sessions) == 1
+
+    def test_other_thread(self):
+        sessions = ThreadLocalSessions()
+        other = []
+        thread = threading.Thread(target=lambda: other.append(sessions.get()))
+        thread.start()
+        thread.join()
+        assert other[0] is not sessions.get()
+
+    def test_finished_threads_closed(self):
+        sessions = ThreadLocalSessions()
+        for _ in range(5):
+            thread = threading.Thread(target=sessions.get)
+            thread.start()
+            thread.join()
+        sessions.get()
+        assert len(sessions) == 1
+
+    def test_close(self):
+        sessions = ThreadLocalSessions()
+        session = sessions.get()
+        sessions.close()
+        assert len(sessions) == 0
+        assert sessions.get() is not session
+
+    def test_verify(self):
+        assert ThreadLocalSessions().get().verify is False
+        assert ThreadLocalSessions(verify=True).get().verify is True
+
+
+class TestLoopSessions(BaseTest):
+    async def test_same_loop(self):
+        sessions = LoopSessions()
+        assert sessions.get() is sessions.get()
+        assert len(sessions) == 1
+        await sessions.aio_close()
+        assert len(sessions) == 0
+
+    def test_closed_loops_dropped(self):
+        sessions = LoopSessions()
+        created = [asyncio.run(self.get_session(sessions)) for _ in range(3)]
+        assert len(sessions) == 1
+        assert all(session.closed for session in created[:-1])
+        sessions.close()
+        assert created[-1].closed
+        assert len(sessions) == 0
+
+    def test_other_thread_loop(self):
+        sessions = LoopSessions()
+        background_loop = BackgroundLoop()
+        background_loop.start()
+        try:
+            other = background_loop.submit(self.get_session(sessions)).result()
+            sessions.close()
+            # session is closed in its own loop
+            background_loop.submit(asyncio.sleep(0.1)).result()
+            assert other.closed
+        finally:
+            background_loop.stop()
+
+    @staticmethod
+    async def get_session(sessions: LoopSessions) -> aiohttp.ClientSession:
+        return sessions.get()
+
+    async def test_solving_session_reused(self, stub_api, stub_solver):
+        stub_api.polls_to_ready = 2
+        async with stub_solver(sleep_time=0.01) as instance:
+            results = await asyncio.gather(
+                *[instance.aio_captcha_handler(task_payload={"body": "image"}) for _ in range(5)]
+            )
+            handle = await instance.aio_create_task_handle(task_payload={"body": "image"})
+            await handle.aio_result()
+            assert len(instance.aio_sessions) == 1
+            session = instance.aio_sessions.get()
+        assert all(result["status"] == ResponseStatusEnm.Ready.value for result in results)
+        assert session.closed
+
+
+class TestThreadSafety(BaseTest):
+    workers = 64
+    calls = 300
+
+    def test_shared_instance_stress(self, stub_api):
+        stub_api.polls_to_ready = 2
+        solver = ImageToText(api_key=self.get_random_string(36), sleep_time=0.01, request_url=stub_api.url)
+        bodies = [f"image-{index}" for index in range(self.calls)]
+        with solver, ThreadPoolExecutor(max_workers=self.workers) as executor:
+            results = list(executor.map(lambda body: solver.captcha_handler(task_payload={"body": body}), bodies))
+            assert len(solver.sessions) <= self.workers
+
+        assert all(result["status"] == ResponseStatusEnm.Ready.value for result in results)
+        # every call sent own payload, no payloads are mixed between the threads
+        created = [payload["task"]["body"] for endpoint, payload in stub_api.requests if endpoint == "createTask"]
+        assert sorted(created) == sorted(bodies)
+        assert len({result["taskId"] for result in results}) == self.calls
+        assert len(solver.sessions) == 0
+
+    def test_shared_control_stress(self, stub_api):
+        control = Control(api_key=self.get_random_string(36), request_url=stub_api.url)
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            balances = list(executor.map(lambda _: control.get_balance()["balance"], range(self.calls)))
+        assert balances == [10.0] * self.calls
+        control.close()
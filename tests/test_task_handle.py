@@ -0,0 +1,113 @@
+import asyncio
+
+import pytest
+
+from tests.conftest import BaseTest
+from python3_capsolver.core.enum import ResponseStatusEnm
+from python3_capsolver.image_to_text import ImageToText
+from python3_capsolver.core.task_handle import TaskHandle, TaskPoller
+
+
+class TestTaskHandle(BaseTest):
+    def test_create_handle(self, stub_api, stub_solver):
+        handle = stub_solver().create_task_handle(task_payload={"body": "image"})
+        assert handle.task_id in stub_api.tasks
+        assert handle.status == ResponseStatusEnm.Idle.value
+        assert not handle.done()
+        assert stub_api.endpoint_calls("getTaskResult") == 0
+
+    def test_result(self, stub_api, stub_solver):
+        handle = stub_solver().create_task_handle(task_payload={"body": "image"})
+        result = handle.result(timeout=5)
+        assert result["status"] == ResponseStatusEnm.Ready.value
+        assert handle.done()
+        # result is cached
+        assert handle.result() == result
+        assert stub_api.endpoint_calls("getTaskResult") == 1
+
+    async def test_aio_result(self, stub_solver):
+        handle = await stub_solver().aio_create_task_handle(task_payload={"body": "image"})
+        result = await handle.aio_result(timeout=5)
+        assert result["status"] == ResponseStatusEnm.Ready.value
+        assert handle.done()
+
+    def test_poll(self, stub_api, stub_solver):
+        stub_api.polls_to_ready = 2
+        handle = stub_solver().create_task_handle(task_payload={"body": "image"})
+        assert handle.poll()["status"] == ResponseStatusEnm.Processing.value
+        assert not handle.done()
+        assert handle.poll()["status"] == ResponseStatusEnm.Ready.value
+        assert handle.done()
+
+    async def test_aio_poll(self, stub_api, stub_solver):
+        stub_api.polls_to_ready = 2
+        handle = await stub_solver().aio_create_task_handle(task_payload={"body": "image"})
+        assert (await handle.aio_poll())["status"] == ResponseStatusEnm.Processing.value
+        assert (await handle.aio_poll())["status"] == ResponseStatusEnm.Ready.value
+
+    def test_from_task_id(self, stub_solver):
+        task_id = stub_solver().create_task_handle(task_payload={"body": "image"}).task_id
+        handle = TaskHandle.from_task_id(stub_solver(), task_id=task_id)
+        assert handle.initial_wait() == 0
+        assert handle.result(timeout=5)["taskId"] == task_id
+
+    def test_result_timeout(self, stub_api, stub_solver):
+        stub_api.polls_to_ready = 1000
+        handle = stub_solver().create_task_handle(task_payload={"body": "image"})
+        assert handle.result(timeout=0.5)["errorCode"] == "ERROR_CLIENT_TIMEOUT"
+        # task is still processing on the server side
+        assert not handle.done()
+
+
+class TestTaskPoller(BaseTest):
+    def get_handles(self, stub_api, amount: int = 10) -> list:
+        solver = ImageToText(api_key=self.get_random_string(36), sleep_time=0.1, request_url=stub_api.url)
+        return [solver.create_task_handle(task_payload={"body": f"image-{i}"}) for i in range(amount)]
+
+    def test_as_completed(self, stub_api):
+        stub_api.polls_to_ready_queue = [3, 1]
+        handles = self.get_handles(stub_api, amount=2)
+        done = list(TaskPoller().as_completed(handles, timeout=5))
+        assert done == [handles[1], handles[0]]
+
+    def test_captcha_params_session(self, stub_api):
+        handles = self.get_handles(stub_api, amount=2)
+        session = handles[0].captcha_params.sessions.get()
+        post, posted = session.post, []
+
+        def counting_post(*args, **kwargs):
+            posted.append(args[0])
+            return post(*args, **kwargs)
+
+        session.post = counting_post
+        # the handles captcha params session is used, so its settings like TLS verification are applied
+        assert len(list(TaskPoller().as_completed(handles, timeout=5))) == 2
+        assert len(posted) == 2
+
+    async def test_aio_as_completed(self, stub_api):
+        stub_api.polls_to_ready_queue = [3, 1]
+        handles = self.get_handles(stub_api, amount=2)
+        done = [handle async for handle in TaskPoller().aio_as_completed(handles, timeout=5)]
+        assert done == [handles[1], handles[0]]
+
+    def test_wait(self, stub_api):
+        handles = self.get_handles(stub_api)
+        results = TaskPoller().wait(handles, timeout=5)
+        assert [result["taskId"] for result in results] == [handle.task_id for handle in handles]
+        assert all(handle.done() for handle in handles)
+
+    async def test_aio_wait(self, stub_api):
+        handles = self.get_handles(stub_api, amount=100)
+        results = await TaskPoller(concurrency=10).aio_wait(handles, timeout=5)
+        assert all(result["status"] == ResponseStatusEnm.Ready.value for result in results)
+        assert stub_api.endpoint_calls("getTaskResult") == 100
+
+    def test_timeout(self, stub_api):
+        stub_api.polls_to_ready = 1000
+        with pytest.raises(TimeoutError):
+            TaskPoller().wait(self.get_handles(stub_api, amount=2), timeout=0.5)
+
+    async def test_aio_timeout(self, stub_api):
+        stub_api.polls_to_ready = 1000
+        with pytest.raises(asyncio.TimeoutError):
+            await TaskPoller().aio_wait(self.get_handles(stub_api, amount=2), timeout=0.5)